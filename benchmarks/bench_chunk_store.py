@@ -0,0 +1,148 @@
+"""
+Chunk representation memory
+    Retained and peak Python heap (tracemalloc) for the chunks of the
+    sample novels (data/raw/*.txt) held three ways:
+      dicts+lists   what embed_chunks hands on: one dict per chunk, embedding as a list of floats
+      dicts+matrix  the previous materialized index: one dict per chunk + a float32 matrix
+      chunk_store   ChunkStore: columns, shared text buffer, float32 matrix
+    Novels are read the way ingestion reads them (parse_file_content, so
+    CRLF is normalised before chunking). Embeddings are random unit vectors
+    of --dimension (the model is not loaded); row access time and the
+    save/load round trip of the store are reported too.
+
+    Row access is the store's cost: a ChunkRow decodes each field on every
+    read, so reading rows one by one is an order of magnitude slower than
+    indexing a dict. search_many gathers each query's hits with
+    ChunkStore.records() instead; the "chunk_store.records" line shows that
+    path, in groups of --hits rows.
+
+Example:
+    python benchmarks/bench_chunk_store.py --dimension 384
+"""
+import argparse
+import gc
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pathway_pipeline.chunk_store import ChunkStore
+from src.pathway_pipeline.chunking import split_into_chunks
+from src.pathway_pipeline.udfs import parse_file_content
+
+
+def load_novels(raw_dir: Path) -> dict:
+    """Story id -> text, decoded and newline-normalised as ingestion does."""
+    return {path.stem: parse_file_content(path.read_bytes(), str(path)) for path in sorted(raw_dir.glob("*.txt"))}
+
+
+def dicts_with_lists(novels: dict, vectors: np.ndarray):
+    chunks = [chunk for story_id, text in novels.items() for chunk in split_into_chunks(text, story_id)]
+    return [{**chunk, 'embedding': vector.tolist()} for chunk, vector in zip(chunks, vectors)]
+
+
+def dicts_with_matrix(novels: dict, vectors: np.ndarray):
+    rows = [chunk for story_id, text in novels.items() for chunk in split_into_chunks(text, story_id)]
+    return rows, vectors[:len(rows)].copy()
+
+
+def chunk_store(novels: dict, vectors: np.ndarray):
+    chunks = (chunk for story_id, text in novels.items() for chunk in split_into_chunks(text, story_id))
+    return ChunkStore.from_chunks(
+        ({**chunk, 'embedding': vector} for chunk, vector in zip(chunks, vectors)), vectors.shape[1]
+    )
+
+
+def measure(build, *args) -> tuple:
+    """(result, retained bytes, peak bytes, seconds) of build(*args)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(*args)
+    seconds = time.perf_counter() - start
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, peak, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--raw-dir", default=str(Path(__file__).parent.parent / "data" / "raw"))
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--lookups", type=int, default=10000, help="Random row reads for the access timing")
+    parser.add_argument("--hits", type=int, default=24, help="Rows per records() gather (search_many: top_k * 3)")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    novels = load_novels(Path(args.raw_dir))
+    if not novels:
+        sys.exit(f"No .txt novels in {args.raw_dir}")
+    n_chunks = sum(len(split_into_chunks(text, story_id)) for story_id, text in novels.items())
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n_chunks, args.dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    print(f"📚 {len(novels)} novels, {n_chunks} chunks, {args.dimension}-d embeddings")
+
+    results = {"novels": list(novels), "chunks": n_chunks, "dimension": args.dimension, "representations": {}}
+    built = {}
+    for name, build in (("dicts+lists", dicts_with_lists), ("dicts+matrix", dicts_with_matrix), ("chunk_store", chunk_store)):
+        built[name], retained, peak, seconds = measure(build, novels, vectors)
+        results["representations"][name] = {
+            "retained_mb": round(retained / 2**20, 2),
+            "peak_mb": round(peak / 2**20, 2),
+            "bytes_per_chunk": round(retained / n_chunks),
+            "build_s": round(seconds, 3)
+        }
+        print(f"  {name:<13} {retained / 2**20:>8.1f} MB retained  {peak / 2**20:>8.1f} MB peak  "
+              f"{retained / n_chunks:>8.0f} B/chunk  {seconds * 1000:>6.0f} ms build")
+
+    # Row access: text + chunk_id of random rows, one at a time, and gathered
+    # per query (--hits rows) as search_many does
+    picks = [random.Random(1).randrange(n_chunks) for _ in range(args.lookups)]
+    groups = [picks[i:i + args.hits] for i in range(0, len(picks), args.hits)]
+    rows, store = built["dicts+matrix"][0], built["chunk_store"]
+    for name, read, batches in (
+        ("dicts", lambda i: (rows[i]['text'], rows[i]['chunk_id']), picks),
+        ("chunk_store", lambda i: (store[i]['text'], store[i]['chunk_id']), picks),
+        ("chunk_store.records", store.records, groups)
+    ):
+        start = time.perf_counter()
+        for batch in batches:
+            read(batch)
+        per_read = (time.perf_counter() - start) / len(picks)
+        results[f"row_read_us_{name}"] = round(per_read * 1e6, 2)
+        print(f"  row read ({name}): {per_read * 1e6:.2f} µs")
+    slowdown = results["row_read_us_chunk_store.records"] / max(results["row_read_us_dicts"], 1e-9)
+    print(f"  ⚠️ gathered store reads are {slowdown:.1f}x a dict read (single ChunkRow reads: "
+          f"{results['row_read_us_chunk_store'] / max(results['row_read_us_dicts'], 1e-9):.0f}x)")
+
+    with tempfile.TemporaryDirectory() as path:
+        start = time.perf_counter()
+        store.save(path)
+        saved = time.perf_counter() - start
+        disk = sum(f.stat().st_size for f in Path(path).iterdir())
+        start = time.perf_counter()
+        loaded = ChunkStore.load(path)
+        assert loaded[len(loaded) - 1] == store[len(store) - 1]
+        results["store_roundtrip"] = {
+            "disk_mb": round(disk / 2**20, 2),
+            "save_s": round(saved, 3),
+            "load_s": round(time.perf_counter() - start, 4)
+        }
+        print(f"  store on disk: {disk / 2**20:.1f} MB, save {saved * 1000:.0f} ms, load {results['store_roundtrip']['load_s'] * 1000:.1f} ms (mmap)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Per-result JSON overhead
+    Time spent turning one raw LLM completion into the /query response body,
+    for the original path (json.loads -> ReasoningTrace(**data) ->
+    ClassificationResult -> model_dump() -> QueryResponse -> JSON) and the
+    fast path (model_validate_json on the raw bytes -> model_construct
+    wrappers -> dump_json to bytes). Responses come from the LLM stand-in,
+    so they have the size and shape of real traces.
+
+Example:
+    python benchmarks/bench_json_path.py --results 2000 --repeat 5
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pathway_pipeline.llm_standin import synthetic_trace
+from src.pathway_pipeline.prompt_builder import build_messages
+from src.pathway_pipeline.reasoner import parse_reasoning_response
+from src.pathway_pipeline.service import QueryResponse, _QUERY_RESPONSE_JSON, to_query_response
+from src.reasoning_validation.schemas import ClassificationResult, ReasoningTrace
+
+
+def sample_completions(n: int, seed: int):
+    """n stand-in completions, each over its own 15 evidence chunks."""
+    rng = random.Random(seed)
+    words = "the count edmond prison marseille letter abbe faria treasure island revenge".split()
+    completions = []
+    for i in range(n):
+        evidence = [
+            {"chunk_id": f"story_ch{c}_p{i}", "chapter": f"ch_{c}",
+             "text": " ".join(rng.choice(words) for _ in range(120)) + "."}
+            for c in range(15)
+        ]
+        user_prompt = build_messages(f"Verify claim: claim {i}", evidence)[1]["content"]
+        completions.append(json.dumps(synthetic_trace(user_prompt, rng, f"claim {i}")).encode("utf-8"))
+    return completions
+
+
+def original_path(raw: bytes) -> bytes:
+    trace = ReasoningTrace(**json.loads(raw))
+    result = ClassificationResult(
+        status="SUCCESS",
+        target_class=trace.primary_hypothesis.hypothesis_text,
+        confidence=trace.primary_hypothesis.confidence_score,
+        reasoning_trace=trace
+    ).model_dump()
+    primary = result['reasoning_trace']['primary_hypothesis']
+    response = QueryResponse(
+        story_id="story",
+        decision=1 if result['status'] == "SUCCESS" else 0,
+        reasoning=result['rejection_reason'] or primary['hypothesis_text'],
+        confidence=result['confidence'],
+        evidence_used=primary['supporting_evidence'],
+        processing_time_ms=0.0
+    )
+    return response.model_dump_json().encode("utf-8")
+
+
+def fast_path(raw: bytes) -> bytes:
+    result = parse_reasoning_response(raw)
+    return _QUERY_RESPONSE_JSON.dump_json(to_query_response("story", result, 0.0))
+
+
+def best_time(fn, completions, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for raw in completions:
+            fn(raw)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-result JSON decode/validate/serialize overhead")
+    parser.add_argument("--results", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    completions = sample_completions(args.results, args.seed)
+    # Both paths must produce the same response body
+    assert json.loads(original_path(completions[0])) == json.loads(fast_path(completions[0]))
+
+    original = best_time(original_path, completions, args.repeat)
+    fast = best_time(fast_path, completions, args.repeat)
+    summary = {
+        "results": args.results,
+        "mean_completion_bytes": round(sum(map(len, completions)) / len(completions)),
+        "original_us_per_result": round(1e6 * original / args.results, 1),
+        "fast_us_per_result": round(1e6 * fast / args.results, 1),
+        "speedup": round(original / fast, 2) if fast > 0 else None,
+    }
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
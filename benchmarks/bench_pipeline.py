@@ -0,0 +1,341 @@
+"""
+End-to-end pipeline benchmark
+    For each corpus size (synthetic novels from synthetic_corpus.py, 1MB ..
+    1GB), a fresh interpreter runs the stages build_pipeline() performs and
+    then queries the app. The LLM is the in-process stand-in. It measures:
+      ingestion     MB/s   read + parse_file_content, as ingest_novels does
+      chunking      MB/s   split_into_chunks, the rule chunk_novels applies
+      embedding     chunks/s   vector_index.encode over every chunk
+      index build   s      vector_index.materialize (ChunkStore) and the corpus suffix arrays
+      query         p50/p99 ms   app.aquery on sampled claims, --concurrency in flight
+      peak RSS      MB     of the whole run (ru_maxrss)
+    Ingestion, chunking and the materialize step take the best of --repeat
+    runs, because at small sizes they finish in milliseconds.
+    The Pathway dataflow is lazy, so its stage timers only see graph
+    construction; the stage functions are timed directly instead.
+
+    Results are written as JSON and compared with a stored baseline
+    (benchmarks/baseline.json), listing every metric that got worse by
+    more than --tolerance. Baselines are machine-specific: refresh one
+    with --update-baseline on the machine that reviews compare on.
+
+Examples:
+    python benchmarks/bench_pipeline.py --sizes 1MB,16MB --check
+    python benchmarks/bench_pipeline.py --sizes 1MB,64MB,1GB --embedder model --output bench_pipeline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import yaml
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_query_path import percentile, run_load
+from synthetic_corpus import format_size, generate_corpus, parse_size, sample_claims
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+# Which way is better, per reported metric
+DIRECTIONS = {
+    "ingestion_mb_s": "higher",
+    "chunking_mb_s": "higher",
+    "embedding_chunks_s": "higher",
+    "index_build_s": "lower",
+    "corpus_index_s": "lower",
+    "query_p50_ms": "lower",
+    "query_p99_ms": "lower",
+    "peak_rss_mb": "lower",
+}
+
+_WORD = re.compile(r"[a-z']+")
+
+
+class HashingEmbedder:
+    """
+    Offline stand-in for the sentence-transformer (--embedder hashing):
+    hashed bag of words, L2-normalised. Deterministic and needs no model
+    download; its throughput is not the real model's.
+    """
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self._buckets: Dict[str, int] = {}
+
+    def encode(self, texts, batch_size: int = 32, convert_to_numpy: bool = True, normalize_embeddings: bool = True, **kwargs):
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        buckets = self._buckets
+        for row, text in enumerate(texts):
+            hits = []
+            for word in _WORD.findall(text.lower()):
+                bucket = buckets.get(word)
+                if bucket is None:
+                    bucket = buckets[word] = zlib.crc32(word.encode("utf-8")) % self.dimension
+                hits.append(bucket)
+            np.add.at(matrix[row], hits, 1.0)
+        if normalize_embeddings:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix /= np.where(norms > 0, norms, 1.0)
+        return matrix
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+def best_of(repeat: int, fn):
+    """(fastest of `repeat` timed calls, the last call's result)"""
+    best, result = float("inf"), None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_config(args, corpus_dir: str) -> dict:
+    """The app config with everything that would touch the network or data/ turned off."""
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    config['pathway']['input_folder'] = corpus_dir
+    reasoning = config.setdefault('reasoning', {})
+    reasoning.setdefault('cache', {})['enabled'] = False
+    reasoning['requests_per_minute'] = None
+    reasoning['tokens_per_minute'] = None
+    reasoning['concurrency'] = args.concurrency
+    config['validation'].setdefault('corpus_lookup', {})['snapshot_dir'] = None
+    config.setdefault('catalog', {})['path'] = None
+    # Every stage is measured, never loaded from a previous run
+    config['stage_cache'] = {'enabled': False}
+    config.setdefault('logging', {}).setdefault('tracing', {})['enabled'] = False
+    return config
+
+
+def run_size(corpus_dir: str, args) -> dict:
+    """All stages for one corpus, in this process (see --child)."""
+    from src.pathway_pipeline.app import NovelAnalyzerApp
+    from src.pathway_pipeline.chunking import split_into_chunks
+    from src.pathway_pipeline.index import register_embedding_model
+    from src.pathway_pipeline.llm_standin import LatencyModel, StandinResponder, SyntheticBackend
+    from src.pathway_pipeline.udfs import parse_file_content
+
+    with open(os.path.join(corpus_dir, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    with tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False) as f:
+        yaml.safe_dump(bench_config(args, corpus_dir), f)
+        config_path = f.name
+    try:
+        backend = SyntheticBackend(StandinResponder(latency=LatencyModel("fixed", args.llm_ms), seed=args.seed))
+        app = NovelAnalyzerApp(config_path, llm_backend=backend)
+    finally:
+        os.unlink(config_path)
+    if args.embedder == "hashing":
+        register_embedding_model(app.vector_index.model_name, HashingEmbedder(app.vector_index.dimension))
+
+    result = {"novels": len(manifest["novels"])}
+
+    def ingest():
+        texts = {}
+        for novel in manifest["novels"]:
+            with open(novel["path"], 'rb') as f:
+                texts[novel["story_id"]] = parse_file_content(f.read(), novel["path"])
+        return texts
+
+    total_bytes = sum(os.path.getsize(novel["path"]) for novel in manifest["novels"])
+    seconds, texts = best_of(args.repeat, ingest)
+    app.story_texts.update(texts)
+    result["corpus_mb"] = round(total_bytes / 2**20, 2)
+    result["ingestion_mb_s"] = round(total_bytes / 2**20 / seconds, 2)
+
+    seconds, chunks = best_of(args.repeat, lambda: [
+        chunk for story_id, text in app.story_texts.items() for chunk in split_into_chunks(text, story_id)
+    ])
+    result["chunks"] = len(chunks)
+    result["chunking_mb_s"] = round(total_bytes / 2**20 / seconds, 2)
+
+    start = time.perf_counter()
+    vectors = app.vector_index.encode([chunk['text'] for chunk in chunks])
+    result["embedding_chunks_s"] = round(len(chunks) / (time.perf_counter() - start), 1)
+
+    seconds, _ = best_of(args.repeat, lambda: app.vector_index.materialize(
+        {**chunk, 'embedding': vector} for chunk, vector in zip(chunks, vectors)
+    ))
+    result["index_build_s"] = round(seconds, 4)
+    del chunks, vectors
+    start = time.perf_counter()
+    app.build_corpus_index()
+    result["corpus_index_s"] = round(time.perf_counter() - start, 3)
+    # Queries are served from the materialized index, as after attach_snapshot()
+    app.indexed_chunks = None
+
+    claims = sample_claims(manifest, args.queries + args.warmup, args.seed)
+
+    async def call(claim):
+        result = await app.aquery(claim["story_id"], claim["backstory"], character=claim["character"])
+        return result['status']
+
+    async def queries():
+        # run_load takes (story_id, backstory) pairs; the claim rides along as the first item
+        await run_load(lambda claim, _: call(claim), [(claim, None) for claim in claims[:args.warmup]], args.concurrency)
+        return await run_load(lambda claim, _: call(claim), [(claim, None) for claim in claims[args.warmup:]], args.concurrency)
+
+    latencies, outcomes, wall = asyncio.run(queries())
+    result["query_p50_ms"] = round(1000 * percentile(latencies, 50), 2)
+    result["query_p99_ms"] = round(1000 * percentile(latencies, 99), 2)
+    result["query_rps"] = round(len(latencies) / wall, 1) if wall > 0 else 0.0
+    result["outcomes"] = {outcome: outcomes.count(outcome) for outcome in sorted(set(outcomes))}
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    app.cpu_pool.shutdown(wait=False)
+    return result
+
+
+def run_child(corpus_dir: str, args) -> dict:
+    """run_size in a fresh interpreter, so peak RSS and warm caches are per size."""
+    command = [
+        sys.executable, __file__, "--child", corpus_dir,
+        "--config", args.config, "--embedder", args.embedder, "--queries", str(args.queries),
+        "--repeat", str(args.repeat), "--warmup", str(args.warmup), "--concurrency", str(args.concurrency),
+        "--llm-ms", str(args.llm_ms), "--seed", str(args.seed)
+    ]
+    proc = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    lines = [line for line in proc.stdout.splitlines() if line.startswith("__result__ ")]
+    if proc.returncode != 0 or not lines:
+        tail = (proc.stderr.strip() or proc.stdout.strip()).splitlines()[-5:]
+        raise RuntimeError("\n".join(tail) or "benchmark child failed")
+    return json.loads(lines[-1][len("__result__ "):])
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[dict]:
+    """One row per metric present in both; status 'regression' if worse by more than tolerance."""
+    rows = []
+    for size, metrics in results["sizes"].items():
+        before = baseline.get("sizes", {}).get(size)
+        if not before:
+            continue
+        for metric, direction in DIRECTIONS.items():
+            if metric not in metrics or not before.get(metric):
+                continue
+            change = metrics[metric] / before[metric] - 1.0
+            worse = -change if direction == "higher" else change
+            rows.append({
+                "size": size, "metric": metric, "baseline": before[metric], "current": metrics[metric],
+                "change_pct": round(100 * change, 1),
+                "status": "regression" if worse > tolerance else ("improved" if -worse > tolerance else "ok")
+            })
+    return rows
+
+
+def print_comparison(rows: List[dict]):
+    icons = {"regression": "❌", "improved": "🚀", "ok": "  "}
+    print(f"\n{'size':<8}{'metric':<22}{'baseline':>12}{'current':>12}{'change':>9}")
+    for row in rows:
+        print(f"{row['size']:<8}{row['metric']:<22}{row['baseline']:>12}{row['current']:>12}"
+              f"{row['change_pct']:>+8.1f}% {icons[row['status']]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1MB,16MB", help="Comma-separated corpus sizes, e.g. 1MB,64MB,1GB")
+    parser.add_argument("--config", default="configs/system_rules.yaml")
+    parser.add_argument("--embedder", choices=["hashing", "model"], default="hashing",
+                        help="hashing: deterministic offline stand-in; model: the configured sentence-transformer")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of the fast stages (best is kept)")
+    parser.add_argument("--warmup", type=int, default=10, help="Queries run before timing starts")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--llm-ms", type=float, default=0.0, help="Fixed stand-in LLM latency")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--corpus-dir", default=os.path.join(tempfile.gettempdir(), "novel_bench_corpus"),
+                        help="Generated corpora are kept here (one subdirectory per size) and reused")
+    parser.add_argument("--output", help="Write the results (and the comparison) as JSON here")
+    parser.add_argument("--baseline", default=str(BASELINE))
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Relative change counted as a regression")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if any metric regressed")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print("__result__ " + json.dumps(run_size(args.child, args)))
+        return
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "embedder": args.embedder,
+            "queries": args.queries,
+            "repeat": args.repeat,
+            "concurrency": args.concurrency,
+            "llm_ms": args.llm_ms,
+            "seed": args.seed
+        },
+        "sizes": {}
+    }
+    for size in args.sizes.split(","):
+        nbytes = parse_size(size)
+        label = format_size(nbytes)
+        corpus_dir = os.path.join(args.corpus_dir, f"{label}_seed{args.seed}")
+        print(f"📚 {label}: generating corpus in {corpus_dir}...")
+        generate_corpus(corpus_dir, nbytes, args.seed)
+        print(f"⏱️  {label}: running stages...")
+        try:
+            results["sizes"][label] = run_child(corpus_dir, args)
+        except RuntimeError as e:
+            print(f"  ❌ {label}: {e}")
+            continue
+        metrics = results["sizes"][label]
+        print(f"  ingest {metrics['ingestion_mb_s']} MB/s | chunk {metrics['chunking_mb_s']} MB/s | "
+              f"embed {metrics['embedding_chunks_s']} chunks/s | index {metrics['index_build_s']} s "
+              f"(+{metrics['corpus_index_s']} s suffix arrays) | query p50 {metrics['query_p50_ms']} ms "
+              f"p99 {metrics['query_p99_ms']} ms | peak RSS {metrics['peak_rss_mb']} MB")
+        print(f"  outcomes: {metrics['outcomes']}")
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        # Results are only comparable under the same workload
+        differing = [
+            key for key in ("embedder", "queries", "concurrency", "llm_ms", "seed")
+            if baseline.get("meta", {}).get(key) != results["meta"][key]
+        ]
+        if differing:
+            print(f"⚠️  Baseline was measured with different {', '.join(differing)}; not comparing")
+        else:
+            rows = compare(results, baseline, args.tolerance)
+            results["comparison"] = {"baseline": args.baseline, "tolerance": args.tolerance, "rows": rows}
+            print_comparison(rows)
+            regressions = [row for row in rows if row["status"] == "regression"]
+            print(f"\n{'❌' if regressions else '✅'} {len(regressions)} regressions beyond {args.tolerance:.0%}")
+
+    from src.utils.io import safe_write_json
+    if args.output:
+        safe_write_json(results, args.output)
+        print(f"📁 Results written to {args.output}")
+    if args.update_baseline:
+        safe_write_json({key: results[key] for key in ("meta", "sizes")}, args.baseline)
+        print(f"📁 Baseline updated: {args.baseline}")
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
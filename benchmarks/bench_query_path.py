@@ -0,0 +1,169 @@
+"""
+Query-path load test
+    Throughput and tail latency of NovelAnalyzerApp.aquery (or a running
+    service.py) with the LLM replaced by the local stand-in, so it runs
+    offline on a plain Linux box.
+
+Examples:
+    # In-process app, synthetic LLM with ~800ms lognormal latency and 2% errors
+    python benchmarks/bench_query_path.py --requests 200 --concurrency 32 --median-ms 800 --error-rate 0.02
+
+    # Running service (start it with reasoning.backend.base_url pointing at llm_standin.py)
+    python benchmarks/bench_query_path.py --target service --url http://127.0.0.1:8080
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def percentile(values, q: float) -> float:
+    """Nearest-rank percentile (q in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def load_queries(test_file: str, n: int):
+    """Cycle through test.csv claims until n queries are available."""
+    df = pd.read_csv(test_file)
+    rows = [(row['book_name'].strip(), f"Verify claim: {row['content']}") for _, row in df.iterrows()]
+    return [rows[i % len(rows)] for i in range(n)]
+
+
+async def run_load(call, queries, concurrency: int):
+    """Fire queries with at most `concurrency` in flight; returns (latencies_s, outcomes, wall_s)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, outcomes = [], []
+
+    async def one(story_id, backstory):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                outcome = await call(story_id, backstory)
+            except Exception as e:
+                outcome = f"error:{type(e).__name__}"
+            latencies.append(time.perf_counter() - start)
+            outcomes.append(outcome)
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(one(s, b) for s, b in queries))
+    return latencies, outcomes, time.perf_counter() - wall_start
+
+
+def app_caller(args):
+    """In-process NovelAnalyzerApp with the LLM swapped for the stand-in."""
+    from src.pathway_pipeline.app import run_app
+    from src.pathway_pipeline.llm_backend import GroqBackend
+    from src.pathway_pipeline.llm_standin import LatencyModel, StandinResponder, SyntheticBackend
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    # Benchmark the real call path, not the response cache
+    config.setdefault('reasoning', {}).setdefault('cache', {})['enabled'] = False
+    config['reasoning']['requests_per_minute'] = None
+    config['reasoning']['tokens_per_minute'] = None
+    config['reasoning']['concurrency'] = args.concurrency
+
+    if args.standin_url:
+        backend = GroqBackend(base_url=args.standin_url)
+    else:
+        backend = SyntheticBackend(StandinResponder(
+            latency=LatencyModel(args.latency, args.median_ms, args.sigma, ms_per_token=args.ms_per_token),
+            error_rate=args.error_rate,
+            seed=args.seed
+        ))
+
+    with tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False) as f:
+        yaml.safe_dump(config, f)
+        config_path = f.name
+    try:
+        app = run_app(config_path=config_path, llm_backend=backend)
+    finally:
+        os.unlink(config_path)
+
+    async def call(story_id, backstory):
+        result = await app.aquery(story_id=story_id, backstory=backstory)
+        return result['status']
+
+    return call
+
+
+def service_caller(args):
+    """POST /query against a running service."""
+    import httpx
+    client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+
+    async def call(story_id, backstory):
+        response = await client.post("/query", json={"story_id": story_id, "backstory": backstory})
+        return f"http_{response.status_code}"
+
+    return call
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline query-path load test")
+    parser.add_argument("--target", choices=["app", "service"], default="app")
+    parser.add_argument("--url", default="http://127.0.0.1:8080", help="service URL (--target service)")
+    parser.add_argument("--config", default="configs/system_rules.yaml")
+    parser.add_argument("--standin-url", help="use a running llm_standin.py instead of the in-process stand-in")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal", "exponential"], default="lognormal")
+    parser.add_argument("--median-ms", type=float, default=800.0)
+    parser.add_argument("--sigma", type=float, default=0.5)
+    parser.add_argument("--ms-per-token", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--test-file", default="data/raw/test.csv")
+    parser.add_argument("--output", help="write the summary as JSON here")
+    args = parser.parse_args()
+
+    print("="*60)
+    print(f"🏁 QUERY PATH BENCHMARK ({args.target})")
+    print("="*60)
+
+    call = app_caller(args) if args.target == "app" else service_caller(args)
+    queries = load_queries(args.test_file, args.requests)
+    latencies, outcomes, wall = asyncio.run(run_load(call, queries, args.concurrency))
+
+    counts = {}
+    for outcome in outcomes:
+        counts[outcome] = counts.get(outcome, 0) + 1
+    summary = {
+        "target": args.target,
+        "requests": len(latencies),
+        "concurrency": args.concurrency,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall > 0 else 0.0,
+        "latency_ms": {
+            "mean": round(1000 * sum(latencies) / max(len(latencies), 1), 1),
+            "p50": round(1000 * percentile(latencies, 50), 1),
+            "p95": round(1000 * percentile(latencies, 95), 1),
+            "p99": round(1000 * percentile(latencies, 99), 1),
+            "max": round(1000 * max(latencies, default=0.0), 1),
+        },
+        "outcomes": counts,
+    }
+
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        from src.utils.io import safe_write_json
+        safe_write_json(summary, args.output)
+        print(f"📁 Summary written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
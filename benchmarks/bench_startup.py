@@ -0,0 +1,88 @@
+"""
+Cold-start cost
+    Time from a fresh interpreter to the point where work can start, for
+    the entry points that pay it: importing the pipeline (CLI tools,
+    tests), importing the service, constructing NovelAnalyzerApp, and
+    (with --with-model) the first encode, which loads the embedding model.
+    Every phase runs in its own subprocess so nothing is warm from a
+    previous one; the median over --repeat runs is reported.
+
+Example:
+    python benchmarks/bench_startup.py --repeat 5 --with-model
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+PHASES = {
+    "import_app": "import src.pathway_pipeline.app",
+    "import_service": "import src.pathway_pipeline.service",
+    "construct_app": (
+        "from src.pathway_pipeline.app import NovelAnalyzerApp\n"
+        "NovelAnalyzerApp('configs/system_rules.yaml')"
+    ),
+}
+MODEL_PHASE = (
+    "first_encode",
+    "from src.pathway_pipeline.app import NovelAnalyzerApp\n"
+    "NovelAnalyzerApp('configs/system_rules.yaml').vector_index.encode(['warm up'])"
+)
+
+# Wraps a phase so the child reports its own in-process time
+TIMED = "import time\n_start = time.perf_counter()\n{code}\nprint('__elapsed__', time.perf_counter() - _start)\n"
+
+
+def run_phase(code: str) -> dict:
+    """One fresh interpreter: in-process seconds for `code` and total wall seconds."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", TIMED.format(code=code)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "phase failed")
+    elapsed = next(float(line.split()[1]) for line in proc.stdout.splitlines() if line.startswith("__elapsed__"))
+    return {"in_process_s": elapsed, "wall_s": wall}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--with-model", action="store_true", help="Also time the first encode (loads the embedding model)")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    phases = dict(PHASES)
+    if args.with_model:
+        phases[MODEL_PHASE[0]] = MODEL_PHASE[1]
+
+    # Interpreter startup alone, subtracted from nothing but shown for scale
+    baseline = statistics.median(run_phase("pass")["wall_s"] for _ in range(args.repeat))
+    print(f"⏱️  python -c pass: {baseline * 1000:.0f} ms wall")
+
+    results = {"python_startup_wall_ms": round(baseline * 1000, 1), "phases": {}}
+    for name, code in phases.items():
+        try:
+            runs = [run_phase(code) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"  ❌ {name}: {e}")
+            continue
+        in_process = statistics.median(run["in_process_s"] for run in runs)
+        wall = statistics.median(run["wall_s"] for run in runs)
+        results["phases"][name] = {"in_process_ms": round(in_process * 1000, 1), "wall_ms": round(wall * 1000, 1)}
+        print(f"  {name:<16} {in_process * 1000:>8.0f} ms in process  {wall * 1000:>8.0f} ms wall")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
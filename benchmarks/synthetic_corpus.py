@@ -0,0 +1,159 @@
+"""
+Synthetic corpus generator
+    Writes novels of a given total size (1MB .. 1GB) shaped like the real
+    ones: chapter headings, paragraphs separated by blank lines, and a
+    cast of named characters who recur through the text. Output depends
+    only on (size, seed), so benchmark runs on the same inputs are
+    comparable. Also samples claims about the generated characters for
+    the query benchmark.
+
+Example:
+    python benchmarks/synthetic_corpus.py --size 64MB --out /tmp/corpus_64mb
+"""
+import argparse
+import json
+import random
+import re
+from pathlib import Path
+from typing import Dict, List
+
+_SIZE = re.compile(r"^\s*([\d.]+)\s*([KMG]?B?)\s*$", re.I)
+_UNITS = {"": 1, "B": 1, "K": 2**10, "KB": 2**10, "M": 2**20, "MB": 2**20, "G": 2**30, "GB": 2**30}
+
+FIRST_NAMES = ["Edmond", "Mercedes", "Albert", "Valentine", "Maximilian", "Helene", "Robert", "Mary",
+               "Jacques", "Haydee", "Gaspard", "Louise", "Fernand", "Julie", "Bertuccio", "Eugenie",
+               "Paganel", "Arabella", "Glenarvan", "Ayrton", "Thalcave", "Olbinett", "Mulrady", "Wilson"]
+LAST_NAMES = ["Dantes", "Morrel", "Villefort", "Danglars", "Caderousse", "Grant", "McNabbs", "Mondego",
+              "Faria", "Bertrand", "Noirtier", "Lafitte", "Harding", "Mangles", "Penrose", "Duval"]
+# Never in a cast: claims about them are screened out by character presence
+OUTSIDERS = ["Zephyrin Quill", "Orsola Brandt", "Tobiah Venn", "Ismay Holloway", "Casimir Oduya"]
+PLACES = ["Marseille", "Paris", "the Chateau d'If", "Rome", "Patagonia", "the harbour", "the island",
+          "the prison", "the old house", "the ship", "the coast", "Valparaiso", "the garden", "the inn"]
+VERBS = ["met", "followed", "betrayed", "rescued", "wrote to", "remembered", "accused", "trusted",
+         "searched for", "waited for", "spoke with", "forgave", "warned", "watched"]
+ADVERBS = ["quietly", "at dawn", "without a word", "in secret", "for many years", "with great care",
+           "before the storm", "after the trial", "once more", "at last"]
+OBJECTS = ["a letter", "the treasure", "a sealed box", "the map", "a promise", "the old sword",
+           "a ring", "the captain's log", "a bottle", "the key"]
+FILLER = ("the sea was grey and the wind came from the north while the bells of the town rang out "
+          "over roofs and masts and the people gathered along the quay to see what news the ship had "
+          "brought from distant ports and foreign shores").split()
+TITLES = ["The Arrival", "A Letter", "The Prison", "Escape", "The Treasure", "The Voyage", "Return",
+          "The Ball", "Revenge", "The Storm", "Old Friends", "The Trial", "A Confession", "The Coast"]
+
+
+def parse_size(text: str) -> int:
+    """'1MB' -> 1048576; '512KB', '1.5GB' and plain byte counts also work."""
+    match = _SIZE.match(text)
+    if not match:
+        raise ValueError(f"Bad size '{text}' (expected e.g. 1MB, 256KB, 1GB)")
+    return int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+
+def format_size(nbytes: int) -> str:
+    for unit, scale in (("GB", 2**30), ("MB", 2**20), ("KB", 2**10)):
+        if nbytes >= scale and nbytes % scale == 0:
+            return f"{nbytes // scale}{unit}"
+    return f"{nbytes}B"
+
+
+def make_cast(rng: random.Random, size: int = 12) -> List[str]:
+    names = {f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(size * 4)}
+    return sorted(names)[:size] if len(names) >= size else sorted(names)
+
+
+def sentence(rng: random.Random, cast: List[str]) -> str:
+    """One sentence that mentions one or two characters."""
+    subject, other = rng.choice(cast), rng.choice(cast)
+    filler = " ".join(rng.sample(FILLER, rng.randint(4, 12)))
+    return (f"{subject} {rng.choice(VERBS)} {other.split()[rng.randint(0, 1)]} {rng.choice(ADVERBS)} "
+            f"near {rng.choice(PLACES)} and carried {rng.choice(OBJECTS)}, while {filler}.")
+
+
+def write_novel(path: Path, nbytes: int, rng: random.Random, cast: List[str]):
+    """
+    Write about nbytes of text: a pool of sentences is generated once and
+    paragraphs are drawn from it, so even 1GB is written in minutes.
+    """
+    pool = [sentence(rng, cast) for _ in range(4000)]
+    written = 0
+    chapter = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < nbytes:
+            chapter += 1
+            block = [f"CHAPTER {chapter}. {rng.choice(TITLES)}"]
+            for _ in range(rng.randint(20, 60)):
+                block.append(" ".join(rng.choice(pool) for _ in range(rng.randint(2, 7))))
+            text = "\n\n".join(block) + "\n\n"
+            f.write(text)
+            written += len(text.encode("utf-8"))
+
+
+def generate_corpus(out_dir: str, total_bytes: int, seed: int = 42, max_novel_bytes: int = 16 * 2**20) -> Dict:
+    """
+    Write ceil(total_bytes / max_novel_bytes) novels into out_dir, each with
+    its own cast. Reuses out_dir if it already holds the same corpus.
+
+    Returns:
+        Manifest {"size", "seed", "novels": [{"story_id", "path", "bytes", "cast"}]}
+    """
+    out = Path(out_dir)
+    manifest_path = out / "manifest.json"
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest["size"] == total_bytes and manifest["seed"] == seed:
+            return manifest
+
+    out.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    count = max(1, -(-total_bytes // max_novel_bytes))
+    novels = []
+    for i in range(count):
+        story_id = f"synthetic_{i:03d}"
+        cast = make_cast(rng)
+        nbytes = total_bytes // count + (1 if i < total_bytes % count else 0)
+        path = out / f"{story_id}.txt"
+        write_novel(path, nbytes, rng, cast)
+        novels.append({"story_id": story_id, "path": str(path), "bytes": path.stat().st_size, "cast": cast})
+
+    manifest = {"size": total_bytes, "seed": seed, "novels": novels}
+    manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def sample_claims(manifest: Dict, n: int, seed: int = 42) -> List[Dict[str, str]]:
+    """
+    n claims {story_id, character, backstory}: half are about a cast
+    member, half about a character who never appears in the corpus.
+    """
+    rng = random.Random(seed)
+    claims = []
+    for i in range(n):
+        novel = rng.choice(manifest["novels"])
+        if i % 2 == 0:
+            character = rng.choice(novel["cast"])
+        else:
+            character = rng.choice(OUTSIDERS)
+        claims.append({
+            "story_id": novel["story_id"],
+            "character": character,
+            "backstory": f"Verify claim: {sentence(rng, [character])}"
+        })
+    return claims
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", default="1MB", help="Total corpus size, e.g. 1MB, 64MB, 1GB")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-novel-size", default="16MB", help="Larger corpora are split into novels of at most this size")
+    args = parser.parse_args()
+
+    manifest = generate_corpus(args.out, parse_size(args.size), args.seed, parse_size(args.max_novel_size))
+    total = sum(novel["bytes"] for novel in manifest["novels"])
+    print(f"📚 {len(manifest['novels'])} novels, {total / 2**20:.1f} MB in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
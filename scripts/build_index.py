@@ -8,6 +8,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.pathway_pipeline.app import run_app
+from src.utils.metrics import METRICS
 
 
 def main():
@@ -19,6 +20,7 @@ def main():
     # Run Blezecon's Pathway app
     app = run_app(config_path="configs/system_rules.yaml")
     
+    METRICS.print_report()
     print("\n✅ Index build complete!")
     print("📁 Outputs in data/index/")
 
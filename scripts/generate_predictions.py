@@ -1,16 +1,32 @@
 import sys
 import os
-import csv
+import argparse
+import asyncio
 import pandas as pd
 from pathlib import Path
-from tqdm import tqdm
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.pathway_pipeline.app import run_app
+from src.pathway_pipeline.batch_runner import Checkpoint, run_batch
+from src.utils.io import atomic_write_text, safe_write_json
+from src.utils.metrics import METRICS
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Predict 0/1 for every claim in test.csv")
+    parser.add_argument("--input", default="data/raw/test.csv")
+    parser.add_argument("--output", default="output.csv")
+    parser.add_argument("--config", default="configs/system_rules.yaml")
+    parser.add_argument("--concurrency", type=int, help="(book_name, char) groups in flight (default: batch.concurrency)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: batch.checkpoint_path)")
+    parser.add_argument("--fresh", action="store_true", help="Ignore and delete an existing checkpoint")
+    return parser.parse_args()
+
 
 def main():
+    args = parse_args()
     print("="*60)
     print("🚀 GENERATING BINARY PREDICTIONS")
     print("="*60)
@@ -18,10 +34,11 @@ def main():
     # 1. Initialize App (computes index if not cached, or loads it)
     # Note: In a real Pathway app, we might connect to a running service.
     # Here we instantiate the app which loads the index.
-    app = run_app(config_path="configs/system_rules.yaml")
+    app = run_app(config_path=args.config)
+    batch_config = app.config.get('batch') or {}
     
     # 2. Read Test Data
-    test_file = "data/raw/test.csv"
+    test_file = args.input
     if not os.path.exists(test_file):
         print(f"❌ Test file not found: {test_file}")
         return
@@ -29,52 +46,29 @@ def main():
     df = pd.read_csv(test_file)
     print(f"📄 Loaded {len(df)} rows from {test_file}")
     
-    results = []
-    
-    # 3. Process Each Row
-    for index, row in tqdm(df.iterrows(), total=len(df), desc="Processing"):
-        row_id = row['id']
-        book_name = row['book_name']
-        character = row['char']
-        content = row['content']
-        
-        # Clean story_id (assuming filename matches book_name exactly without extension)
-        # Note: In ingestion we might have stripped .txt. Ensure consistency.
-        # Filename: "The Count of Monte Cristo.txt" -> story_id: "The Count of Monte Cristo"
-        story_id = book_name.strip()
-        
-        # Formulate Query
-        # We want to verify if the content is TRUE or FALSE based on the text.
-        # The existing reasoner classifies. If it finds evidence -> True (1). 
-        # If Rejection/Contradiction -> False (0).
-        query_text = f"Verify claim: {content}"
-        
-        try:
-            result = app.query(story_id=story_id, backstory=query_text)
-            
-            # Map to 0 or 1
-            if result['status'] == 'SUCCESS':
-                prediction = 1
-            else:
-                prediction = 0
-                
-            # Optional: Log reason for debugging (not in final CSV)
-            # print(f"ID {row_id}: {result['status']} - {result.get('rejection_reason', '')}")
-            
-        except Exception as e:
-            print(f"⚠️ Error processing ID {row_id}: {e}")
-            prediction = 0 # Fail safe to 0
-            
-        results.append({'id': row_id, 'prediction': prediction})
+    # 3. Process Rows Concurrently
+    # LLM calls dominate, so rows are reasoned in parallel through the app's
+    # AsyncReasoningEngine (bounded by reasoning.concurrency and the rate budgets).
+    # Finished rows go to the checkpoint, so a crashed run resumes where it stopped.
+    checkpoint = Checkpoint(args.checkpoint or batch_config.get('checkpoint_path', "./data/cache/predictions.checkpoint.jsonl"))
+    if args.fresh:
+        checkpoint.clear()
+    results = asyncio.run(run_batch(
+        app, df, checkpoint,
+        concurrency=args.concurrency or batch_config.get('concurrency', 16),
+        memory_budget_mb=batch_config.get('memory_budget_mb')
+    ))
+    app.screening.print_report()
+    METRICS.print_report()
+    safe_write_json(METRICS.summary(), "output_metrics.json")
         
-    # 4. Save Output
-    output_path = "output.csv"
-    output_df = pd.DataFrame(results)
-    output_df.to_csv(output_path, index=False)
+    # 4. Save Output (atomically: a crash never leaves a half-written file)
+    output_path = args.output
+    atomic_write_text(pd.DataFrame(results).to_csv(index=False), output_path)
     
     print("\n" + "="*60)
-    print(f"✅ DONE! Results saved to {output_path}")
-    print("Check output.csv for 0/1 predictions.")
+    print(f"✅ DONE! Results saved to {output_path} (stage latencies in output_metrics.json)")
+    print(f"Check {output_path} for 0/1 predictions. Delete {checkpoint.path} (or pass --fresh) to start over.")
     print("="*60)
 
 if __name__ == "__main__":
@@ -0,0 +1,99 @@
+import sys
+import argparse
+import asyncio
+import os
+import yaml
+import pandas as pd
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pathway_pipeline.app import run_app
+from src.pathway_pipeline.knob_sweep import LatencyMemo, pick_cheapest, run_sweep
+from src.utils.io import safe_write_json
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Accuracy vs latency vs tokens over a grid of allowed knobs (labelled train.csv)")
+    parser.add_argument("--config", default="configs/system_rules.yaml")
+    parser.add_argument("--input", help="Labelled CSV (default: sweep.input)")
+    parser.add_argument("--output", help="Results JSON (default: sweep.output)")
+    parser.add_argument("--target", type=float, help="Accuracy target (default: sweep.target_accuracy)")
+    parser.add_argument("--grid", action="append", default=[], metavar="KNOB=V1,V2",
+                        help="Replace the sweep.grid values of one knob, e.g. retrieval.top_k=4,8 (repeatable)")
+    parser.add_argument("--limit", type=int, help="Only the first N rows")
+    parser.add_argument("--standin", action="store_true",
+                        help="Offline dry run: synthetic LLM responses (llm_standin.SyntheticBackend), accuracy is meaningless")
+    return parser.parse_args()
+
+
+def parse_grid(config_grid: dict, overrides: list) -> dict:
+    grid = {knob: list(values) for knob, values in (config_grid or {}).items()}
+    for override in overrides:
+        knob, _, values = override.partition("=")
+        if not values:
+            sys.exit(f"❌ Bad --grid '{override}' (expected KNOB=V1,V2)")
+        grid[knob.strip()] = [yaml.safe_load(value) for value in values.split(",")]
+    return grid
+
+
+def print_table(results: list, recommended):
+    print(f"\n  {'accuracy':>8}{'mean ms':>10}{'p95 ms':>10}{'tokens':>9}{'calls':>7}  knobs")
+    for result in sorted(results, key=lambda result: (-result['accuracy'], result['tokens_per_row'])):
+        marker = "⭐" if result is recommended else "  "
+        knobs = ", ".join(f"{knob.split('.')[-1]}={value}" for knob, value in result['knobs'].items())
+        print(f"{marker}{result['accuracy']:>8.3f}{result['mean_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+              f"{result['tokens_per_row']:>9.0f}{result['llm_calls']:>7}  {knobs}")
+
+
+def main():
+    args = parse_args()
+    print("="*60)
+    print("🎛️ KNOB SWEEP")
+    print("="*60)
+
+    backend = None
+    if args.standin:
+        from src.pathway_pipeline.llm_standin import SyntheticBackend
+        backend = SyntheticBackend()
+    # Builds (or, with stage_cache, reloads) the index once for every grid point
+    app = run_app(config_path=args.config, llm_backend=backend)
+    sweep_config = app.config.get('sweep') or {}
+
+    input_file = args.input or sweep_config.get('input', "data/raw/train.csv")
+    if not os.path.exists(input_file):
+        print(f"❌ Labelled file not found: {input_file}")
+        return
+    df = pd.read_csv(input_file)
+    if args.limit:
+        df = df.head(args.limit)
+    grid = parse_grid(sweep_config.get('grid'), args.grid)
+    print(f"📄 {len(df)} labelled rows from {input_file}, grid: {grid}")
+
+    # Latencies of --standin calls are synthetic; keep them out of the real memo
+    latency = LatencyMemo(None if args.standin else sweep_config.get('latency_path'))
+    report = asyncio.run(run_sweep(app, df, grid, latency))
+
+    target = args.target if args.target is not None else sweep_config.get('target_accuracy', 0.65)
+    recommended = pick_cheapest(report['points'], target)
+    print_table(report['points'], recommended)
+    print(f"\n  {report['llm_calls']} distinct LLM calls for {len(report['points'])} points "
+          f"({report['llm_calls_live']} not served by the response cache)")
+
+    report['target_accuracy'] = target
+    report['recommended'] = recommended
+    output_path = args.output or sweep_config.get('output', "sweep_results.json")
+    safe_write_json(report, output_path)
+
+    print("\n" + "="*60)
+    if recommended:
+        print(f"✅ Cheapest point with accuracy >= {target}: {recommended['knobs']}")
+    else:
+        print(f"⚠️ No point reaches accuracy {target}; best is {max(p['accuracy'] for p in report['points']):.3f}")
+    print(f"Results saved to {output_path}")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Admission control for the REST service
+Blezecon's responsibility
+
+At most max_concurrency queries run at once and at most max_queue wait
+for a slot; anything beyond that is shed immediately (HTTP 429 with a
+Retry-After estimate) instead of piling up until the service freezes.
+
+Config keys (service section of system_rules.yaml):
+    max_concurrency, max_queue, retry_after_s
+"""
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict
+
+
+class Overloaded(Exception):
+    """Raised when the queue is full; retry_after is in seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Service overloaded, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounded concurrency plus a bounded wait queue (one event loop).
+
+    Args:
+        max_concurrency: Queries processed at once
+        max_queue: Queries allowed to wait for a slot
+        retry_after_s: Minimum Retry-After sent with a 429
+    """
+
+    def __init__(self, max_concurrency: int = 32, max_queue: int = 256, retry_after_s: int = 1):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.retry_after_s = max(1, retry_after_s)
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        # Moving average of time spent holding a slot, for Retry-After
+        self.avg_service_s = 0.0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "AdmissionController":
+        return cls(
+            max_concurrency=config.get('max_concurrency', 32),
+            max_queue=config.get('max_queue', 256),
+            retry_after_s=config.get('retry_after_s', 1)
+        )
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained."""
+        backlog = (self.waiting + 1) / self.max_concurrency
+        return max(self.retry_after_s, math.ceil(backlog * self.avg_service_s))
+
+    def check(self):
+        """
+        Shed now if slot() would: lets a streaming endpoint answer 429
+        before its response starts, without holding a slot.
+
+        Raises:
+            Overloaded: no free slot and the wait queue is full
+        """
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded(self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Hold one processing slot for the duration of the block.
+
+        Raises:
+            Overloaded: no free slot and the wait queue is full
+        """
+        self.check()
+
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.avg_service_s = elapsed if self.avg_service_s == 0.0 else 0.9 * self.avg_service_s + 0.1 * elapsed
+            self.active -= 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+        }
@@ -23,18 +23,53 @@ except AttributeError:
     except ImportError:
         print("❌ Could not import windows_mocks. Ensure src/pathway_pipeline/windows_mocks.py exists.")
 
-from typing import Optional
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack
+from typing import AsyncContextManager, AsyncIterable, AsyncIterator, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+import numpy as np
 import yaml
 from src.utils.env_loader import load_env
-load_env()
 
 from .schema import RawNovelSchema, ChunkSchema, ReasoningResultSchema
-from .index import PathwayVectorIndex
-from .chunking import chunk_novels
-from .retrieval import retrieve_evidence
-from .reasoner import reason_with_llm
+from .index import PathwayVectorIndex, UnknownStoryError, touch_pages
+from .catalog import StoryCatalog
+from .chunk_store import ChunkStore
+from .stage_cache import StageCache, input_fingerprint
+from .chunking import chunk_novels, split_into_chunks
+from .retrieval import merge_evidence, retrieve_evidence_batch
+from .reasoner import is_error_result, reason_with_llm
+from .llm_engine import AsyncReasoningEngine
+from .llm_backend import LLMBackend
+from .screening import ScreeningCascade
 from src.reasoning_validation.validation import Validator
+from src.reasoning_validation.contradiction import ContradictionDetector
 from src.reasoning_validation.schemas import ClassificationResult
+from src.reasoning_validation.suffix_array import load_all, load_or_build, save_all
+from src.utils import tracing
+from src.utils.metrics import METRICS
+
+
+def record_result(result: ClassificationResult) -> ClassificationResult:
+    """
+    Count a finished query result: outcome, why it was answered without
+    the LLM (screening, LLM error, early abort), tokens and LLM cache use.
+    Validation rule rejections are counted by the Validator itself.
+    """
+    METRICS.inc("results_total", status=result.status)
+    usage = result.token_usage
+    if result.screened_by:
+        METRICS.inc("screened_total", stage=result.screened_by)
+    elif is_error_result(result):
+        METRICS.inc("rejections_total", reason="llm_error")
+    elif usage is not None and usage.aborted:
+        METRICS.inc("rejections_total", reason="early_abort")
+    if usage is not None:
+        METRICS.inc("llm_cache_total", outcome="hit" if usage.cached else "miss")
+        if not usage.cached:
+            METRICS.inc("llm_tokens_total", usage.prompt_tokens, kind="prompt")
+            METRICS.inc("llm_tokens_total", usage.completion_tokens, kind="completion")
+    return result
 
 
 class NovelAnalyzerApp:
@@ -45,19 +80,50 @@ class NovelAnalyzerApp:
     All team members plug their logic into this app.
     """
     
-    def __init__(self, config_path: str = "configs/system_rules.yaml"):
-        """Initialize Pathway app with config"""
+    def __init__(self, config_path: str = "configs/system_rules.yaml", llm_backend: Optional[LLMBackend] = None):
+        """
+        Initialize Pathway app with config
+        
+        Args:
+            config_path: YAML config
+            llm_backend: LLM backend override (default: reasoning.backend from config),
+                e.g. llm_standin.SyntheticBackend for offline load tests
+        """
         print("🚀 Initializing Novel Analyzer Pathway App...")
+        # Read here rather than at import, so importing the pipeline has no side effects
+        load_env()
         
         # Load config
         with open(config_path, 'r') as f:
             self.config = yaml.safe_load(f)
         
         print(f"✅ Config loaded from {config_path}")
+        # Per-query spans to a JSONL file (logging.tracing; a no-op unless enabled)
+        tracing.configure(self.config.get('logging'))
         
         # Initialize components
         self.vector_index = PathwayVectorIndex(self.config['retrieval']) # Adjusted config key
-        self.validator = Validator(self.config)
+        # Per-story suffix arrays for corpus-wide quote lookup (filled by build_corpus_index)
+        self.story_indexes = {}
+        # Contradiction checks reuse the index's chunk embeddings (filled by materialize_index)
+        self.contradictions = ContradictionDetector(
+            self.config['validation'].get('contradiction_detection') or {},
+            encode=self.vector_index.encode,
+            lookup=self.vector_index.lookup_embeddings
+        )
+        self.validator = Validator(self.config, corpus=self.story_indexes, contradiction_detector=self.contradictions)
+        self.llm_backend = llm_backend
+        self.reasoning_engine = AsyncReasoningEngine(self.config.get('reasoning', {}), backend=llm_backend)
+        # Raw story text per story_id, filled at ingestion (used by screening)
+        self.story_texts = {}
+        self.screening = ScreeningCascade(self.config['reasoning'].get('screening') or {}, story_texts=self.story_texts)
+        # Retrieval, screening and validation run here so the event loop only waits on LLM I/O
+        service_config = self.config.get('service') or {}
+        self.cpu_pool = ThreadPoolExecutor(max_workers=service_config.get('cpu_workers', 4), thread_name_prefix="novel-cpu")
+        # Per-story summary served by /stories (filled by materialize_index / attach_snapshot)
+        self.catalog = StoryCatalog()
+        # On-disk memo of the build stages (stage_cache; off = always rebuild)
+        self.stages = StageCache.from_config(self.config)
         
         print("✅ Pathway app ready!")
     
@@ -82,29 +148,40 @@ class NovelAnalyzerApp:
         
         # ========== STEP 1: INGESTION (YOUR CODE) ==========
         print("\n📚 Step 1: Ingesting novels...")
-        novels = self.ingest_novels()
+        with METRICS.timer("ingestion"):
+            novels = self.ingest_novels()
+            if self.stages.enabled:
+                self.load_story_texts()
         print(f"  ✅ Ingested novels via Pathway")
+        with METRICS.timer("corpus_index"):
+            self.build_corpus_index()
         
         # ========== STEP 2: CHUNKING (Raj'S LOGIC) ==========
         print("\n✂️ Step 2: Chunking novels...")
-        chunks = chunk_novels(
-            novels, 
-            chunk_size=self.config['chunking']['target_words']
-        )
+        with METRICS.timer("chunking"):
+            chunks = chunk_novels(
+                novels, 
+                chunk_size=self.config['chunking']['target_words']
+            )
         print(f"  ✅ Chunks created (Raj's logic)")
         
         # ========== STEP 3: EMBEDDINGS (YOUR CODE) ==========
         print("\n🔢 Step 3: Creating embeddings...")
-        chunks_with_embeddings = self.vector_index.embed_chunks(chunks)
+        with METRICS.timer("embedding"):
+            chunks_with_embeddings = self.vector_index.embed_chunks(chunks)
         print(f"  ✅ Embeddings created")
         
         # ========== STEP 4: INDEX (YOUR CODE) ==========
         print("\n📇 Step 4: Building vector index...")
-        indexed_chunks = self.vector_index.build_index(chunks_with_embeddings)
+        with METRICS.timer("index_build"):
+            indexed_chunks = self.vector_index.build_index(chunks_with_embeddings)
         print(f"  ✅ Vector index built")
         
         # Store for later use
         self.indexed_chunks = indexed_chunks
+        # Chunk texts are encoded here (the Pathway embedding step is lazy)
+        with METRICS.timer("materialize"):
+            self.materialize_index()
         
         print("\n" + "="*60)
         print("✅ PATHWAY PIPELINE BUILT")
@@ -132,25 +209,22 @@ class NovelAnalyzerApp:
         if is_windows_mode:
             print("⚠️  WINDOWS MODE DETECTED: Bypassing Pathway Engine...")
             # Manual Ingestion Logic
-            import glob
             import os
             from src.pathway_pipeline.udfs import parse_file_content
             
             data_rows = []
-            files = glob.glob(os.path.join(input_path, "*"))
-            print(f"  📂 Found {len(files)} files in {input_path}")
+            files = self.novel_paths()
+            print(f"  📂 Found {len(files)} novels in {input_path}")
             
             for file_path in files:
                 fname = os.path.basename(file_path)
-                if not (fname.endswith('.txt') or fname.endswith('.csv')): 
-                    continue
-                    
                 story_id = self._extract_story_id(file_path)
                 try:
                     with open(file_path, 'rb') as f:
                         raw_bytes = f.read()
                     content_str = parse_file_content(raw_bytes, file_path)
                     data_rows.append({"story_id": story_id, "content": content_str})
+                    self.story_texts[story_id] = content_str
                     print(f"    - Ingested: {fname}")
                 except Exception as e:
                     print(f"    - Error reading {fname}: {e}")
@@ -161,11 +235,12 @@ class NovelAnalyzerApp:
 
         # Standard Pathway Logic (Linux/Docker)
         # Import UDF from global module (pickling safe)
+        import os
         from src.pathway_pipeline.udfs import parse_file_content
 
-        # Use Pathway's file connector
+        # Use Pathway's file connector (novels only: train/test CSVs share the folder)
         novels = pw.io.fs.read(
-            path=input_path,
+            path=os.path.join(input_path, self.config['pathway'].get('novel_glob', "*.txt")),
             format='binary',
             mode='static',
             with_metadata=True
@@ -179,6 +254,230 @@ class NovelAnalyzerApp:
         
         return novels
     
+    def novel_paths(self) -> List[str]:
+        """The files ingested as stories: pathway.novel_glob in pathway.input_folder, sorted."""
+        import glob
+        import os
+        pathway_config = self.config['pathway']
+        pattern = os.path.join(pathway_config['input_folder'], pathway_config.get('novel_glob', "*.txt"))
+        return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+    
+    def load_story_texts(self):
+        """
+        Read every novel (pathway.novel_glob in pathway.input_folder) into
+        story_texts (stage "ingestion"). Pathway's own read is lazy; the
+        cached stages below work from these texts.
+        """
+        import json
+        import os
+        from src.pathway_pipeline.udfs import parse_file_content
+        
+        pathway_config = self.config['pathway']
+        self.stages.set_inputs("ingestion", input_fingerprint(
+            pathway_config['input_folder'], pathway_config.get('novel_glob', "*.txt")
+        ))
+        
+        def read_novels():
+            texts = {}
+            for file_path in self.novel_paths():
+                with open(file_path, 'rb') as f:
+                    texts[self._extract_story_id(file_path)] = parse_file_content(f.read(), file_path)
+            return texts
+        
+        def save(texts, path):
+            with open(os.path.join(path, "stories.json"), "w", encoding="utf-8") as f:
+                json.dump(texts, f)
+        
+        def load(path):
+            with open(os.path.join(path, "stories.json"), encoding="utf-8") as f:
+                return json.load(f)
+        
+        # Updated in place: screening holds a reference to this dict
+        self.story_texts.update(self.stages.run("ingestion", read_novels, save, load))
+    
+    def build_corpus_index(self):
+        """
+        Build (or reload) a suffix array per ingested story so the Validator
+        can find quotes outside the retrieved chunks.
+        Chunk boundaries come from the same rule chunk_novels applies.
+        With the stage cache on, the arrays are stage "corpus_index".
+        """
+        corpus_config = self.config['validation'].get('corpus_lookup') or {}
+        if not corpus_config.get('enabled', False) or not self.story_texts:
+            return
+        
+        if self.stages.enabled:
+            indexes = self.stages.run(
+                "corpus_index",
+                lambda: {
+                    story_id: load_or_build(story_id, text, split_into_chunks(text, story_id), None)
+                    for story_id, text in self.story_texts.items()
+                },
+                save_all,
+                lambda path: load_all(path, mmap_mode="r")
+            )
+            self.story_indexes.update(indexes)
+        else:
+            snapshot_dir = corpus_config.get('snapshot_dir')
+            for story_id, text in self.story_texts.items():
+                self.story_indexes[story_id] = load_or_build(
+                    story_id, text, split_into_chunks(text, story_id), snapshot_dir
+                )
+        print(f"  ✅ Corpus quote index ready for {len(self.story_indexes)} stories")
+    
+    @property
+    def index_version(self) -> str:
+        """Changes whenever the materialized corpus does (part of the service's result cache key)."""
+        return self.vector_index.version
+    
+    def materialize_index(self):
+        """
+        Keep a Python-side copy of the indexed chunks and their embeddings
+        (PathwayVectorIndex.materialize) so validation can look up chunk
+        vectors instead of re-encoding evidence text.
+        """
+        if self.stages.enabled and self.story_texts:
+            self.materialize_cached()
+            return
+        if self.story_texts:
+            # One story's chunk dicts at a time: the ChunkStore takes them column by column
+            chunks = (
+                chunk
+                for story_id, text in self.story_texts.items()
+                for chunk in split_into_chunks(text, story_id)
+            )
+        else:
+            try:
+                chunks = pw.debug.table_to_pandas(self.indexed_chunks).to_dict('records')
+            except Exception as e:
+                print(f"  ⚠️  Index not materialized: {e}")
+                return
+        self.vector_index.materialize(chunks)
+        print(f"  ✅ Materialized {len(self.vector_index.chunks)} chunk embeddings "
+              f"({self.vector_index.chunks.nbytes / 2**20:.1f} MB)")
+        self.build_catalog(self.vector_index.chunks)
+    
+    def materialize_cached(self):
+        """
+        materialize_index() through the stage cache: "chunking" (ChunkStore
+        without embeddings) -> "embedding" (the float32 matrix) -> "index"
+        (the vector index snapshot and the catalog). When the index key is
+        unchanged, only the index is loaded, memory-mapped like a serving
+        snapshot.
+        """
+        import os
+        
+        def chunk():
+            return ChunkStore.from_chunks(
+                chunk
+                for story_id, text in self.story_texts.items()
+                for chunk in split_into_chunks(text, story_id)
+            )
+        
+        def embed():
+            store = self.stages.run("chunking", chunk, lambda store, path: store.save(path), ChunkStore.load)
+            store.embeddings = self.stages.run(
+                "embedding",
+                lambda: self.vector_index.encode([store.text(row) for row in range(len(store))]),
+                lambda matrix, path: np.save(os.path.join(path, "embeddings.npy"), matrix),
+                lambda path: np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+            )
+            self.vector_index.materialize_store(store)
+            self.build_catalog(store)
+        
+        def save(_, path):
+            self.vector_index.save(path)
+            self.catalog.save(os.path.join(path, "catalog.json"))
+        
+        def load(path):
+            self.vector_index.attach(path)
+            self.catalog = StoryCatalog.load(os.path.join(path, "catalog.json"))
+        
+        self.stages.run("index", embed, save, load)
+        print(f"  ✅ Materialized {len(self.vector_index.chunks)} chunk embeddings "
+              f"({self.vector_index.chunks.nbytes / 2**20:.1f} MB)")
+    
+    def build_catalog(self, chunks: Sequence[Mapping]):
+        """
+        Compute the story catalog from the materialized chunks and persist
+        it to catalog.path (so tools can read coverage without building).
+        """
+        catalog_config = self.config.get('catalog') or {}
+        self.catalog = StoryCatalog.build(
+            chunks, self.index_version, character_limit=catalog_config.get('top_characters', 10)
+        )
+        if catalog_config.get('path'):
+            self.catalog.save(catalog_config['path'])
+        print(f"  ✅ Story catalog ready for {len(self.catalog)} stories")
+    
+    def attach_snapshot(self, snapshot_path: str):
+        """
+        Serve from a snapshot written by save_snapshot() instead of running
+        build_pipeline(): the embedding matrix, chunk texts and suffix
+        arrays are memory-mapped read-only, so N service workers share one
+        copy in the page cache instead of each re-embedding the corpus.
+        
+        Args:
+            snapshot_path: Directory passed to save_snapshot()
+        """
+        import os
+        import json
+        print(f"\n📎 Attaching snapshot {snapshot_path}...")
+        self.vector_index.attach(os.path.join(snapshot_path, "index"))
+        # Updated in place: the Validator and screening hold references to these dicts
+        self.story_indexes.update(load_all(os.path.join(snapshot_path, "suffix_arrays"), mmap_mode="r"))
+        with open(os.path.join(snapshot_path, "stories.json"), encoding="utf-8") as f:
+            self.story_texts.update(json.load(f))
+        self.catalog = StoryCatalog.load(os.path.join(snapshot_path, "catalog.json"))
+        self.indexed_chunks = None
+        print(f"  ✅ Attached {len(self.vector_index.rows)} chunks, {len(self.story_indexes)} suffix arrays")
+    
+    def story_footprint(self, story_id: str) -> int:
+        """
+        Approximate bytes a story's queries touch: its embedding rows, chunk
+        texts, suffix array and raw text (used to budget batch runs).
+        """
+        story_id = self.vector_index.resolve_story(story_id) or story_id
+        size = self.vector_index.story_nbytes(story_id) + len(self.story_texts.get(story_id, ""))
+        index = self.story_indexes.get(story_id)
+        if index is not None:
+            size += index.suffix_array.nbytes + index.offsets.nbytes + len(index.text)
+        return size
+    
+    def prefetch(self, story_id: str, characters: List[str] = ()):
+        """
+        Warm everything a story's claims will hit before they run: page in
+        its embedding rows and suffix array (memory-mapped in snapshot
+        mode) and build the screening character index for `characters`.
+        """
+        story_id = self.vector_index.resolve_story(story_id) or story_id
+        with tracing.span("prefetch", story_id=story_id, characters=len(characters)):
+            self.vector_index.prefetch_story(story_id)
+            index = self.story_indexes.get(story_id)
+            if index is not None:
+                touch_pages(index.suffix_array)
+            self.screening.prefetch(story_id, characters)
+    
+    def resolve_story(self, story_id: str) -> str:
+        """
+        The ingested story_id for a story name from a query or CSV
+        (PathwayVectorIndex.resolve_story: aliases, then case-insensitive).
+        
+        Raises:
+            UnknownStoryError: No indexed story matches, so the query would
+                have no evidence
+        """
+        if not self.vector_index.rows:
+            # Not materialized: retrieval falls back to retrieve_evidence
+            return story_id
+        resolved = self.vector_index.resolve_story(story_id)
+        if resolved is None:
+            METRICS.inc("unknown_story_total")
+            raise UnknownStoryError(
+                f"Story '{story_id}' is not indexed (known: {', '.join(sorted(self.vector_index.story_slices))})"
+            )
+        return resolved
+    
     def _extract_story_id(self, filepath: str) -> str:
         """Extract story ID from filepath handling multiple extensions"""
         import os
@@ -189,7 +488,7 @@ class NovelAnalyzerApp:
             clean_name = clean_name.replace(ext, '')
         return clean_name
     
-    def query(self, story_id: str, backstory: str) -> dict:
+    def query(self, story_id: str, backstory: str, character: Optional[str] = None) -> dict:
         """
         Query the system for consistency check
         
@@ -198,40 +497,299 @@ class NovelAnalyzerApp:
         Args:
             story_id: Novel to check
             backstory: Hypothetical backstory
+            character: Character the backstory is about (enables character screening)
             
         Returns:
             Result dict with decision and reasoning
         """
-        print(f"\n🔍 Processing query for story {story_id}...")
+        # Progress goes to the query's trace (logging.tracing) instead of stdout
+        with tracing.span("query", story_id=story_id, character=character) as trace:
+            # ========== STEP 5: RETRIEVAL (Raj'S LOGIC) ==========
+            # Obvious cases are answered without the LLM (screening runs right after retrieval)
+            [(evidence_chunks, screened)] = self._retrieve_and_screen([(story_id, backstory, character)])
+            
+            if screened is not None:
+                trace.set(status=screened.status, screened_by=screened.screened_by)
+                return record_result(screened).model_dump()
+            
+            # ========== STEP 6: REASONING (GOPAL'S LOGIC) ==========
+            with METRICS.timer("reasoning"):
+                reasoning_result = reason_with_llm(
+                    backstory=backstory,
+                    evidence=evidence_chunks,
+                    config=self.config['reasoning'],
+                    backend=self.llm_backend,
+                    validator=self.validator
+                )
+            
+            # ========== STEP 7: VALIDATION (GOPAL'S LOGIC) ==========
+            validated_result = self.validator.validate_classification(
+                reasoning_result,
+                retrieved_context=evidence_chunks
+            )
+            trace.set(status=validated_result.status)
+            
+            return record_result(validated_result).model_dump()
+    
+    async def aquery(self, story_id: str, backstory: str, character: Optional[str] = None) -> dict:
+        """
+        Async version of query()
         
-        # ========== STEP 5: RETRIEVAL (Raj'S LOGIC) ==========
-        print("  📖 Retrieving evidence...")
-        evidence_chunks = retrieve_evidence(
-            query=backstory,
-            indexed_chunks=self.indexed_chunks,
-            story_id=story_id,
-            top_k=self.config['retrieval']['top_k']
-        )
-        print(f"  ✅ Retrieved {len(evidence_chunks)} chunks")
-        
-        # ========== STEP 6: REASONING (GOPAL'S LOGIC) ==========
-        print("  🧠 Reasoning with LLM...")
-        reasoning_result = reason_with_llm(
-            backstory=backstory,
-            evidence=evidence_chunks,
-            config=self.config['reasoning']
-        )
-        print(f"  ✅ LLM reasoning complete")
+        Same retrieval -> reasoning -> validation flow, but the LLM call goes
+        through the AsyncReasoningEngine so many queries can be in flight at
+        once (used by generate_predictions.py).
+        
+        Args:
+            story_id: Novel to check
+            backstory: Hypothetical backstory
+            character: Character the backstory is about (enables character screening)
+            
+        Returns:
+            Result dict with decision and reasoning
+        """
+        result = await self.aquery_result(story_id, backstory, character)
+        return result.model_dump()
+    
+    async def aquery_result(self, story_id: str, backstory: str, character: Optional[str] = None) -> ClassificationResult:
+        """
+        aquery() without the dict conversion; service.py serializes the
+        model straight to JSON bytes.
+        CPU-bound steps run on cpu_pool; only the LLM call is awaited on the loop.
+        """
+        loop = asyncio.get_running_loop()
+        with tracing.span("query", story_id=story_id, character=character) as trace:
+            [(evidence_chunks, screened)] = await loop.run_in_executor(
+                self.cpu_pool, tracing.bind(self._retrieve_and_screen), [(story_id, backstory, character)]
+            )
+            if screened is not None:
+                trace.set(status=screened.status, screened_by=screened.screened_by)
+                return record_result(screened)
+            
+            with METRICS.timer("reasoning"):
+                reasoning_result = await self.reasoning_engine.reason(
+                    backstory=backstory,
+                    evidence=evidence_chunks,
+                    validator=self.validator
+                )
+            
+            result = await loop.run_in_executor(
+                self.cpu_pool, tracing.bind(self.validator.validate_classification), reasoning_result, evidence_chunks
+            )
+            trace.set(status=result.status)
+            return record_result(result)
+    
+    async def aquery_stream(
+        self,
+        queries: AsyncIterable[Union[Tuple[str, str, Optional[str]], Exception]],
+        block_size: int = 64,
+        max_in_flight: int = 64,
+        admit: Optional[Callable[[], AsyncContextManager]] = None
+    ) -> AsyncIterator[Tuple[int, Union[ClassificationResult, Exception]]]:
+        """
+        Many queries, results yielded in completion order
+        
+        Queries are consumed as they arrive; every block_size of them share
+        one batched retrieval + screening call on cpu_pool, and at most
+        max_in_flight reasoning calls run concurrently on the engine.
+        
+        Args:
+            queries: (story_id, backstory, character) tuples; an Exception
+                (e.g. a malformed input row) is yielded back as its result
+            block_size: Queries per batched retrieval call
+            max_in_flight: Concurrent reasoning + validation tasks
+            admit: Entered before each block is dispatched and held until all
+                of its queries have finished (e.g. AdmissionController.slot);
+                if entering raises, the block's queries yield that exception
+            
+        Yields:
+            (position in the input, ClassificationResult or the Exception raised)
+        """
+        loop = asyncio.get_running_loop()
+        done = object()
+        out: asyncio.Queue = asyncio.Queue()
+        slots = asyncio.Semaphore(max_in_flight)
+        tasks = set()
+        # Admissions of dispatched blocks -> queries of the block still running
+        held: Dict[AsyncExitStack, int] = {}
+        
+        async def finish(ticket: Optional[AsyncExitStack]):
+            if ticket is None:
+                return
+            held[ticket] -= 1
+            if held[ticket] == 0:
+                del held[ticket]
+                await ticket.aclose()
+        
+        async def reason_one(position: int, backstory: str, evidence: List[dict], ticket: Optional[AsyncExitStack]):
+            try:
+                with tracing.span("query", position=position) as trace:
+                    with METRICS.timer("reasoning"):
+                        result = await self.reasoning_engine.reason(backstory=backstory, evidence=evidence, validator=self.validator)
+                    result = await loop.run_in_executor(
+                        self.cpu_pool, tracing.bind(self.validator.validate_classification), result, evidence
+                    )
+                    trace.set(status=result.status)
+                out.put_nowait((position, record_result(result)))
+            except Exception as e:
+                out.put_nowait((position, e))
+            finally:
+                slots.release()
+                await finish(ticket)
+        
+        async def dispatch(block: List[Tuple[int, Tuple[str, str, Optional[str]]]]):
+            ticket = None
+            if admit is not None:
+                ticket = AsyncExitStack()
+                try:
+                    await ticket.enter_async_context(admit())
+                except Exception as e:
+                    for position, _ in block:
+                        out.put_nowait((position, e))
+                    return
+                held[ticket] = len(block)
+            try:
+                prepared = await loop.run_in_executor(
+                    self.cpu_pool, tracing.bind(self._retrieve_and_screen), [query for _, query in block]
+                )
+            except Exception as e:
+                for position, _ in block:
+                    out.put_nowait((position, e))
+                    await finish(ticket)
+                return
+            for (position, (_, backstory, _)), (evidence, screened) in zip(block, prepared):
+                if screened is not None:
+                    out.put_nowait((position, record_result(screened)))
+                    await finish(ticket)
+                    continue
+                await slots.acquire()
+                task = asyncio.create_task(reason_one(position, backstory, evidence, ticket))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        
+        async def feed():
+            try:
+                block = []
+                position = 0
+                async for query in queries:
+                    if not isinstance(query, Exception):
+                        # An unknown story fails its own item, not the whole block
+                        try:
+                            query = (self.resolve_story(query[0]),) + tuple(query[1:])
+                        except UnknownStoryError as e:
+                            query = e
+                    if isinstance(query, Exception):
+                        out.put_nowait((position, query))
+                    else:
+                        block.append((position, query))
+                    position += 1
+                    if len(block) >= block_size:
+                        await dispatch(block)
+                        block = []
+                if block:
+                    await dispatch(block)
+                await asyncio.gather(*tasks)
+            finally:
+                out.put_nowait(done)
         
-        # ========== STEP 7: VALIDATION (GOPAL'S LOGIC) ==========
-        print("  ✔️ Validating output...")
-        validated_result = self.validator.validate_classification(
-            reasoning_result,
-            retrieved_context=evidence_chunks
+        feeder = asyncio.create_task(feed())
+        try:
+            while True:
+                item = await out.get()
+                if item is done:
+                    break
+                yield item
+            await feeder
+        finally:
+            # Consumer went away (e.g. client disconnected): stop the remaining work
+            feeder.cancel()
+            for task in list(tasks):
+                task.cancel()
+            # Cancelled blocks give their admission back
+            for ticket in list(held):
+                del held[ticket]
+                await ticket.aclose()
+    
+    def _retrieve_and_screen(
+        self, queries: List[Tuple[str, str, Optional[str]]]
+    ) -> List[Tuple[List[dict], Optional[ClassificationResult]]]:
+        """
+        Batched retrieval plus screening for (story_id, backstory, character) queries.
+        
+        Returns:
+            (evidence, screened result or None) per query
+        """
+        queries = [(self.resolve_story(story_id), backstory, character) for story_id, backstory, character in queries]
+        diversity = self.config['retrieval'].get('diversity') or {}
+        # Timed per call: one observation covers the whole block of queries
+        with METRICS.timer("retrieval"), tracing.span("retrieve", queries=len(queries)) as trace_span:
+            evidence_lists = retrieve_evidence_batch(
+                queries=[backstory for _, backstory, _ in queries],
+                story_ids=[story_id for story_id, _, _ in queries],
+                vector_index=self.vector_index,
+                indexed_chunks=self.indexed_chunks,
+                top_k=self.config['retrieval']['top_k'],
+                min_chapters=diversity.get('min_distinct_chapters', 3) if diversity.get('enforce_chapter_diversity', True) else 0
+            )
+            trace_span.set(chunks=[len(evidence) for evidence in evidence_lists])
+        with METRICS.timer("screening"), tracing.span("screen", queries=len(queries)) as trace_span:
+            prepared = [
+                (evidence, self.screening.screen(backstory, evidence, story_id, character))
+                for (story_id, backstory, character), evidence in zip(queries, evidence_lists)
+            ]
+            trace_span.set(screened=sum(screened is not None for _, screened in prepared))
+        return prepared
+    
+    async def aquery_group(self, story_id: str, backstories: List[str], character: Optional[str] = None) -> List[dict]:
+        """
+        Batched version of aquery() for claims about the same story/character
+        
+        Each claim still gets its own retrieval, but the evidence is merged and
+        up to reasoning.batching.max_claims_per_call claims share one LLM call,
+        so the common passages are sent (and paid for) once.
+        
+        Args:
+            story_id: Novel to check
+            backstories: Claims about the same story (ideally one character)
+            character: Character the claims are about (enables character screening)
+            
+        Returns:
+            One result dict per backstory, in input order
+        """
+        with tracing.span("query_group", story_id=story_id, character=character, claims=len(backstories)):
+            return await self._aquery_group(story_id, backstories, character)
+    
+    async def _aquery_group(self, story_id: str, backstories: List[str], character: Optional[str]) -> List[dict]:
+        """aquery_group() inside its trace span."""
+        batching = self.config['reasoning'].get('batching') or {}
+        group_size = max(1, batching.get('max_claims_per_call', 6))
+        
+        loop = asyncio.get_running_loop()
+        prepared = await loop.run_in_executor(
+            self.cpu_pool, tracing.bind(self._retrieve_and_screen), [(story_id, backstory, character) for backstory in backstories]
         )
-        print(f"  ✅ Validation complete. Status: {validated_result.status}")
+        evidence_lists = [evidence for evidence, _ in prepared]
+        
+        # Screened claims are answered now; only the rest are batched
+        results = [record_result(screened).model_dump() if screened is not None else None for _, screened in prepared]
+        pending = [i for i, result in enumerate(results) if result is None]
         
-        return validated_result.model_dump()
+        async def run_group(indices: List[int]):
+            claims = [backstories[i] for i in indices]
+            claim_evidence = [evidence_lists[i] for i in indices]
+            shared_evidence = merge_evidence(claim_evidence)
+            with METRICS.timer("reasoning_batch"):
+                reasoning_results = await self.reasoning_engine.reason_batch(
+                    claims, shared_evidence, claim_evidence=claim_evidence
+                )
+            # One batched contradiction check for the whole group
+            validated = await loop.run_in_executor(
+                self.cpu_pool, tracing.bind(self.validator.validate_many), reasoning_results, [shared_evidence] * len(indices)
+            )
+            for i, result in zip(indices, validated):
+                results[i] = record_result(result).model_dump()
+        
+        await asyncio.gather(*(run_group(pending[start:start + group_size]) for start in range(0, len(pending), group_size)))
+        return results
     
     def run_service(self, host: str = "0.0.0.0", port: int = 8080):
         """
@@ -256,23 +814,29 @@ class NovelAnalyzerApp:
         """
         print(f"\n💾 Saving Pathway snapshot to {output_path}...")
         
-        # Use Pathway's snapshot feature
-        # This ensures reproducibility
+        # Corpus quote index (reloaded by build_corpus_index when the text is unchanged)
+        import os
+        import json
+        save_all(self.story_indexes, os.path.join(output_path, "suffix_arrays"))
         
-        # TODO: Implement snapshot logic
-        pass
+        # Materialized vector index and story texts: everything attach_snapshot() needs
+        self.vector_index.save(os.path.join(output_path, "index"))
+        with open(os.path.join(output_path, "stories.json"), "w", encoding="utf-8") as f:
+            json.dump(self.story_texts, f)
+        self.catalog.save(os.path.join(output_path, "catalog.json"))
+        print(f"  ✅ Snapshot saved ({len(self.vector_index.rows)} chunks, {len(self.story_indexes)} stories)")
 
 
 # ========== MAIN ENTRYPOINT ==========
 
-def run_app(config_path: str = "configs/system_rules.yaml"):
+def run_app(config_path: str = "configs/system_rules.yaml", llm_backend: Optional[LLMBackend] = None):
     """
     Run the Pathway application
     
     This is called by scripts/build_index.py
     and by Raj's orchestration layer!
     """
-    app = NovelAnalyzerApp(config_path)
+    app = NovelAnalyzerApp(config_path, llm_backend=llm_backend)
     app.build_pipeline()
     return app
 
@@ -0,0 +1,283 @@
+"""
+Resumable batch prediction
+Blezecon's responsibility
+
+Runs test.csv-style rows (id, book_name, char, content) through the app,
+grouped by story and then character so each story's data is loaded once
+and stays hot (see run_batch). Every finished prediction is appended to a
+JSONL checkpoint, so a restarted run skips rows that are already done;
+rows that failed (exceptions, LLM errors) are not checkpointed and are
+retried on the next run. Progress shows the ETA from the live throughput
+of this run. Output keeps the input order.
+
+Config keys (batch):
+    concurrency, checkpoint_path, memory_budget_mb
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from tqdm import tqdm
+
+
+def query_text(row) -> str:
+    # Formulate Query
+    # We want to verify if the content is TRUE or FALSE based on the text.
+    # The existing reasoner classifies. If it finds evidence -> True (1).
+    # If Rejection/Contradiction -> False (0).
+    return f"Verify claim: {row['content']}"
+
+
+def row_key(row) -> str:
+    """Hash of the fields a prediction depends on (an edited row is not skipped on resume)."""
+    payload = "\0".join(str(row[field]) for field in ("book_name", "char", "content"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def to_prediction(row_id, result: dict) -> dict:
+    """Map a query result to 0 or 1."""
+    prediction = 1 if result['status'] == 'SUCCESS' else 0
+    return {'id': row_id, 'prediction': prediction}
+
+
+def is_error(result: dict) -> bool:
+    """Result dict of a failed LLM call (see reasoner.is_error_result): retried on resume."""
+    return (
+        result['status'] == 'REJECTION'
+        and result.get('token_usage') is None
+        and result.get('screened_by') is None
+    )
+
+
+class Checkpoint:
+    """
+    Append-only JSONL of finished predictions: {"id" (as a string), "key", "prediction"}.
+
+    append() flushes and fsyncs, so run_batch calls it through
+    asyncio.to_thread; the lock keeps concurrent appends whole lines.
+
+    Args:
+        path: Checkpoint file (created on first append)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, dict]:
+        """id -> record; a torn last line (crash mid-write) is ignored."""
+        done = {}
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                done[record['id']] = record
+        return done
+
+    def append(self, records: Iterable[dict]):
+        lines = "".join(json.dumps(record, default=str) + "\n" for record in records)
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(lines)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def clear(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+async def predict_rows(app, rows: list) -> AsyncIterator[Tuple[dict, bool]]:
+    """
+    Query rows about the same book/character, one LLM call each, sharing
+    one batched retrieval + screening call (app.aquery_stream with the
+    whole group as a block). Yields (prediction, final) as rows finish;
+    final=False means retry on resume.
+    """
+    # The app maps book_name to the ingested story_id (file stem, matched
+    # case-insensitively, see NovelAnalyzerApp.resolve_story); a book that
+    # is not indexed fails its rows instead of answering them without evidence
+    story_id = rows[0]['book_name'].strip()
+
+    async def queries():
+        for row in rows:
+            yield (story_id, query_text(row), row['char'])
+
+    unanswered = set(range(len(rows)))
+    try:
+        async for position, result in app.aquery_stream(queries(), block_size=len(rows), max_in_flight=len(rows)):
+            row_id = rows[position]['id']
+            unanswered.discard(position)
+            if isinstance(result, Exception):
+                print(f"⚠️ Error processing ID {row_id}: {result}")
+                yield {'id': row_id, 'prediction': 0}, False
+                continue
+            outcome = {'status': result.status, 'token_usage': result.token_usage, 'screened_by': result.screened_by}
+            yield to_prediction(row_id, outcome), not is_error(outcome)
+    except Exception as e:
+        print(f"⚠️ Error processing group {story_id}/{rows[0]['char']}: {e}")
+    for position in sorted(unanswered):
+        yield {'id': rows[position]['id'], 'prediction': 0}, False # Fail safe to 0
+
+
+async def predict_group(app, rows: list) -> List[Tuple[dict, bool]]:
+    """Query rows about the same book/character in shared LLM calls."""
+    story_id = rows[0]['book_name'].strip()
+    try:
+        results = await app.aquery_group(story_id, [query_text(row) for row in rows], character=rows[0]['char'])
+        return [(to_prediction(row['id'], result), not is_error(result)) for row, result in zip(rows, results)]
+    except Exception as e:
+        print(f"⚠️ Error processing group {story_id}/{rows[0]['char']}: {e}")
+        return [({'id': row['id'], 'prediction': 0}, False) for row in rows]
+
+
+def plan_stories(df: pd.DataFrame) -> List[Tuple[str, List[list]]]:
+    """
+    Story-affinity plan: rows grouped by book_name, then by char, each in
+    order of first appearance. A story's character groups run together, so
+    its index slice, suffix array and character index stay hot instead of
+    being evicted whenever test.csv switches books.
+
+    Returns:
+        [(story_id, [rows of one character, ...]), ...]
+    """
+    return [
+        (str(book_name).strip(), [[row for _, row in group.iterrows()] for _, group in story.groupby('char', sort=False)])
+        for book_name, story in df.groupby('book_name', sort=False)
+    ]
+
+
+class MemoryBudget:
+    """
+    Async byte budget: reserve() waits until the bytes fit. A reservation
+    larger than the whole budget is admitted once nothing else is held, so
+    an oversized story runs alone rather than never.
+
+    Args:
+        budget_bytes: Total bytes; 0 or None for no limit
+    """
+
+    def __init__(self, budget_bytes: Optional[int] = None):
+        self.budget_bytes = budget_bytes or 0
+        self.used = 0
+        self._changed = asyncio.Condition()
+
+    @asynccontextmanager
+    async def reserve(self, nbytes: int):
+        async with self._changed:
+            await self._changed.wait_for(
+                lambda: not self.budget_bytes or self.used == 0 or self.used + nbytes <= self.budget_bytes
+            )
+            self.used += nbytes
+        try:
+            yield
+        finally:
+            async with self._changed:
+                self.used -= nbytes
+                self._changed.notify_all()
+
+
+async def run_batch(
+    app,
+    df: pd.DataFrame,
+    checkpoint: Optional[Checkpoint] = None,
+    concurrency: int = 16,
+    memory_budget_mb: Optional[float] = None
+) -> List[dict]:
+    """
+    Predict every row of df, resuming from checkpoint.
+
+    Work is planned story -> character (plan_stories). A story starts once
+    its working set (app.story_footprint) fits in the memory budget next to
+    the stories already running; it is prefetched once (app.prefetch) and
+    its character groups then run, at most `concurrency` groups in flight
+    across all stories. With reasoning.batching enabled a group shares LLM
+    calls (app.aquery_group), otherwise one retrieval call (predict_rows).
+
+    Args:
+        app: NovelAnalyzerApp
+        df: Rows with id, book_name, char, content
+        checkpoint: Finished predictions are appended here and skipped on restart
+        concurrency: Character groups in flight at once
+        memory_budget_mb: Combined working set of the stories running at once
+
+    Returns:
+        One {'id', 'prediction'} per row, in input order
+    """
+    done = checkpoint.load() if checkpoint is not None else {}
+    keys = {str(row['id']): row_key(row) for _, row in df.iterrows()}
+    # str(id) -> 0/1 (ids are compared as strings: the checkpoint is JSON)
+    finished = {
+        row_id: record['prediction']
+        for row_id, record in done.items()
+        if keys.get(row_id) == record.get('key')
+    }
+    pending = df[[str(row_id) not in finished for row_id in df['id']]]
+    if finished:
+        print(f"♻️  Resuming: {len(finished)} rows already in {checkpoint.path}, {len(pending)} to go")
+
+    batching = (app.config['reasoning'].get('batching') or {}).get('enabled', False)
+    slots = asyncio.Semaphore(max(1, concurrency))
+    budget = MemoryBudget(int(memory_budget_mb * 2**20) if memory_budget_mb else None)
+    loop = asyncio.get_running_loop()
+    # initial= keeps resumed rows out of the rate, so the ETA is this run's live throughput
+    progress = tqdm(total=len(df), initial=len(finished), desc="Processing", smoothing=0.1)
+    failed = {}
+
+    async def record(prediction: dict, ok: bool):
+        row_id = str(prediction['id'])
+        if ok and checkpoint is not None:
+            # fsync stays off the event loop, so other groups keep running meanwhile
+            await asyncio.to_thread(
+                checkpoint.append, [{'id': row_id, 'key': keys[row_id], 'prediction': prediction['prediction']}]
+            )
+        (finished if ok else failed)[row_id] = prediction['prediction']
+        progress.update(1)
+
+    async def run_group(rows):
+        async with slots:
+            if batching:
+                for prediction, ok in await predict_group(app, rows):
+                    await record(prediction, ok)
+            else:
+                async for prediction, ok in predict_rows(app, rows):
+                    await record(prediction, ok)
+
+    async def run_story(story_id, groups):
+        async with budget.reserve(app.story_footprint(story_id)):
+            characters = [rows[0]['char'] for rows in groups]
+            await loop.run_in_executor(None, app.prefetch, story_id, characters)
+            await asyncio.gather(*(run_group(rows) for rows in groups))
+
+    try:
+        await asyncio.gather(*(run_story(story_id, groups) for story_id, groups in plan_stories(pending)))
+    finally:
+        progress.close()
+        if checkpoint is not None:
+            checkpoint.close()
+
+    if failed:
+        print(f"⚠️  {len(failed)} rows failed (predicted 0); rerun to retry them")
+    return [
+        {'id': row_id, 'prediction': finished[str(row_id)] if str(row_id) in finished else failed[str(row_id)]}
+        for row_id in df['id']
+    ]
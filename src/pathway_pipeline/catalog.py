@@ -0,0 +1,156 @@
+"""
+Story catalog
+Blezecon's responsibility
+
+Per-story summary computed once when the index is materialized and kept
+in memory, so /stories and /story/{id}/metadata answer without touching
+disk:
+    story_id, word/chunk/chapter counts, chapter offsets (first
+    char_position, chunk and word count per chapter), top characters
+    (most frequent capitalised names) and the index version
+
+Persisted as JSON next to the index (catalog.path) and in service
+snapshots (catalog.json).
+
+Config keys (catalog):
+    path, top_characters
+"""
+import json
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.reasoning_validation.lexical import STOPWORDS
+
+
+_CAPITALISED = re.compile(r"\b[A-Z][a-zà-ÿ']+\b")
+_SENTENCE_START = re.compile(r"(?:^|[.!?\"“”]\s+|\n)([A-Z][a-zà-ÿ']+)")
+_WORD = re.compile(r"\b[a-zà-ÿ']+\b")
+
+
+def top_characters(texts: Iterable[str], limit: int = 10) -> List[Tuple[str, int]]:
+    """
+    Most frequent proper names: capitalised words, not counting
+    sentence-initial occurrences, that are rarely written in lower case.
+    """
+    capitalised: Counter = Counter()
+    lowered: Counter = Counter()
+    for text in texts:
+        capitalised.update(_CAPITALISED.findall(text))
+        capitalised.subtract(_SENTENCE_START.findall(text))
+        lowered.update(_WORD.findall(text))
+    names = [
+        (name, count) for name, count in capitalised.items()
+        if count > 0 and len(name) > 2 and name.lower() not in STOPWORDS and lowered[name.lower()] < count
+    ]
+    names.sort(key=lambda item: (-item[1], item[0]))
+    return names[:limit]
+
+
+def story_entry(story_id: str, chunks: List[dict], index_version: str, character_limit: int = 10) -> Dict[str, Any]:
+    """Catalog entry for one story from its chunks (ChunkSchema dicts, in order)."""
+    chapters: Dict[str, Dict[str, Any]] = {}
+    for chunk in chunks:
+        words = chunk.get('word_count') or len(chunk['text'].split())
+        chapter = chapters.setdefault(chunk['chapter'], {
+            "chapter": chunk['chapter'],
+            "char_position": chunk.get('char_position', 0),
+            "chunk_count": 0,
+            "word_count": 0
+        })
+        chapter["chunk_count"] += 1
+        chapter["word_count"] += words
+    return {
+        "story_id": story_id,
+        "word_count": sum(chapter["word_count"] for chapter in chapters.values()),
+        "chunk_count": len(chunks),
+        "chapter_count": len(chapters),
+        "chapters": sorted(chapters.values(), key=lambda chapter: chapter["char_position"]),
+        "top_characters": [
+            {"name": name, "mentions": count}
+            for name, count in top_characters((chunk['text'] for chunk in chunks), character_limit)
+        ],
+        "index_version": index_version
+    }
+
+
+class StoryCatalog:
+    """
+    In-memory story catalog.
+
+    Args:
+        entries: story_id -> entry (see story_entry)
+        index_version: Version of the index the entries were computed from
+    """
+
+    # Fields of the /stories listing (the full entry is served by get())
+    SUMMARY_FIELDS = ("story_id", "word_count", "chunk_count", "chapter_count")
+
+    def __init__(self, entries: Optional[Dict[str, Dict[str, Any]]] = None, index_version: str = ""):
+        self.entries = dict(sorted((entries or {}).items()))
+        self.index_version = index_version
+        self._summaries = [self._summary(entry) for entry in self.entries.values()]
+
+    @classmethod
+    def build(cls, chunks: List[dict], index_version: str, character_limit: int = 10) -> "StoryCatalog":
+        by_story: Dict[str, List[dict]] = {}
+        for chunk in chunks:
+            by_story.setdefault(chunk['story_id'], []).append(chunk)
+        return cls(
+            {story_id: story_entry(story_id, story_chunks, index_version, character_limit)
+             for story_id, story_chunks in by_story.items()},
+            index_version
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "StoryCatalog":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["stories"], data["index_version"])
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"index_version": self.index_version, "stories": self.entries}, f)
+
+    def _summary(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        summary = {field: entry[field] for field in self.SUMMARY_FIELDS}
+        summary["top_characters"] = [character["name"] for character in entry["top_characters"]]
+        return summary
+
+    def get(self, story_id: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(story_id)
+
+    def page(
+        self,
+        offset: int = 0,
+        limit: int = 50,
+        q: Optional[str] = None,
+        character: Optional[str] = None,
+        min_words: Optional[int] = None,
+        max_words: Optional[int] = None
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Filtered slice of the story summaries, in story_id order.
+
+        Args:
+            q: Case-insensitive substring of the story_id
+            character: Case-insensitive substring of one of the top characters
+
+        Returns:
+            (number of matching stories, summaries in [offset, offset + limit))
+        """
+        q = q.lower() if q else None
+        character = character.lower() if character else None
+        matches = [
+            summary for summary in self._summaries
+            if (q is None or q in summary["story_id"].lower())
+            and (character is None or any(character in name.lower() for name in summary["top_characters"]))
+            and (min_words is None or summary["word_count"] >= min_words)
+            and (max_words is None or summary["word_count"] <= max_words)
+        ]
+        return len(matches), matches[offset:offset + limit]
+
+    def __len__(self) -> int:
+        return len(self.entries)
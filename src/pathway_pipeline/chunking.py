@@ -1,5 +1,26 @@
+import re
+
 import pathway as pw
 
+
+# "Chapter 12. Title", "CHAPTER XII." starting a paragraph of its own
+CHAPTER_HEADING = re.compile(r"chapter\s+(\d+|[ivxlcdm]+)\b", re.I)
+
+
+def is_chapter_heading(paragraph: str) -> bool:
+    """
+    Whether a paragraph is a chapter heading: a short paragraph (a long
+    title may wrap onto a second line) that starts with "Chapter N". A table
+    of contents lists several chapters in one paragraph, so it is not one.
+    """
+    lines = paragraph.strip().split("\n")
+    return (
+        len(lines) <= 3
+        and len(paragraph.split()) <= 20
+        and CHAPTER_HEADING.match(lines[0].strip()) is not None
+        and not any(CHAPTER_HEADING.match(line.strip()) for line in lines[1:])
+    )
+
 def chunk_novels(novels: pw.Table, chunk_size: int = 500) -> pw.Table:
     """
     Chunks novels into segments respecting chapter boundaries.
@@ -16,52 +37,7 @@ def chunk_novels(novels: pw.Table, chunk_size: int = 500) -> pw.Table:
     
     class ChunkingUDF(pw.UDF):
         def __call__(self, content: str, story_id: str):
-            chunks = []
-            # logical splitting by chapter (assuming generic headers for now or provided metadata)
-            # In a real scenario, we might parse "Chapter X" headers.
-            # Here we assume content is the full text.
-            
-            # Simple simulation of boundary-aware chunking:
-            paragraphs = content.split('\n\n')
-            current_chunk = []
-            current_word_count = 0
-            chapter_idx = 1 # simplified
-            para_idx = 0
-            
-            for para in paragraphs:
-                words = para.split()
-                if not words: continue
-                
-                # Check soft boundaries
-                if current_word_count + len(words) > 600: # Max limit
-                    # Yield current chunk
-                    chunks.append({
-                        "text": "\n\n".join(current_chunk),
-                        "word_count": current_word_count,
-                        "chapter": f"ch_{chapter_idx}",
-                        "para_idx": para_idx,
-                        "story_id": story_id,
-                        "chunk_id": f"{story_id}_ch{chapter_idx}_p{para_idx}"
-                    })
-                    current_chunk = []
-                    current_word_count = 0
-                    para_idx += 1
-                
-                current_chunk.append(para)
-                current_word_count += len(words)
-            
-            # Yield last chunk
-            if current_chunk:
-                chunks.append({
-                    "text": "\n\n".join(current_chunk),
-                    "word_count": current_word_count,
-                    "chapter": f"ch_{chapter_idx}",
-                    "para_idx": para_idx,
-                    "story_id": story_id,
-                    "chunk_id": f"{story_id}_ch{chapter_idx}_p{para_idx}"
-                })
-            
-            return chunks
+            return split_into_chunks(content, story_id)
 
     # Apply UDF - flattened
     result = novels.select(
@@ -72,7 +48,82 @@ def chunk_novels(novels: pw.Table, chunk_size: int = 500) -> pw.Table:
         chapter=pw.this.chunks['chapter'],
         para_idx=pw.this.chunks['para_idx'],
         text=pw.this.chunks['text'],
-        word_count=pw.this.chunks['word_count']
+        word_count=pw.this.chunks['word_count'],
+        char_position=pw.this.chunks['char_position']
     )
     
     return result
+
+
+def split_into_chunks(content: str, story_id: str, max_words: int = 600) -> list:
+    """
+    The chunking rule applied by chunk_novels, as a plain function so the
+    same chunk_ids/char_positions can be computed outside the dataflow
+    (e.g. for the corpus quote index).
+    
+    Chunks never span a chapter heading (see is_chapter_heading), and
+    para_idx restarts in each chapter.
+    
+    Returns:
+        List of chunk dicts with char_position = offset of the chunk's first
+        paragraph in content (after CRLF -> LF, which ingestion already does)
+    """
+    # Paragraphs are split on blank lines; "\r\n\r\n" would never match
+    content = content.replace('\r\n', '\n').replace('\r', '\n')
+    chunks = []
+    paragraphs = content.split('\n\n')
+    # Chapters are numbered by their headings in order; text before the
+    # first heading (title page, contents) is chapter 0. A text without
+    # headings is all chapter 1.
+    has_headings = any(is_chapter_heading(para) for para in paragraphs)
+    current_chunk = []
+    current_word_count = 0
+    chapter_idx = 0 if has_headings else 1
+    para_idx = 0
+    offset = 0
+    chunk_start = 0
+    
+    def commit():
+        chunks.append({
+            "text": "\n\n".join(current_chunk),
+            "word_count": current_word_count,
+            "chapter": chapter_idx,  # int, as in ChunkSchema
+            "para_idx": para_idx,
+            "story_id": story_id,
+            "chunk_id": f"{story_id}_ch{chapter_idx}_p{para_idx}",
+            "char_position": chunk_start
+        })
+    
+    for para in paragraphs:
+        para_start = offset
+        offset += len(para) + 2
+        words = para.split()
+        if not words: continue
+        
+        # A chapter heading starts a new chapter (and its first chunk)
+        if is_chapter_heading(para):
+            if current_chunk:
+                commit()
+                current_chunk = []
+                current_word_count = 0
+            chapter_idx += 1
+            para_idx = 0
+        
+        # Check soft boundaries
+        if current_chunk and current_word_count + len(words) > max_words: # Max limit
+            # Yield current chunk
+            commit()
+            current_chunk = []
+            current_word_count = 0
+            para_idx += 1
+        
+        if not current_chunk:
+            chunk_start = para_start
+        current_chunk.append(para)
+        current_word_count += len(words)
+    
+    # Yield last chunk
+    if current_chunk:
+        commit()
+    
+    return chunks
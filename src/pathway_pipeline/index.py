@@ -2,12 +2,66 @@
 Vector index in Pathway
 Blezecon's responsibility
 """
+import hashlib
+import json
+import os
+import threading
+
 import pathway as pw
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from typing import List
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from .chunk_store import ChunkStore
 from .schema import ChunkSchema, ChunkWithEmbeddingSchema
+from src.utils.metrics import METRICS
+
+
+# Loaded embedding models, shared by every index in the process
+_models: Dict[str, Any] = {}
+_models_lock = threading.Lock()
+
+
+def get_embedding_model(model_name: str):
+    """
+    Process-wide SentenceTransformer for model_name, loaded on first use.
+    sentence_transformers (and torch) are only imported here, so importing
+    the pipeline or attaching a snapshot costs nothing until text is encoded.
+    """
+    with _models_lock:
+        model = _models.get(model_name)
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            print(f"🔧 Loading embedding model: {model_name}...")
+            model = SentenceTransformer(model_name)
+            print(f"  ✅ Model loaded")
+            _models[model_name] = model
+        return model
+
+
+def register_embedding_model(model_name: str, model):
+    """
+    Use `model` for model_name instead of loading it. Anything with
+    SentenceTransformer.encode's signature works, e.g. the offline
+    embedder of benchmarks/bench_pipeline.py.
+    """
+    with _models_lock:
+        _models[model_name] = model
+
+
+class UnknownStoryError(LookupError):
+    """A query names a story that is not in the index."""
+
+
+def fold_story_id(name: str) -> str:
+    """Case- and whitespace-insensitive form of a story name ("In Search of the Castaways" == "In search of the castaways")."""
+    return " ".join(str(name).split()).casefold()
+
+
+def touch_pages(array: np.ndarray):
+    """Read one element per 4 KiB page, so a memory-mapped array is paged in before it is needed."""
+    flat = array.reshape(-1)
+    if flat.size:
+        flat[::max(1, 4096 // flat.itemsize)].sum()
 
 
 class PathwayVectorIndex:
@@ -28,10 +82,195 @@ class PathwayVectorIndex:
             
         self.dimension = config.get('dimension', 384) # Default for MiniLM
         self.batch_size = config.get('batch_size', 32)
+        # Names used by the CSVs/clients -> ingested story_id (file stem), for
+        # names that differ by more than case and whitespace
+        self.story_aliases: Dict[str, str] = dict(config.get('story_aliases') or {})
+        
+        # Python-side copy of the index (see materialize)
+        self.chunks = ChunkStore.empty(self.dimension)
+        self.row_of: Dict[str, int] = {}
+        self.story_slices: Dict[str, Tuple[int, int]] = {}
+        self._folded_stories: Dict[str, str] = {}
+        self._warned_stories = set()
+        # Content hash of the materialized chunks (changes when the corpus does)
+        self.version = ""
+    
+    @property
+    def rows(self) -> ChunkStore:
+        """Materialized chunks; rows[i] is a read-only chunk mapping (ChunkRow)."""
+        return self.chunks
+    
+    @property
+    def embeddings(self) -> np.ndarray:
+        """float32 matrix, one L2-normalised row per chunk."""
+        return self.chunks.embeddings
+    
+    @property
+    def embedding_model(self):
+        """The shared model for model_name (loaded on first access, see get_embedding_model)."""
+        return get_embedding_model(self.model_name)
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Batch-encode texts into L2-normalised float32 vectors (dot product = cosine).
+        """
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        vectors = self.embedding_model.encode(
+            texts, batch_size=self.batch_size, convert_to_numpy=True, normalize_embeddings=True
+        )
+        return np.asarray(vectors, dtype=np.float32)
+    
+    def materialize(self, chunks: Iterable[dict]):
+        """
+        Keep the indexed chunks in memory as a columnar ChunkStore with
+        one float32 embedding matrix, so downstream checks can reuse chunk
+        embeddings instead of re-encoding text. Chunks that already carry
+        an 'embedding' are not encoded again. Rows are grouped by story, so
+        a story's embeddings are one contiguous slice (see search_many).
+        
+        Args:
+            chunks: Chunk dicts (ChunkSchema fields, optionally 'embedding');
+                consumed once, so a generator is fine
+        """
+        store = ChunkStore.from_chunks(chunks, self.dimension)
+        missing = store.missing_embeddings()
+        provided = np.ones(len(store), dtype=bool)
+        provided[missing] = False
+        norms = np.linalg.norm(store.embeddings[provided], axis=1, keepdims=True)
+        store.embeddings[provided] /= np.where(norms > 0, norms, 1.0)
+        if len(missing):
+            encoded = self.encode([store.text(row) for row in missing])
+            if store.embeddings.shape[1] != encoded.shape[1]:
+                store.embeddings = np.zeros((len(store), encoded.shape[1]), dtype=np.float32)
+            store.embeddings[missing] = encoded
+        self.materialize_store(store)
+    
+    def materialize_store(self, store: ChunkStore):
+        """
+        Serve from a ChunkStore whose embeddings are already filled in and
+        L2-normalised (e.g. loaded from the stage cache).
+        """
+        self._use_store(store)
+        digest = hashlib.sha1(self.model_name.encode("utf-8"))
+        for row in range(len(store)):
+            digest.update(f"{store.chunk_id(row)}\0{store.text(row)}\0".encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+    
+    def lookup_embeddings(self, chunk_ids: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Stored embeddings for chunk_ids.
+        
+        Returns:
+            (matrix with one row per id (zeros if unknown), boolean mask of ids found)
+        """
+        rows = np.array([self.row_of.get(chunk_id, -1) for chunk_id in chunk_ids], dtype=np.int64)
+        found = rows >= 0
+        matrix = np.zeros((len(chunk_ids), self.embeddings.shape[1]), dtype=np.float32)
+        matrix[found] = self.embeddings[rows[found]]
+        return matrix, found
+    
+    def story_nbytes(self, story_id: str) -> int:
+        """Bytes of a story's embedding rows and chunk texts."""
+        start, end = self.story_slices.get(story_id, (0, 0))
+        return int((end - start) * self.embeddings.shape[1] * self.embeddings.itemsize) + self.chunks.text_nbytes(start, end)
+    
+    def prefetch_story(self, story_id: str):
+        """Page in a story's embedding rows and chunk texts ahead of its queries (snapshot mode)."""
+        start, end = self.story_slices.get(story_id, (0, 0))
+        offsets = self.chunks.text_offsets
+        touch_pages(self.embeddings[start:end])
+        touch_pages(self.chunks.text_buffer[offsets[start]:offsets[end]])
+    
+    # ========== SNAPSHOT (shared by serving workers) ==========
+    
+    def save(self, path: str):
+        """
+        Write the materialized index as files a worker can memory-map: the
+        ChunkStore (embeddings.npy, texts.bin + offsets, columns.npz) plus
+        the model name and version as JSON.
+        """
+        self.chunks.save(path)
+        with open(os.path.join(path, "chunks.json"), "w", encoding="utf-8") as f:
+            json.dump({"model_name": self.model_name, "version": self.version}, f)
+    
+    def attach(self, path: str):
+        """
+        Use a snapshot written by save() without copying it: the embedding
+        matrix and texts are memory-mapped read-only, so every worker
+        process shares the same pages.
+        """
+        with open(os.path.join(path, "chunks.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["model_name"] != self.model_name:
+            raise ValueError(f"Snapshot embedded with {meta['model_name']}, index uses {self.model_name}")
+        
+        self._use_store(ChunkStore.load(path, mmap=True))
+        self.version = meta["version"]
+    
+    def _use_store(self, store: ChunkStore):
+        self.chunks = store
+        self.row_of = {chunk_id: row for row, chunk_id in enumerate(store.chunk_ids())}
+        self.story_slices = store.story_slices()
+        self._folded_stories = {fold_story_id(story_id): story_id for story_id in self.story_slices}
+        self._warned_stories = set()
+    
+    def resolve_story(self, name: str) -> Optional[str]:
+        """
+        The indexed story_id for a story name as clients write it: exact,
+        then retrieval.story_aliases, then ignoring case and whitespace
+        (CSV book_name "In Search of the Castaways" -> file stem
+        "In search of the castaways"). None if no indexed story matches.
+        """
+        if name in self.story_slices:
+            return name
+        name = self.story_aliases.get(name, name)
+        if name in self.story_slices:
+            return name
+        return self._folded_stories.get(fold_story_id(name))
+    
+    def search_many(self, queries: List[str], story_ids: List[str], top_k: int = 15) -> List[List[dict]]:
+        """
+        Top-k chunks for many queries over the materialized index.
+        All queries are encoded in one batch and each story's queries are
+        scored with one matrix product against that story's slice.
+        
+        Args:
+            queries: Search queries
+            story_ids: Story to search for each query
+            top_k: Number of results per query
+            
+        Returns:
+            One best-first list of chunk dicts (with 'similarity') per query
+        """
+        query_vectors = self.encode(queries)
+        results: List[List[dict]] = [[] for _ in queries]
+        by_story: Dict[str, List[int]] = {}
+        for position, story_id in enumerate(story_ids):
+            by_story.setdefault(story_id, []).append(position)
         
-        print(f"🔧 Loading embedding model: {self.model_name}...")
-        self.embedding_model = SentenceTransformer(self.model_name)
-        print(f"  ✅ Model loaded")
+        for name, positions in by_story.items():
+            story_id = self.resolve_story(name)
+            if story_id is None:
+                # Not silent: the app raises UnknownStoryError before searching
+                METRICS.inc("unknown_story_total", len(positions))
+                if name not in self._warned_stories:
+                    self._warned_stories.add(name)
+                    print(f"⚠️  Story '{name}' is not indexed; its queries get no evidence")
+                continue
+            start, end = self.story_slices[story_id]
+            scores = self.embeddings[start:end] @ query_vectors[positions].T  # (story chunks, queries)
+            k = min(top_k, end - start)
+            top = np.argpartition(-scores, k - 1, axis=0)[:k]
+            for column, position in enumerate(positions):
+                candidates = top[:, column]
+                ranked = candidates[np.argsort(-scores[candidates, column], kind="stable")]
+                # One column gather per query rather than a ChunkRow read per hit
+                hits = self.chunks.records(start + ranked)
+                for chunk, similarity in zip(hits, scores[ranked, column].tolist()):
+                    chunk['similarity'] = similarity
+                results[position] = hits
+        return results
     
     def embed_chunks(self, chunks: pw.Table) -> pw.Table:
         """
@@ -0,0 +1,278 @@
+"""
+Knob sweep
+Blezecon's responsibility
+
+Offline accuracy / latency / token evaluation of the tunable knobs
+(governance.allowed_knobs) over labelled claims: data/raw/train.csv rows
+(id, book_name, char, content, label consistent|contradict).
+
+Grid points share everything that does not depend on their knobs:
+    - the index is built once (and memoized across runs by stage_cache)
+    - candidates are searched once per row, for the largest top_k; each
+      point only slices and diversity-filters them (retrieval.select_evidence)
+    - there is one LLM call per distinct (reasoning knobs, claim, evidence).
+      Points that end up with the same evidence share it, and the LLM
+      response cache (reasoning.cache) carries it to the next sweep
+    - validation knobs only re-run the Validator on a copy of that result
+So a point that differs from another only in reject_if_confidence_below
+costs no LLM call at all.
+
+Each point is scored as if it ran alone. Row latency adds up:
+    - the shared search time (per row)
+    - the point's own rerank, screening and validation time
+    - the time of the LLM call the point uses
+The LLM time is the live time from the sweep that first made the call,
+kept in a small JSON file (sweep.latency_path), because a response cache
+hit would otherwise read as ~0 ms. Tokens are counted for cached responses
+too, so they show what the point would spend live. With streaming early
+abort on, stricter thresholds would abort some calls sooner, so their
+tokens are an upper bound.
+
+Config keys (sweep):
+    input, grid, target_accuracy, output, latency_path
+"""
+import asyncio
+import copy
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .batch_runner import is_error, query_text, to_prediction
+from .retrieval import select_evidence
+from src.reasoning_validation.validation import Validator
+from src.utils.io import safe_write_json
+
+
+# Knob prefix -> the step of the query path it changes
+PHASES = {"retrieval.": "retrieval", "reasoning.": "reasoning", "validation.": "validation"}
+LABELS = {"consistent": 1, "contradict": 0}
+
+
+def knob_phase(knob: str) -> str:
+    for prefix, phase in PHASES.items():
+        if knob.startswith(prefix):
+            return phase
+    raise ValueError(f"Knob '{knob}' is not a retrieval, reasoning or validation setting")
+
+
+def set_knob(config: Dict[str, Any], knob: str, value: Any):
+    """config["a"]["b"] = value for "a.b" (missing sections are created)."""
+    *parents, name = knob.split(".")
+    for part in parents:
+        config = config.setdefault(part, {})
+    config[name] = value
+
+
+def expand_grid(grid: Dict[str, List[Any]], config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Every combination of the grid's values, as {knob: value} dicts.
+
+    Raises:
+        ValueError: For a knob outside governance.allowed_knobs
+    """
+    allowed = set((config.get('governance') or {}).get('allowed_knobs') or [])
+    for knob in grid:
+        if knob not in allowed:
+            raise ValueError(f"Knob '{knob}' is not in governance.allowed_knobs")
+        knob_phase(knob)
+    knobs = list(grid)
+    return [dict(zip(knobs, values)) for values in itertools.product(*(grid[knob] for knob in knobs))]
+
+
+def point_config(config: Dict[str, Any], point: Dict[str, Any]) -> Dict[str, Any]:
+    config = copy.deepcopy(config)
+    for knob, value in point.items():
+        set_knob(config, knob, value)
+    return config
+
+
+def phase_key(point: Dict[str, Any], phase: str) -> Tuple:
+    """The point's knob values for one phase (points with equal keys share that phase)."""
+    return tuple(sorted((knob, value) for knob, value in point.items() if knob_phase(knob) == phase))
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(len(ordered) * q / 100) - 1))]
+
+
+def pick_cheapest(results: List[Dict], target_accuracy: float) -> Optional[Dict]:
+    """
+    Fewest tokens per row among the points at or above target_accuracy;
+    ties go to the lower p95 latency. None if no point reaches the target.
+    """
+    passing = [result for result in results if result['accuracy'] >= target_accuracy]
+    if not passing:
+        return None
+    return min(passing, key=lambda result: (result['tokens_per_row'], result['p95_ms']))
+
+
+class LatencyMemo:
+    """
+    Live LLM call time per call key, persisted across sweeps so responses
+    served by the LLM cache are still charged what they cost when made.
+
+    Args:
+        path: JSON file (None keeps the memo in memory only)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.seconds: Dict[str, float] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.seconds = json.load(f)
+
+    def save(self):
+        if self.path:
+            safe_write_json(self.seconds, self.path)
+
+
+def call_key(reasoning: Tuple, backstory: str, evidence: List[Dict]) -> str:
+    payload = json.dumps([reasoning, backstory, [chunk['chunk_id'] for chunk in evidence]], default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+async def timed_reason(app, key: str, backstory: str, evidence: List[Dict], validator: Validator, slots: asyncio.Semaphore):
+    """
+    (key, result, seconds) of one reasoning call on the app's engine. The
+    clock starts once a slot is free, so waiting behind the sweep's own
+    backlog of calls is not charged to the call.
+    """
+    async with slots:
+        start = time.perf_counter()
+        result = await app.reasoning_engine.reason(backstory=backstory, evidence=evidence, validator=validator)
+        return key, result, time.perf_counter() - start
+
+
+async def run_sweep(app, df: pd.DataFrame, grid: Dict[str, List[Any]], latency: Optional[LatencyMemo] = None) -> Dict:
+    """
+    Evaluate every grid point over the labelled rows (see module docstring).
+
+    Args:
+        app: NovelAnalyzerApp with a materialized index (vector_index.rows)
+        df: Rows with id, book_name, char, content, label
+        grid: {knob: [values]}; knobs missing from it keep their config value
+        latency: Memo of live LLM call times (default: in memory)
+
+    Returns:
+        {"rows", "points": [{knobs, accuracy, mean_ms, p95_ms, tokens_per_row, ...}],
+         "llm_calls": distinct calls, "llm_calls_live": calls not served by the cache}
+    """
+    if not app.vector_index.rows:
+        raise RuntimeError("The sweep needs a materialized index (build the pipeline first)")
+    latency = latency or LatencyMemo()
+    points = expand_grid(grid, app.config)
+    rows = df.to_dict('records')
+    labels = [LABELS[str(row['label']).strip().lower()] for row in rows]
+    # Raises UnknownStoryError for a book that is not indexed
+    queries = [(app.resolve_story(str(row['book_name']).strip()), query_text(row), row['char']) for row in rows]
+
+    # 1. Candidates once, for the largest top_k of the grid
+    configs = [point_config(app.config, point) for point in points]
+    max_top_k = max(config['retrieval']['top_k'] for config in configs)
+    start = time.perf_counter()
+    pools = app.vector_index.search_many(
+        [backstory for _, backstory, _ in queries], [story_id for story_id, _, _ in queries], top_k=max_top_k * 3
+    )
+    search_s = (time.perf_counter() - start) / max(1, len(rows))
+
+    # 2. Evidence + screening per distinct retrieval setting
+    prepared: Dict[Tuple, List[Tuple[List[Dict], Any, float]]] = {}
+    for point, config in zip(points, configs):
+        key = phase_key(point, "retrieval")
+        if key in prepared:
+            continue
+        diversity = config['retrieval'].get('diversity') or {}
+        min_chapters = diversity.get('min_distinct_chapters', 3) if diversity.get('enforce_chapter_diversity', True) else 0
+        prepared[key] = []
+        for (story_id, backstory, character), pool in zip(queries, pools):
+            start = time.perf_counter()
+            evidence = select_evidence(pool, config['retrieval']['top_k'], min_chapters)
+            screened = app.screening.screen(backstory, evidence, story_id, character)
+            prepared[key].append((evidence, screened, time.perf_counter() - start))
+
+    # 3. One LLM call per distinct (reasoning knobs, claim, evidence). Early
+    # abort uses the most lenient threshold of the grid, so no point sees a
+    # response cut short by a stricter one.
+    lenient = point_config(app.config, min(points, key=lambda point: point.get('validation.reject_if_confidence_below', 0)))
+    abort_validator = Validator(lenient, corpus=app.story_indexes, contradiction_detector=app.contradictions)
+    calls: Dict[str, Tuple[Any, float]] = {}
+    live = 0
+    reasoning_config = dict(app.config['reasoning'])
+    slots = asyncio.Semaphore(reasoning_config.get('concurrency', 8))
+    for reasoning in sorted({phase_key(point, "reasoning") for point in points}):
+        for knob, value in reasoning:
+            set_knob(app.config, knob, value)
+        app.reasoning_engine.temperature = app.config['reasoning'].get('temperature', 0.2)
+        jobs = {}
+        for point in points:
+            if phase_key(point, "reasoning") != reasoning:
+                continue
+            for (_, backstory, _), (evidence, screened, _) in zip(queries, prepared[phase_key(point, "retrieval")]):
+                key = call_key(reasoning, backstory, evidence)
+                if screened is None and key not in calls:
+                    jobs[key] = (backstory, evidence)
+
+        print(f"  🤖 {len(jobs)} LLM calls for {dict(reasoning) or 'config reasoning'}")
+        for key, result, seconds in await asyncio.gather(*(
+            timed_reason(app, key, backstory, evidence, abort_validator, slots) for key, (backstory, evidence) in jobs.items()
+        )):
+            cached = result.token_usage is not None and result.token_usage.cached
+            if not cached and result.token_usage is not None:
+                live += 1
+                latency.seconds[key] = round(seconds, 4)
+            calls[key] = (result, latency.seconds.get(key, seconds) if cached else seconds)
+    app.config['reasoning'].update(reasoning_config)
+    app.reasoning_engine.temperature = reasoning_config.get('temperature', 0.2)
+    latency.save()
+
+    # 4. Validation per point, on copies of the shared results
+    results = []
+    for point, config in zip(points, configs):
+        validator = Validator(config, corpus=app.story_indexes, contradiction_detector=app.contradictions)
+        reasoning = phase_key(point, "reasoning")
+        correct = errors = screened_rows = tokens = 0
+        used = set()
+        row_seconds = []
+        for row, label, (_, backstory, _), (evidence, screened, select_s) in zip(
+            rows, labels, queries, prepared[phase_key(point, "retrieval")]
+        ):
+            seconds = search_s + select_s
+            if screened is not None:
+                result = screened
+                screened_rows += 1
+            else:
+                key = call_key(reasoning, backstory, evidence)
+                used.add(key)
+                shared, llm_s = calls[key]
+                start = time.perf_counter()
+                result = validator.validate_classification(shared.model_copy(deep=True), evidence)
+                seconds += llm_s + time.perf_counter() - start
+            result = result.model_dump()
+            usage = result.get('token_usage')
+            if usage:
+                tokens += usage['prompt_tokens'] + usage['completion_tokens']
+            errors += is_error(result)
+            correct += to_prediction(row['id'], result)['prediction'] == label
+            row_seconds.append(seconds)
+        results.append({
+            "knobs": point,
+            "accuracy": round(correct / max(1, len(rows)), 4),
+            "mean_ms": round(1000 * sum(row_seconds) / max(1, len(row_seconds)), 1),
+            "p95_ms": round(1000 * percentile(row_seconds, 95), 1),
+            "tokens_per_row": round(tokens / max(1, len(rows)), 1),
+            "llm_calls": len(used),
+            "screened": screened_rows,
+            "errors": errors
+        })
+    return {"rows": len(rows), "points": results, "llm_calls": len(calls), "llm_calls_live": live}
@@ -0,0 +1,245 @@
+"""
+Injectable LLM backends
+Gopal's responsibility (Reasoning Logic)
+
+reason_with_llm and AsyncReasoningEngine talk to an LLMBackend instead of a
+Groq client built at import time. The default GroqBackend creates its
+clients on first use; tests and benchmarks can inject any other backend
+(e.g. llm_standin.SyntheticBackend) with set_backend().
+"""
+import asyncio
+import os
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMCompletion:
+    """Provider-neutral chat completion."""
+
+    def __init__(self, content: str, prompt_tokens: Optional[int] = None,
+                 completion_tokens: Optional[int] = None):
+        self.content = content
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+    @property
+    def total_tokens(self) -> Optional[int]:
+        if self.prompt_tokens is None or self.completion_tokens is None:
+            return None
+        return self.prompt_tokens + self.completion_tokens
+
+
+class LLMBackendError(Exception):
+    """
+    Provider failure normalised for retry logic.
+
+    Args:
+        message: Error description
+        status_code: HTTP status, None for connection-level failures
+        retry_after: Seconds suggested by a Retry-After header
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code is None or self.status_code in RETRYABLE_STATUS_CODES
+
+
+class LLMBackend:
+    """
+    Interface every backend implements.
+    """
+
+    def complete(self, messages: List[Dict[str, str]], model: str, temperature: float,
+                 max_tokens: Optional[int] = None) -> LLMCompletion:
+        raise NotImplementedError
+
+    async def acomplete(self, messages: List[Dict[str, str]], model: str, temperature: float,
+                        max_tokens: Optional[int] = None) -> LLMCompletion:
+        # Backends without native async support run in a worker thread
+        return await asyncio.to_thread(self.complete, messages, model, temperature, max_tokens)
+
+    def stream(self, messages: List[Dict[str, str]], model: str, temperature: float,
+               max_tokens: Optional[int] = None) -> Iterator[str]:
+        """
+        Yield the completion as text deltas. Closing the generator early
+        cancels the generation. Default: one delta with the full completion.
+        """
+        yield self.complete(messages, model, temperature, max_tokens).content
+
+    async def astream(self, messages: List[Dict[str, str]], model: str, temperature: float,
+                      max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        yield (await self.acomplete(messages, model, temperature, max_tokens)).content
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class GroqBackend(LLMBackend):
+    """
+    Groq (or any Groq/OpenAI-compatible endpoint via base_url)
+    """
+
+    def __init__(self, base_url: Optional[str] = None, api_key_env: str = "GROQ_API_KEY"):
+        self.base_url = base_url
+        self.api_key_env = api_key_env
+        self._client = None
+        self._async_client = None
+
+    def _api_key(self) -> Optional[str]:
+        # Local stand-ins don't check keys, so don't require one for them
+        return os.environ.get(self.api_key_env) or ("unused" if self.base_url else None)
+
+    @property
+    def client(self):
+        if self._client is None:
+            from groq import Groq
+            self._client = Groq(api_key=self._api_key(), base_url=self.base_url, max_retries=0)
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            from groq import AsyncGroq
+            self._async_client = AsyncGroq(api_key=self._api_key(), base_url=self.base_url, max_retries=0)
+        return self._async_client
+
+    def _request(self, messages, model, temperature, max_tokens) -> Dict[str, Any]:
+        request = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "response_format": {"type": "json_object"}
+        }
+        if max_tokens is not None:
+            request["max_tokens"] = max_tokens
+        return request
+
+    @staticmethod
+    def _wrap(completion) -> LLMCompletion:
+        usage = completion.usage
+        return LLMCompletion(
+            content=completion.choices[0].message.content,
+            prompt_tokens=getattr(usage, "prompt_tokens", None),
+            completion_tokens=getattr(usage, "completion_tokens", None)
+        )
+
+    @staticmethod
+    def _error(exc: Exception) -> LLMBackendError:
+        import groq
+        if isinstance(exc, groq.APIStatusError):
+            return LLMBackendError(str(exc), status_code=exc.status_code, retry_after=_retry_after(exc))
+        return LLMBackendError(f"{type(exc).__name__}: {exc}")
+
+    def complete(self, messages, model, temperature, max_tokens=None) -> LLMCompletion:
+        import groq
+        try:
+            completion = self.client.chat.completions.create(
+                **self._request(messages, model, temperature, max_tokens)
+            )
+        except (groq.APIStatusError, groq.APIConnectionError) as e:
+            raise self._error(e) from e
+        return self._wrap(completion)
+
+    async def acomplete(self, messages, model, temperature, max_tokens=None) -> LLMCompletion:
+        import groq
+        try:
+            completion = await self.async_client.chat.completions.create(
+                **self._request(messages, model, temperature, max_tokens)
+            )
+        except (groq.APIStatusError, groq.APIConnectionError) as e:
+            raise self._error(e) from e
+        return self._wrap(completion)
+
+    @staticmethod
+    def _delta(chunk) -> Optional[str]:
+        return chunk.choices[0].delta.content if chunk.choices else None
+
+    def stream(self, messages, model, temperature, max_tokens=None) -> Iterator[str]:
+        import groq
+        try:
+            stream = self.client.chat.completions.create(
+                **self._request(messages, model, temperature, max_tokens), stream=True
+            )
+        except (groq.APIStatusError, groq.APIConnectionError) as e:
+            raise self._error(e) from e
+        try:
+            for chunk in stream:
+                delta = self._delta(chunk)
+                if delta:
+                    yield delta
+        except (groq.APIStatusError, groq.APIConnectionError) as e:
+            raise self._error(e) from e
+        finally:
+            # Closing the HTTP response is what stops generation on an early abort
+            stream.close()
+
+    async def astream(self, messages, model, temperature, max_tokens=None) -> AsyncIterator[str]:
+        import groq
+        try:
+            stream = await self.async_client.chat.completions.create(
+                **self._request(messages, model, temperature, max_tokens), stream=True
+            )
+        except (groq.APIStatusError, groq.APIConnectionError) as e:
+            raise self._error(e) from e
+        try:
+            async for chunk in stream:
+                delta = self._delta(chunk)
+                if delta:
+                    yield delta
+        except (groq.APIStatusError, groq.APIConnectionError) as e:
+            raise self._error(e) from e
+        finally:
+            await stream.close()
+
+
+_backends: Dict[tuple, LLMBackend] = {}
+_injected: Optional[LLMBackend] = None
+_backends_lock = threading.Lock()
+
+
+def set_backend(backend: Optional[LLMBackend]):
+    """Inject a backend for the whole process (None restores config-driven backends)."""
+    global _injected
+    _injected = backend
+
+
+def get_backend(config: Dict[str, Any]) -> LLMBackend:
+    """
+    Process-wide backend for a 'reasoning' config section.
+
+    Config keys (reasoning.backend):
+        provider: "groq" (default)
+        base_url: Override endpoint, e.g. a local stand-in server
+        api_key_env: Environment variable holding the API key
+    """
+    if _injected is not None:
+        return _injected
+
+    backend_config = config.get('backend') or {}
+    provider = backend_config.get('provider', 'groq')
+    if provider != 'groq':
+        raise ValueError(f"Unknown LLM provider '{provider}'")
+
+    key = (provider, backend_config.get('base_url'), backend_config.get('api_key_env', 'GROQ_API_KEY'))
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            backend = GroqBackend(base_url=key[1], api_key_env=key[2])
+            _backends[key] = backend
+        return backend
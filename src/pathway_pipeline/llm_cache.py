@@ -0,0 +1,222 @@
+"""
+Persistent LLM response cache
+Gopal's responsibility (Reasoning Logic)
+
+SQLite-backed store of raw completions keyed by a fingerprint of everything
+that determines the answer (model, prompts, temperature, max_tokens). Reruns
+of generate_predictions.py only pay for prompts that actually changed.
+
+Modes:
+    read_write - serve hits, record misses (default)
+    replay     - serve hits only; a miss raises CacheMissError and the network
+                 is never touched. The file is opened read-only, so a
+                 recording can be shared (or mounted read-only) safely
+    off        - caching disabled
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+CACHE_MODES = ("read_write", "replay", "off")
+
+
+class CacheMissError(RuntimeError):
+    """Raised in replay mode when a prompt has no recorded response."""
+
+
+def prompt_fingerprint(
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    max_tokens: Optional[int]
+) -> str:
+    """
+    Stable hash of every input that determines a completion.
+
+    Returns:
+        SHA256 hex digest
+    """
+    payload = json.dumps(
+        [model, system_prompt, user_prompt, float(temperature), max_tokens],
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Disk-backed completion cache with TTL and size (LRU) eviction
+
+    Size eviction is amortised: it runs once the table holds more than
+    max_entries plus 1%, and trims it back to max_entries, instead of
+    scanning the table on every put.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "read_write",
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{mode}', expected one of {CACHE_MODES}")
+
+        self.path = path
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        # One connection shared by the sync path and the engine's worker threads
+        self._lock = threading.Lock()
+        if self.read_only:
+            self._conn = self._connect_read_only(path)
+            return
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                       key TEXT PRIMARY KEY,
+                       model TEXT,
+                       response TEXT NOT NULL,
+                       created_at REAL NOT NULL,
+                       last_access REAL NOT NULL
+                   )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+        self.evict()
+
+    @staticmethod
+    def _connect_read_only(path: str) -> sqlite3.Connection:
+        """Open a recorded cache without creating, migrating or writing to it."""
+        if path == ":memory:" or not os.path.exists(path):
+            raise FileNotFoundError(f"Replay mode needs a recorded cache, {path} not found")
+        uri = Path(path).absolute().as_uri() + "?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    @property
+    def read_only(self) -> bool:
+        return self.mode == "replay"
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a recorded completion.
+
+        Returns:
+            Raw completion content, or None on a miss (read_write mode)
+
+        Raises:
+            CacheMissError: on a miss in replay mode
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._expired(row[1], now):
+                if not self.read_only:
+                    with self._conn:
+                        self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is not None and not self.read_only:
+                with self._conn:
+                    self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+
+        if row is None:
+            self.misses += 1
+            if self.read_only:
+                raise CacheMissError(f"No recorded response for prompt {key[:12]} (replay mode)")
+            return None
+
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, response: str, model: Optional[str] = None):
+        """Record a completion (no-op in replay mode)."""
+        if self.read_only:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now)
+            )
+            # Over-counts replaced keys; evict() recounts
+            self._entries += 1
+        if self.max_entries is not None and self._entries > self.max_entries + self.max_entries // 100:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones beyond max_entries."""
+        if self.read_only:
+            return
+        with self._lock, self._conn:
+            if self.ttl_seconds is not None:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+                )
+            if self.max_entries is not None:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "  SELECT key FROM responses ORDER BY last_access DESC, rowid DESC LIMIT -1 OFFSET ?"
+                    ")",
+                    (self.max_entries,)
+                )
+            self._entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_open_caches: Dict[str, LLMResponseCache] = {}
+_open_caches_lock = threading.Lock()
+
+
+def open_response_cache(cache_config: Optional[Dict[str, Any]]) -> Optional[LLMResponseCache]:
+    """
+    Get the process-wide cache for a 'reasoning.cache' config section.
+
+    Returns:
+        LLMResponseCache, or None when caching is disabled
+    """
+    if not cache_config or not cache_config.get('enabled', False):
+        return None
+    mode = cache_config.get('mode', 'read_write')
+    if mode == "off":
+        return None
+
+    path = cache_config.get('path', './data/cache/llm_responses.sqlite')
+    with _open_caches_lock:
+        cache = _open_caches.get(path)
+        if cache is None or cache.mode != mode:
+            cache = LLMResponseCache(
+                path,
+                mode=mode,
+                ttl_seconds=cache_config.get('ttl_seconds'),
+                max_entries=cache_config.get('max_entries')
+            )
+            _open_caches[path] = cache
+        return cache
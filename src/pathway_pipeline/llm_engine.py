@@ -0,0 +1,363 @@
+"""
+Async reasoning engine
+Gopal's responsibility (Reasoning Logic)
+
+Runs many reason_with_llm-style calls concurrently on asyncio instead of one
+blocking Groq call at a time. A RateLimitScheduler keeps the engine under the
+provider's requests/min and tokens/min budgets, failed calls are retried with
+jittered exponential backoff on 429/5xx, and every call has a hard deadline.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.reasoning_validation.schemas import ClassificationResult
+from src.utils import tracing
+from src.utils.metrics import METRICS
+from .llm_backend import LLMBackend, LLMBackendError, LLMCompletion, get_backend
+from .llm_cache import open_response_cache
+from .llm_streaming import EarlyAbort, StreamMonitor
+from .prompt_builder import BuiltPrompt, PromptBuilder, count_tokens
+from .reasoner import (
+    DEFAULT_MAX_TOKENS,
+    DEFAULT_MODEL,
+    aborted_result,
+    batch_max_tokens,
+    claim_ids,
+    parse_batch_response,
+    parse_reasoning_response,
+    rejection_result,
+    request_fingerprint,
+    streaming_enabled,
+    token_usage,
+)
+
+
+class RateLimitScheduler:
+    """
+    Sliding-window admission for requests/min and tokens/min budgets.
+
+    Every call reserves its estimated token cost before it is sent; once the
+    provider reports real usage the reservation is settled to the actual value
+    so the window reflects what was really spent.
+    """
+
+    WINDOW_SECONDS = 60.0
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        clock=time.monotonic,
+        sleep=asyncio.sleep
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._clock = clock
+        self._sleep = sleep
+        self._window = deque()  # [timestamp, tokens] reservations
+        self._lock = None
+        self._lock_loop = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # asyncio primitives belong to one event loop; rebuild when run_many starts a new one
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _prune(self, now: float):
+        while self._window and now - self._window[0][0] >= self.WINDOW_SECONDS:
+            self._window.popleft()
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        """Seconds until a reservation of `tokens` fits both budgets (0 if it fits now)."""
+        if self.requests_per_minute and len(self._window) >= self.requests_per_minute:
+            return self._window[0][0] + self.WINDOW_SECONDS - now
+
+        if self.tokens_per_minute and self._window:
+            used = sum(entry[1] for entry in self._window)
+            if used + tokens > self.tokens_per_minute:
+                # Release the oldest reservations until enough budget frees up
+                freed = 0
+                for stamp, spent in self._window:
+                    freed += spent
+                    if used - freed + tokens <= self.tokens_per_minute:
+                        return stamp + self.WINDOW_SECONDS - now
+                return self._window[-1][0] + self.WINDOW_SECONDS - now
+        return 0.0
+
+    async def acquire(self, tokens: int) -> list:
+        """
+        Wait until the call fits in the budget, then reserve it.
+
+        Returns:
+            Reservation handle to pass to settle()
+        """
+        async with self.lock:
+            while True:
+                now = self._clock()
+                self._prune(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    reservation = [now, tokens]
+                    self._window.append(reservation)
+                    return reservation
+                await self._sleep(wait)
+
+    def settle(self, reservation: list, actual_tokens: Optional[int]):
+        """Replace the estimated token cost of a reservation with the real usage."""
+        if actual_tokens is not None:
+            reservation[1] = actual_tokens
+
+
+class LLMCallError(Exception):
+    """Raised when a reasoning call fails for good (non-retryable or out of retries/time)."""
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, asyncio.TimeoutError):
+        return True
+    return isinstance(exc, LLMBackendError) and exc.retryable
+
+
+class AsyncReasoningEngine:
+    """
+    Concurrent reasoning over many (backstory, evidence) pairs.
+
+    Config keys (the 'reasoning' section of system_rules.yaml):
+        model, temperature, max_tokens, backend,
+        concurrency, requests_per_minute, tokens_per_minute,
+        max_retries, backoff_base_s, backoff_max_s, call_deadline_s
+    """
+
+    def __init__(self, config: Dict[str, Any], backend: Optional[LLMBackend] = None):
+        self.config = config
+        self.model = config.get('model', DEFAULT_MODEL)
+        self.temperature = config.get('temperature', 0.2)
+        self.max_tokens = config.get('max_tokens', DEFAULT_MAX_TOKENS)
+        self.max_retries = config.get('max_retries', 4)
+        self.backoff_base_s = config.get('backoff_base_s', 0.5)
+        self.backoff_max_s = config.get('backoff_max_s', 20.0)
+        self.call_deadline_s = config.get('call_deadline_s', 60.0)
+
+        self.scheduler = RateLimitScheduler(
+            requests_per_minute=config.get('requests_per_minute'),
+            tokens_per_minute=config.get('tokens_per_minute')
+        )
+        self._concurrency = config.get('concurrency', 8)
+        self._semaphore = None
+        self._semaphore_loop = None
+        self._backend = backend
+        self.cache = open_response_cache(config.get('cache'))
+        self.prompt_builder = PromptBuilder(config)
+
+    @property
+    def backend(self) -> LLMBackend:
+        """Injected backend, or the process-wide one from reasoning.backend."""
+        return self._backend or get_backend(self.config)
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so the engine can be built outside a running event loop
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _backoff(self, attempt: int, exc: Exception) -> float:
+        """Full-jitter exponential backoff, never shorter than Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * (2 ** attempt)))
+        hinted = getattr(exc, "retry_after", None)
+        if hinted is not None:
+            delay = max(delay, hinted)
+        return delay
+
+    async def _create(self, messages: List[Dict[str, str]], max_tokens: int):
+        return await self.backend.acomplete(
+            messages,
+            model=self.model,
+            temperature=self.temperature,
+            max_tokens=max_tokens
+        )
+
+    async def _stream(self, messages: List[Dict[str, str]], max_tokens: int,
+                      prompt_tokens: int, monitor: StreamMonitor) -> LLMCompletion:
+        monitor.reset()
+        stream = self.backend.astream(
+            messages,
+            model=self.model,
+            temperature=self.temperature,
+            max_tokens=max_tokens
+        )
+        try:
+            async for delta in stream:
+                monitor.feed(delta)
+        finally:
+            # Closing the stream cancels the generation on EarlyAbort
+            await stream.aclose()
+        return LLMCompletion(monitor.text, prompt_tokens, count_tokens(monitor.text, self.prompt_builder.tokenizer_name))
+
+    async def complete(self, messages: List[Dict[str, str]], prompt_tokens: int,
+                       max_tokens: Optional[int] = None, monitor: Optional[StreamMonitor] = None):
+        """
+        Send one chat completion under the scheduler, with retries and a deadline.
+
+        Args:
+            messages: Chat messages
+            prompt_tokens: Locally counted prompt size, reserved against tokens/min
+            max_tokens: Completion allowance (default reasoning.max_tokens)
+            monitor: Stream the completion through this StreamMonitor
+
+        Returns:
+            LLMCompletion
+
+        Raises:
+            LLMCallError: when the call cannot be completed before the deadline
+            EarlyAbort: when `monitor` cancelled the stream
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.call_deadline_s
+        max_tokens = max_tokens or self.max_tokens
+        estimated = prompt_tokens + max_tokens
+
+        attempt = 0
+        while True:
+            async with self.semaphore:
+                reservation = await self.scheduler.acquire(estimated)
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise LLMCallError(f"Deadline of {self.call_deadline_s}s exceeded")
+                if monitor is not None:
+                    request = self._stream(messages, max_tokens, prompt_tokens, monitor)
+                else:
+                    request = self._create(messages, max_tokens)
+                try:
+                    completion = await asyncio.wait_for(request, timeout=remaining)
+                except EarlyAbort:
+                    self.scheduler.settle(reservation, prompt_tokens + count_tokens(monitor.text, self.prompt_builder.tokenizer_name))
+                    raise
+                except Exception as e:
+                    error = e
+                else:
+                    self.scheduler.settle(reservation, completion.total_tokens)
+                    return completion
+
+            # Failed attempt: back off outside the semaphore so other calls can proceed
+            if not _is_retryable(error) or attempt >= self.max_retries:
+                raise LLMCallError(f"{type(error).__name__}: {error}") from error
+            delay = self._backoff(attempt, error)
+            if loop.time() + delay >= deadline:
+                raise LLMCallError(f"Deadline of {self.call_deadline_s}s exceeded after {attempt + 1} attempts") from error
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def reason(self, backstory: str, evidence: List[Dict], validator=None) -> ClassificationResult:
+        """
+        Async counterpart of reason_with_llm: Prompt -> LLM -> Parse -> Initial Result.
+        Streams with early abort when reasoning.streaming is enabled and a validator is given.
+        """
+        with tracing.span("prompt_build", evidence_chunks=len(evidence)) as span:
+            built = self.prompt_builder.build(backstory, evidence)
+            span.set(prompt_tokens=built.prompt_tokens)
+        with tracing.span("llm", model=self.model) as span:
+            result = await self._reason_built(built, evidence, validator)
+            span.set(status=result.status, **(result.token_usage.model_dump() if result.token_usage else {}))
+            if result.rejection_reason:
+                # LLM/parse errors and early aborts (counted by app.record_result)
+                span.set(rejection_reason=result.rejection_reason)
+        return result
+
+    async def _reason_built(self, built: BuiltPrompt, evidence: List[Dict], validator=None) -> ClassificationResult:
+        """LLM call (or cache hit) and parse for an already built prompt."""
+        try:
+            cache_key = request_fingerprint(built.messages, self.config, self.max_tokens)
+            # sqlite I/O stays off the event loop
+            content = await asyncio.to_thread(self.cache.get, cache_key) if self.cache is not None else None
+            if content is not None:
+                result = parse_reasoning_response(content)
+                result.token_usage = token_usage(built, content, self.config, cached=True)
+                return result
+
+            monitor = StreamMonitor(validator, evidence) if streaming_enabled(self.config, validator) else None
+            try:
+                completion = await self.complete(built.messages, built.prompt_tokens, monitor=monitor)
+            except EarlyAbort as abort:
+                return aborted_result(abort.reason, built, monitor.text, self.config)
+            content = completion.content
+            result = parse_reasoning_response(content)
+            result.token_usage = token_usage(built, content, self.config, completion)
+            if self.cache is not None:
+                await asyncio.to_thread(self.cache.put, cache_key, content, self.model)
+            return result
+        except Exception as e:
+            return rejection_result(str(e))
+
+    async def reason_batch(
+        self,
+        claims: List[str],
+        evidence: List[Dict],
+        claim_evidence: Optional[List[List[Dict]]] = None
+    ) -> List[ClassificationResult]:
+        """
+        Async counterpart of reason_batch_with_llm: several claims, one call.
+        Claims missing from (or malformed in) the response are retried on
+        their own with their own evidence.
+        """
+        if len(claims) == 1:
+            return [await self.reason(claims[0], evidence)]
+
+        ids = claim_ids(len(claims))
+        with tracing.span("prompt_build", claims=len(claims), evidence_chunks=len(evidence)) as span:
+            built = self.prompt_builder.build_batch(list(zip(ids, claims)), evidence)
+            span.set(prompt_tokens=built.prompt_tokens)
+        max_tokens = batch_max_tokens(self.config, len(claims))
+        cache_key = request_fingerprint(built.messages, self.config, max_tokens)
+        usage = None
+        with tracing.span("llm", model=self.model, claims=len(claims)) as span:
+            try:
+                content = await asyncio.to_thread(self.cache.get, cache_key) if self.cache is not None else None
+                from_cache = content is not None
+                completion = None
+                if not from_cache:
+                    completion = await self.complete(built.messages, built.prompt_tokens, max_tokens)
+                    span.set(prompt_tokens=completion.prompt_tokens, completion_tokens=completion.completion_tokens)
+                    content = completion.content
+                span.set(cached=from_cache)
+                parsed = parse_batch_response(content, ids)
+                usage = token_usage(built, content, self.config, completion, cached=from_cache, share=len(claims))
+                if self.cache is not None and not from_cache and not any(isinstance(r, Exception) for r in parsed.values()):
+                    await asyncio.to_thread(self.cache.put, cache_key, content, self.model)
+            except Exception as e:
+                # Every claim falls back to its own call below
+                METRICS.inc("llm_batch_errors_total")
+                span.set(rejection_reason=str(e))
+                parsed = {claim_id: e for claim_id in ids}
+
+        retries = {
+            i: self.reason(claims[i], claim_evidence[i] if claim_evidence else evidence)
+            for i, claim_id in enumerate(ids) if isinstance(parsed[claim_id], Exception)
+        }
+        retried = dict(zip(retries, await asyncio.gather(*retries.values())))
+
+        results = []
+        for i, claim_id in enumerate(ids):
+            if i in retried:
+                results.append(retried[i])
+            else:
+                parsed[claim_id].token_usage = usage
+                results.append(parsed[claim_id])
+        return results
+
+    async def reason_many(self, items: List[Tuple[str, List[Dict]]]) -> List[ClassificationResult]:
+        """Reason over many (backstory, evidence) pairs concurrently, preserving input order."""
+        return await asyncio.gather(*(self.reason(backstory, evidence) for backstory, evidence in items))
+
+    def run_many(self, items: List[Tuple[str, List[Dict]]]) -> List[ClassificationResult]:
+        """Blocking wrapper around reason_many for scripts without an event loop."""
+        return asyncio.run(self.reason_many(items))
@@ -0,0 +1,355 @@
+"""
+Local LLM stand-in
+Gopal's responsibility (Reasoning Logic)
+
+An OpenAI/Groq-compatible /chat/completions server (and an in-process
+SyntheticBackend) for load-testing NovelAnalyzerApp.query and service.py
+without calling Groq. Both also stream (stream=true / SSE). Responses are either replayed from a recorded
+llm_cache.py SQLite file (record one by running with reasoning.cache enabled
+against the real API) or synthesised as schema-valid ReasoningTrace JSON
+that quotes the prompt's evidence verbatim. Latency and error rates are
+configurable so tail behaviour can be studied offline.
+
+Run:
+    python -m src.pathway_pipeline.llm_standin --port 8099 --latency lognormal --median-ms 800
+
+Then point reasoning.backend.base_url at http://127.0.0.1:8099
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from .llm_backend import LLMBackend, LLMBackendError, LLMCompletion
+from .llm_cache import CacheMissError, LLMResponseCache, prompt_fingerprint
+
+
+_NODE_HEADER = re.compile(r"\[Node (.+?)\] \(Chapter: (.*?)\):\n")
+_PROMPT_FOOTER = re.compile(r"\n\s*Output the JSON .*$", re.S)
+_QUERY_LINE = re.compile(r"QUERY: (.*)")
+_CLAIM_LINE = re.compile(r"\[Claim (\S+?)\]: (.*)")
+
+
+class LatencyModel:
+    """
+    Samples per-request latency in seconds.
+
+    Distributions:
+        fixed       - always median_ms
+        uniform     - between min_ms and max_ms
+        lognormal   - median median_ms, shape sigma (heavy right tail)
+        exponential - mean median_ms
+    Plus ms_per_token for each completion token generated.
+    """
+
+    def __init__(self, distribution: str = "fixed", median_ms: float = 0.0, sigma: float = 0.5,
+                 min_ms: float = 0.0, max_ms: float = 0.0, ms_per_token: float = 0.0):
+        if distribution not in ("fixed", "uniform", "lognormal", "exponential"):
+            raise ValueError(f"Unknown latency distribution '{distribution}'")
+        self.distribution = distribution
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.ms_per_token = ms_per_token
+
+    def sample(self, rng: random.Random, completion_tokens: int = 0) -> float:
+        if self.distribution == "uniform":
+            ms = rng.uniform(self.min_ms, self.max_ms)
+        elif self.distribution == "lognormal":
+            ms = rng.lognormvariate(math.log(max(self.median_ms, 1e-3)), self.sigma)
+        elif self.distribution == "exponential":
+            ms = rng.expovariate(1.0 / self.median_ms) if self.median_ms > 0 else 0.0
+        else:
+            ms = self.median_ms
+        return (ms + self.ms_per_token * completion_tokens) / 1000.0
+
+
+def parse_evidence(user_prompt: str) -> List[Dict[str, str]]:
+    """Recover the evidence nodes from a prompt built by prompt_builder.build_messages."""
+    parts = _NODE_HEADER.split(user_prompt)
+    nodes = []
+    # parts = [preamble, id1, chapter1, text1, id2, chapter2, text2, ...]
+    for i in range(1, len(parts) - 2, 3):
+        text = _PROMPT_FOOTER.sub("", parts[i + 2]).strip()
+        nodes.append({"chunk_id": parts[i], "chapter": parts[i + 1], "text": text})
+    return nodes
+
+
+def _verbatim_quote(text: str, max_chars: int = 200) -> str:
+    """First sentence (or word-bounded prefix) of text, kept verbatim."""
+    end = len(text)
+    match = re.search(r"[.!?](\s|$)", text)
+    if match:
+        end = match.end()
+    if end > max_chars:
+        cut = text.rfind(" ", 0, max_chars)
+        end = cut if cut > 0 else max_chars
+    return text[:end].strip()
+
+
+def synthetic_response(user_prompt: str, rng: random.Random) -> Dict[str, Any]:
+    """
+    Response for a single-claim prompt (one ReasoningTrace) or a batched
+    prompt (a results object with one trace per claim_id).
+    """
+    claims = _CLAIM_LINE.findall(user_prompt)
+    if not claims:
+        query = _QUERY_LINE.search(user_prompt)
+        return synthetic_trace(user_prompt, rng, query.group(1).strip() if query else "the query")
+    return {
+        "results": [
+            {"claim_id": claim_id, **synthetic_trace(user_prompt, rng, claim.strip())}
+            for claim_id, claim in claims
+        ]
+    }
+
+
+def synthetic_trace(user_prompt: str, rng: random.Random, claim: str = "the query") -> Dict[str, Any]:
+    """
+    Schema-valid ReasoningTrace JSON quoting the prompt's evidence verbatim,
+    so the response exercises the full validation path.
+    """
+    nodes = parse_evidence(user_prompt)
+
+    spans = [
+        {
+            "quote_text": _verbatim_quote(node["text"]),
+            "chapter_id": node["chapter"],
+            "source_node_id": node["chunk_id"]
+        }
+        for node in nodes if node["text"]
+    ]
+    confidence = round(rng.uniform(0.2, 0.95), 2)
+    return {
+        "primary_hypothesis": {
+            "hypothesis_text": f"The evidence supports: {claim[:120]}",
+            "supporting_evidence": spans,
+            "confidence_score": confidence
+        },
+        "alternatives_considered": [
+            {
+                "hypothesis_text": "The evidence is unrelated to the claim.",
+                "supporting_evidence": spans[:1],
+                "confidence_score": round(1.0 - confidence, 2)
+            }
+        ],
+        "logical_steps": [
+            f"Reviewed {len(nodes)} evidence nodes.",
+            "Compared the claim against the quoted passages.",
+        ]
+    }
+
+
+def stream_pieces(content: str, piece_chars: int = 16) -> List[str]:
+    """Split a completion into the deltas a streaming response sends."""
+    return [content[i:i + piece_chars] for i in range(0, len(content), piece_chars)] or [""]
+
+
+def _chunk_payload(payload: Dict[str, Any], piece: Optional[str]) -> Dict[str, Any]:
+    """One chat.completion.chunk of a streamed payload (piece None = final chunk)."""
+    return {
+        "id": payload["id"],
+        "object": "chat.completion.chunk",
+        "created": payload["created"],
+        "model": payload["model"],
+        "choices": [{"index": 0, "delta": {"content": piece} if piece is not None else {},
+                     "finish_reason": None if piece is not None else "stop"}]
+    }
+
+
+class StandinResponder:
+    """
+    Shared request handling for the HTTP server and SyntheticBackend.
+
+    Args:
+        recordings_path: llm_cache.py SQLite file to replay (optional)
+        fallback: "synthetic" or "error" when a prompt was never recorded
+        latency: LatencyModel
+        error_rate: Fraction of requests that fail
+        error_statuses: Status codes to fail with (429 responses carry Retry-After)
+        seed: RNG seed for reproducible runs
+    """
+
+    def __init__(self, recordings_path: Optional[str] = None, fallback: str = "synthetic",
+                 latency: Optional[LatencyModel] = None, error_rate: float = 0.0,
+                 error_statuses: Tuple[int, ...] = (429, 500, 503), retry_after_s: float = 1.0,
+                 seed: Optional[int] = None):
+        self.recordings = LLMResponseCache(recordings_path, mode="replay") if recordings_path else None
+        self.fallback = fallback
+        self.latency = latency or LatencyModel()
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.retry_after_s = retry_after_s
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def respond(self, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any], Dict[str, str], float]:
+        """
+        Returns:
+            (status, JSON payload, headers, delay in seconds before replying)
+        """
+        with self._rng_lock:
+            fail = self._rng.random() < self.error_rate
+            status = self._rng.choice(self.error_statuses) if fail else 200
+            rng = random.Random(self._rng.random())
+
+        if fail:
+            headers = {"retry-after": str(self.retry_after_s)} if status == 429 else {}
+            payload = {"error": {"message": f"stand-in injected error {status}", "type": "standin_error"}}
+            return status, payload, headers, self.latency.sample(rng)
+
+        messages = body.get("messages", [])
+        system_prompt = messages[0]["content"] if messages else ""
+        user_prompt = messages[-1]["content"] if messages else ""
+
+        content = None
+        if self.recordings is not None:
+            key = prompt_fingerprint(body.get("model"), system_prompt, user_prompt,
+                                     body.get("temperature", 0.2), body.get("max_tokens"))
+            try:
+                content = self.recordings.get(key)
+            except CacheMissError:
+                if self.fallback != "synthetic":
+                    payload = {"error": {"message": "prompt not recorded", "type": "standin_miss"}}
+                    return 404, payload, {}, 0.0
+        if content is None:
+            content = json.dumps(synthetic_response(user_prompt, rng))
+
+        prompt_tokens = (len(system_prompt) + len(user_prompt)) // 4
+        completion_tokens = len(content) // 4
+        payload = {
+            "id": f"standin-{int(time.time() * 1000)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "standin"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens}
+        }
+        return 200, payload, {}, self.latency.sample(rng, completion_tokens)
+
+
+class SyntheticBackend(LLMBackend):
+    """In-process stand-in: same responses and latency model, no HTTP hop."""
+
+    def __init__(self, responder: Optional[StandinResponder] = None):
+        self.responder = responder or StandinResponder()
+
+    def _body(self, messages, model, temperature, max_tokens) -> Dict[str, Any]:
+        return {"messages": messages, "model": model, "temperature": temperature, "max_tokens": max_tokens}
+
+    @staticmethod
+    def _result(status, payload, headers) -> LLMCompletion:
+        if status != 200:
+            retry_after = headers.get("retry-after")
+            raise LLMBackendError(payload["error"]["message"], status_code=status,
+                                  retry_after=float(retry_after) if retry_after else None)
+        usage = payload["usage"]
+        return LLMCompletion(payload["choices"][0]["message"]["content"],
+                             usage["prompt_tokens"], usage["completion_tokens"])
+
+    def complete(self, messages, model, temperature, max_tokens=None) -> LLMCompletion:
+        status, payload, headers, delay = self.responder.respond(
+            self._body(messages, model, temperature, max_tokens))
+        time.sleep(delay)
+        return self._result(status, payload, headers)
+
+    async def acomplete(self, messages, model, temperature, max_tokens=None) -> LLMCompletion:
+        status, payload, headers, delay = self.responder.respond(
+            self._body(messages, model, temperature, max_tokens))
+        await asyncio.sleep(delay)
+        return self._result(status, payload, headers)
+
+    # Streaming spreads the sampled latency evenly over the deltas, so an
+    # early abort saves time in proportion to the tokens not generated.
+
+    def stream(self, messages, model, temperature, max_tokens=None) -> Iterator[str]:
+        status, payload, headers, delay = self.responder.respond(
+            self._body(messages, model, temperature, max_tokens))
+        pieces = stream_pieces(self._result(status, payload, headers).content)
+        for piece in pieces:
+            time.sleep(delay / len(pieces))
+            yield piece
+
+    async def astream(self, messages, model, temperature, max_tokens=None) -> AsyncIterator[str]:
+        status, payload, headers, delay = self.responder.respond(
+            self._body(messages, model, temperature, max_tokens))
+        pieces = stream_pieces(self._result(status, payload, headers).content)
+        for piece in pieces:
+            await asyncio.sleep(delay / len(pieces))
+            yield piece
+
+
+def create_standin_app(responder: StandinResponder):
+    """
+    FastAPI app serving the Groq (/openai/v1) and OpenAI (/v1) completion routes.
+    """
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    app = FastAPI(title="LLM Stand-in", description="Offline Groq/OpenAI-compatible stand-in")
+
+    async def sse(payload: Dict[str, Any], delay: float):
+        pieces = stream_pieces(payload["choices"][0]["message"]["content"])
+        for piece in pieces:
+            await asyncio.sleep(delay / len(pieces))
+            yield f"data: {json.dumps(_chunk_payload(payload, piece))}\n\n"
+        yield f"data: {json.dumps(_chunk_payload(payload, None))}\n\n"
+        yield "data: [DONE]\n\n"
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        status, payload, headers, delay = responder.respond(body)
+        if body.get("stream") and status == 200:
+            return StreamingResponse(sse(payload, delay), media_type="text/event-stream")
+        await asyncio.sleep(delay)
+        return JSONResponse(payload, status_code=status, headers=headers)
+
+    app.add_api_route("/openai/v1/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy", "replaying": responder.recordings is not None}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Groq/OpenAI-compatible LLM stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--recordings", help="llm_cache.py SQLite file to replay")
+    parser.add_argument("--fallback", choices=["synthetic", "error"], default="synthetic")
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal", "exponential"], default="fixed")
+    parser.add_argument("--median-ms", type=float, default=0.0)
+    parser.add_argument("--sigma", type=float, default=0.5)
+    parser.add_argument("--min-ms", type=float, default=0.0)
+    parser.add_argument("--max-ms", type=float, default=0.0)
+    parser.add_argument("--ms-per-token", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    responder = StandinResponder(
+        recordings_path=args.recordings,
+        fallback=args.fallback,
+        latency=LatencyModel(args.latency, args.median_ms, args.sigma, args.min_ms, args.max_ms, args.ms_per_token),
+        error_rate=args.error_rate,
+        seed=args.seed
+    )
+
+    import uvicorn
+    print(f"🧪 Starting LLM stand-in on {args.host}:{args.port}...")
+    uvicorn.run(create_standin_app(responder), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
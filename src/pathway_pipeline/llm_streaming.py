@@ -0,0 +1,177 @@
+"""
+Streaming reasoning with early abort
+Gopal's responsibility (Reasoning Logic)
+
+Parses the ReasoningTrace JSON while the completion is still streaming in.
+As soon as primary_hypothesis.confidence_score or an evidence span is
+complete, it is checked against the Validator rules; once a rule fails the
+final result is certain to be a REJECTION, so the generation is cancelled
+instead of paying for the rest of the tokens.
+"""
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.reasoning_validation.schemas import EvidenceSpan
+
+
+_WHITESPACE = " \t\r\n"
+_SCALAR_END = ",}]" + _WHITESPACE
+
+
+class EarlyAbort(Exception):
+    """Raised by StreamMonitor once the response is certain to be rejected."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _matches(pattern: Tuple, path: Tuple) -> bool:
+    return len(pattern) == len(path) and all(p == "*" or p == q for p, q in zip(pattern, path))
+
+
+class IncrementalJSONParser:
+    """
+    Push parser reporting values at watched paths as soon as they are complete.
+
+    Paths are tuples of object keys and array indices; "*" in a watched
+    pattern matches any index, e.g. ("primary_hypothesis", "supporting_evidence", "*").
+
+    Args:
+        watch: {path pattern: callback(value)}
+    """
+
+    def __init__(self, watch: Dict[Tuple, Callable[[Any], None]]):
+        self.watch = watch
+        self.text = ""
+        self._pos = 0
+        self._stack: List[Dict[str, Any]] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._string_is_key = False
+        self._scalar_start: Optional[int] = None
+        self.started = False
+        self.done = False
+
+    def _path(self) -> Tuple:
+        return tuple(frame["key"] if frame["kind"] == "{" else frame["index"] for frame in self._stack)
+
+    def _complete(self, path: Tuple, start: int, end: int):
+        for pattern, callback in self.watch.items():
+            if _matches(pattern, path):
+                callback(json.loads(self.text[start:end]))
+
+    def feed(self, chunk: str):
+        """Consume the next piece of the completion."""
+        self.text += chunk
+        text = self.text
+        for i in range(self._pos, len(text)):
+            c = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        self._stack[-1]["key"] = json.loads(text[self._string_start:i + 1])
+                        self._stack[-1]["awaiting_key"] = False
+                    else:
+                        self._complete(self._path(), self._string_start, i + 1)
+                continue
+
+            if self._scalar_start is not None:
+                if c not in _SCALAR_END:
+                    continue
+                self._complete(self._path(), self._scalar_start, i)
+                self._scalar_start = None
+
+            if c in _WHITESPACE or c == ":":
+                continue
+            if not self.started:
+                self.started = True
+                if c != "{":
+                    raise ValueError(f"Expected a JSON object, got {c!r}")
+
+            top = self._stack[-1] if self._stack else None
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                self._string_is_key = top is not None and top["kind"] == "{" and top["awaiting_key"]
+            elif c in "{[":
+                self._stack.append({"kind": c, "start": i, "path": self._path(),
+                                    "key": None, "index": 0, "awaiting_key": c == "{"})
+            elif c in "}]":
+                frame = self._stack.pop()
+                self._complete(frame["path"], frame["start"], i + 1)
+                if not self._stack:
+                    self.done = True
+            elif c == ",":
+                if top["kind"] == "[":
+                    top["index"] += 1
+                else:
+                    top["awaiting_key"] = True
+            else:
+                self._scalar_start = i
+        self._pos = len(text)
+
+
+class StreamMonitor:
+    """
+    Applies the Validator rules to a streaming ReasoningTrace.
+
+    Args:
+        validator: Validator whose rules decide rejection
+        retrieved_context: Evidence the quotes must come from
+    """
+
+    def __init__(self, validator, retrieved_context: List[Dict]):
+        self.validator = validator
+        self.quotes = validator.quote_index(retrieved_context)
+        self.reset()
+
+    def reset(self):
+        """Start over (e.g. when a failed stream is retried)."""
+        self.parser = IncrementalJSONParser({
+            ("primary_hypothesis", "confidence_score"): self._on_confidence,
+            ("primary_hypothesis", "supporting_evidence", "*"): self._on_span,
+            ("primary_hypothesis", "supporting_evidence"): self._on_evidence,
+        })
+
+    @property
+    def text(self) -> str:
+        return self.parser.text
+
+    def feed(self, delta: str):
+        """
+        Raises:
+            EarlyAbort: once the response is certain to be rejected
+        """
+        try:
+            self.parser.feed(delta)
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise EarlyAbort(f"Malformed JSON: {e}") from e
+
+    def _on_confidence(self, value):
+        if not isinstance(value, (int, float)):
+            raise EarlyAbort(f"Schema violation: confidence_score {value!r}")
+        reason = self.validator.check_confidence(value)
+        if reason:
+            raise EarlyAbort(reason)
+
+    def _on_span(self, value):
+        try:
+            span = EvidenceSpan(**value)
+        except Exception as e:
+            raise EarlyAbort(f"Schema violation in evidence span: {e}") from e
+        reason = self.validator.check_quote(span, self.quotes)
+        if reason:
+            raise EarlyAbort(reason)
+
+    def _on_evidence(self, value):
+        reason = self.validator.check_evidence_count(len(value))
+        if reason:
+            raise EarlyAbort(reason)
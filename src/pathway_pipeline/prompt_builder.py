@@ -0,0 +1,281 @@
+"""
+Prompt builder with local token accounting
+Gopal's responsibility (Reasoning Logic)
+
+Counts tokens locally and fits the evidence into reasoning.max_input_tokens
+before anything is sent to the LLM. Evidence is assumed to arrive best-first
+(retrieval order), so the lowest-ranked chunks are summarised first and
+dropped only when even a summary no longer fits.
+"""
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+SYSTEM_PROMPT = """You are an EVIDENCE-GROUNDED REASONING ENGINE.
+    Your task is to classify the provided narrative context based on the query.
+
+    RULES:
+    1. You must ONLY use the provided evidence. Do not use external knowledge.
+    2. Every fact you state must be supported by a verbatim quote from the evidence.
+    3. You must evaluate valid alternative explanations.
+    4. Output MUST be valid JSON matching the ReasoningTrace schema.
+    5. If evidence is insufficient, set status to REJECTION.
+    """
+
+QUOTE_RULE = "Each quote must be at most {quote_max_tokens} tokens long."
+
+BATCH_RULE = (
+    "Evaluate every claim independently against the shared evidence. Output "
+    '{{"results": [...]}} with exactly one ReasoningTrace per claim, each with a '
+    '"claim_id" field set to the claim\'s id ({claim_ids}).'
+)
+
+# Marks where an extractive summary skipped text, so quotes never span the gap
+ELISION = "\n[...]\n"
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"\w+")
+
+
+class _ApproxTokenizer:
+    """
+    Fallback when tiktoken is not installed: words and punctuation marks,
+    which tracks BPE token counts closely enough for budgeting English prose.
+    """
+
+    _TOKEN = re.compile(r"\w+|[^\w\s]")
+
+    def encode(self, text: str) -> list:
+        return self._TOKEN.findall(text)
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(name: str = "cl100k_base"):
+    """
+    Load a tokenizer once per process.
+
+    Args:
+        name: tiktoken encoding name (reasoning.tokenizer)
+
+    Returns:
+        Object with an encode(text) -> list method
+    """
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(name)
+    except Exception:
+        print(f"⚠️  tiktoken encoding '{name}' unavailable, using approximate token counts")
+        return _ApproxTokenizer()
+
+
+def count_tokens(text: str, tokenizer_name: str = "cl100k_base") -> int:
+    """Number of tokens in text under the cached tokenizer."""
+    return len(get_tokenizer(tokenizer_name).encode(text))
+
+
+def format_evidence(chunk: Dict) -> str:
+    """Render one evidence chunk as it appears in the prompt."""
+    return f"[Node {chunk['chunk_id']}] (Chapter: {chunk['chapter']}):\n{chunk['text']}\n\n"
+
+
+def _system_prompt(extra_rules: List[str]) -> str:
+    """SYSTEM_PROMPT with extra rules numbered after the fixed ones."""
+    prompt = SYSTEM_PROMPT
+    for number, rule in enumerate(extra_rules, start=6):
+        prompt += f"{number}. {rule}\n    "
+    return prompt
+
+
+def build_messages(
+    backstory: str,
+    evidence: List[Dict],
+    quote_max_tokens: Optional[int] = None
+) -> List[Dict[str, str]]:
+    """
+    Builds the strictly constrained chat messages for a single query.
+    """
+    rules = [QUOTE_RULE.format(quote_max_tokens=quote_max_tokens)] if quote_max_tokens else []
+
+    evidence_text = "".join(format_evidence(chunk) for chunk in evidence)
+    user_prompt = f"""
+    QUERY: {backstory}
+
+    EVIDENCE:
+    {evidence_text}
+
+    Output the JSON ReasoningTrace.
+    """
+
+    return [
+        {"role": "system", "content": _system_prompt(rules)},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def build_batch_messages(
+    claims: List[Tuple[str, str]],
+    evidence: List[Dict],
+    quote_max_tokens: Optional[int] = None
+) -> List[Dict[str, str]]:
+    """
+    Builds one prompt for several claims about the same story over a shared
+    evidence set.
+
+    Args:
+        claims: (claim_id, claim text) pairs
+        evidence: De-duplicated evidence shared by all claims
+    """
+    rules = [QUOTE_RULE.format(quote_max_tokens=quote_max_tokens)] if quote_max_tokens else []
+    rules.append(BATCH_RULE.format(claim_ids=", ".join(claim_id for claim_id, _ in claims)))
+
+    claims_text = "\n    ".join(f"[Claim {claim_id}]: {text}" for claim_id, text in claims)
+    evidence_text = "".join(format_evidence(chunk) for chunk in evidence)
+    user_prompt = f"""
+    CLAIMS:
+    {claims_text}
+
+    EVIDENCE:
+    {evidence_text}
+
+    Output the JSON results object with one ReasoningTrace per claim.
+    """
+
+    return [
+        {"role": "system", "content": _system_prompt(rules)},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+class BuiltPrompt:
+    """Messages ready to send, plus the accounting that produced them."""
+
+    def __init__(self, messages: List[Dict[str, str]], prompt_tokens: int, evidence: List[Dict],
+                 trimmed_chunks: int, dropped_chunks: int):
+        self.messages = messages
+        self.prompt_tokens = prompt_tokens
+        self.evidence = evidence
+        self.trimmed_chunks = trimmed_chunks
+        self.dropped_chunks = dropped_chunks
+
+
+class PromptBuilder:
+    """
+    Fits evidence into the configured input budget
+
+    Config keys (the 'reasoning' section of system_rules.yaml):
+        tokenizer, max_input_tokens, min_chunk_tokens, quote_max_tokens
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.tokenizer_name = config.get('tokenizer', 'cl100k_base')
+        self.max_input_tokens = config.get('max_input_tokens', 6000)
+        self.min_chunk_tokens = config.get('min_chunk_tokens', 64)
+        self.quote_max_tokens = config.get('quote_max_tokens')
+
+    def count(self, text: str) -> int:
+        return count_tokens(text, self.tokenizer_name)
+
+    def build(self, backstory: str, evidence: List[Dict]) -> BuiltPrompt:
+        """
+        Build messages whose total size stays within max_input_tokens.
+
+        Args:
+            backstory: The query/claim
+            evidence: Retrieved chunks, best-ranked first
+
+        Returns:
+            BuiltPrompt with the (possibly trimmed) evidence actually used
+        """
+        return self._fit(
+            backstory,
+            evidence,
+            lambda kept: build_messages(backstory, kept, self.quote_max_tokens)
+        )
+
+    def build_batch(self, claims: List[Tuple[str, str]], evidence: List[Dict]) -> BuiltPrompt:
+        """
+        Batched counterpart of build(): several (claim_id, claim) pairs over
+        one shared evidence list, fitted into the same input budget.
+        """
+        return self._fit(
+            " ".join(text for _, text in claims),
+            evidence,
+            lambda kept: build_batch_messages(claims, kept, self.quote_max_tokens)
+        )
+
+    def _fit(self, query: str, evidence: List[Dict],
+             render: Callable[[List[Dict]], List[Dict[str, str]]]) -> BuiltPrompt:
+        base_tokens = sum(self.count(m["content"]) for m in render([]))
+        budget = self.max_input_tokens - base_tokens
+
+        kept = list(evidence)
+        costs = [self.count(format_evidence(chunk)) for chunk in kept]
+        total = sum(costs)
+        trimmed = dropped = 0
+
+        # Shrink from the lowest-ranked chunk upwards until everything fits
+        for i in range(len(kept) - 1, -1, -1):
+            if total <= budget:
+                break
+            overhead = costs[i] - self.count(kept[i]['text'])
+            target = costs[i] - (total - budget) - overhead
+            if target >= self.min_chunk_tokens:
+                summary = self.summarise(kept[i]['text'], query, target)
+                kept[i] = {**kept[i], 'text': summary}
+                new_cost = self.count(format_evidence(kept[i]))
+                total += new_cost - costs[i]
+                costs[i] = new_cost
+                trimmed += 1
+            else:
+                total -= costs[i]
+                kept[i] = None
+                dropped += 1
+
+        kept = [chunk for chunk in kept if chunk is not None]
+        return BuiltPrompt(
+            messages=render(kept),
+            prompt_tokens=base_tokens + total,
+            evidence=kept,
+            trimmed_chunks=trimmed,
+            dropped_chunks=dropped
+        )
+
+    def summarise(self, text: str, query: str, max_tokens: int) -> str:
+        """
+        Extractive summary: keep the sentences sharing the most words with the
+        query, in their original order, within max_tokens. Sentences are kept
+        verbatim so quotes taken from the summary still verify against the
+        full chunk.
+        """
+        sentences = [s for s in _SENTENCE_SPLIT.split(text) if s.strip()]
+        query_words = set(w.lower() for w in _WORD.findall(query))
+
+        def overlap(sentence: str) -> int:
+            return len(query_words & set(w.lower() for w in _WORD.findall(sentence)))
+
+        ranked = sorted(range(len(sentences)), key=lambda i: (-overlap(sentences[i]), i))
+        separator_cost = self.count(ELISION)
+        chosen, used = [], 0
+        for i in ranked:
+            cost = self.count(sentences[i]) + separator_cost
+            if used + cost > max_tokens:
+                continue
+            chosen.append(i)
+            used += cost
+
+        if not chosen:
+            return self._truncate(sentences[ranked[0]] if sentences else text, max_tokens)
+        return ELISION.join(sentences[i] for i in sorted(chosen))
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """Longest word prefix of text within max_tokens."""
+        words = text.split(" ")
+        lo, hi = 0, len(words)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.count(" ".join(words[:mid])) <= max_tokens:
+                lo = mid
+            else:
+                hi = mid - 1
+        return " ".join(words[:lo])
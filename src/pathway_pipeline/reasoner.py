@@ -1,86 +1,334 @@
-import os
 import json
-from typing import List, Dict, Any
-from groq import Groq
-from src.reasoning_validation.schemas import ReasoningTrace, ClassificationResult
+from typing import List, Dict, Any, Optional, Tuple, Union
+from src.reasoning_validation.schemas import ReasoningTrace, ClassificationResult, TokenUsage
+from src.utils import tracing
+from src.utils.metrics import METRICS
+from .llm_backend import LLMBackend, get_backend
+from .llm_cache import open_response_cache, prompt_fingerprint
+from .llm_streaming import EarlyAbort, StreamMonitor
+from .prompt_builder import BuiltPrompt, PromptBuilder, count_tokens
 
-# Initialize Groq client
-# In a real app, strict dependency injection is better, but here we instantiate for simplicity
-client = Groq(
-    api_key=os.environ.get("GROQ_API_KEY"),
-)
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+# Completion allowance sent when reasoning.max_tokens is unset; the cache
+# key must hash the same value the request sends
+DEFAULT_MAX_TOKENS = 1024
 
-def reason_with_llm(backstory: str, evidence: List[Dict], config: Dict[str, Any]) -> ClassificationResult:
+
+def request_fingerprint(
+    messages: List[Dict[str, str]],
+    config: Dict[str, Any],
+    max_tokens: Optional[int] = None
+) -> str:
+    """
+    Cache key for a reasoning request (model, prompts, temperature, max_tokens).
+    """
+    return prompt_fingerprint(
+        model=config.get('model', DEFAULT_MODEL),
+        system_prompt=messages[0]["content"],
+        user_prompt=messages[1]["content"],
+        temperature=config.get('temperature', 0.2),
+        max_tokens=max_tokens if max_tokens is not None else config.get('max_tokens', DEFAULT_MAX_TOKENS)
+    )
+
+
+def parse_reasoning_response(response_content: Union[str, bytes]) -> ClassificationResult:
+    """
+    Parses raw LLM output into an initial (not yet validated) ClassificationResult.
+    Raises on malformed JSON or schema violations.
+
+    The raw JSON (str or bytes) is validated straight into the models by
+    pydantic's JSON validator, without an intermediate dict.
+    """
+    # Basic parsing here, Validation module does the heavy lifting
+    return result_from_trace(ReasoningTrace.model_validate_json(response_content))
+
+
+def result_from_trace(trace: ReasoningTrace) -> ClassificationResult:
+    """
+    Result wrapper for an already validated trace.
+    The wrapper's fields all come from the trace, so it is built without
+    validating the trace a second time.
+    """
+    return ClassificationResult.model_construct(
+        status="SUCCESS",
+        target_class=trace.primary_hypothesis.hypothesis_text, # Simplified mapping
+        confidence=trace.primary_hypothesis.confidence_score,
+        reasoning_trace=trace
+    )
+
+
+def claim_ids(count: int) -> List[str]:
+    """Ids used to tag claims inside a batched prompt."""
+    return [f"C{i + 1}" for i in range(count)]
+
+
+def batch_max_tokens(config: Dict[str, Any], n_claims: int) -> int:
+    """Completion allowance for a batch: max_tokens per claim, capped."""
+    batching = config.get('batching') or {}
+    return min(config.get('max_tokens', DEFAULT_MAX_TOKENS) * n_claims, batching.get('max_output_tokens', 4096))
+
+
+def parse_batch_response(response_content: str, ids: List[str]) -> Dict[str, Any]:
+    """
+    Splits a batched response into one ClassificationResult per claim id.
+    Each claim is parsed independently: a malformed entry maps to the
+    exception it raised instead of failing the whole batch.
+
+    Returns:
+        {claim_id: ClassificationResult or Exception}
+    """
+    parsed: Dict[str, Any] = {claim_id: ValueError(f"No result returned for claim {claim_id}") for claim_id in ids}
+    try:
+        entries = json.loads(response_content).get('results', [])
+    except Exception as e:
+        return {claim_id: e for claim_id in ids}
+
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict) or entry.get('claim_id') not in parsed:
+            continue
+        trace_data = {k: v for k, v in entry.items() if k != 'claim_id'}
+        try:
+            parsed[entry['claim_id']] = result_from_trace(ReasoningTrace.model_validate(trace_data))
+        except Exception as e:
+            parsed[entry['claim_id']] = e
+    return parsed
+
+
+def token_usage(
+    built: BuiltPrompt,
+    response_content: str,
+    config: Dict[str, Any],
+    usage=None,
+    cached: bool = False,
+    share: int = 1,
+    aborted: bool = False
+) -> TokenUsage:
+    """
+    Per-query token accounting. Provider-reported usage wins; cached or
+    usage-less responses fall back to the local tokenizer. A batched call
+    is split evenly across its `share` claims.
+    """
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if prompt_tokens is None:
+        prompt_tokens = built.prompt_tokens
+    if completion_tokens is None:
+        completion_tokens = count_tokens(response_content, config.get('tokenizer', 'cl100k_base'))
+    return TokenUsage(
+        prompt_tokens=prompt_tokens // share,
+        completion_tokens=completion_tokens // share,
+        trimmed_chunks=built.trimmed_chunks,
+        dropped_chunks=built.dropped_chunks,
+        cached=cached,
+        aborted=aborted
+    )
+
+
+def rejection_result(reason: str, usage: Optional[TokenUsage] = None) -> ClassificationResult:
+    """
+    Builds a schema-valid REJECTION result for LLM errors or parsing errors.
+    """
+    return ClassificationResult(
+        status="REJECTION",
+        confidence=0.0,
+        reasoning_trace=ReasoningTrace( # Dummy trace to valid schema
+            primary_hypothesis={"hypothesis_text": "Error", "supporting_evidence": [], "confidence_score": 0.0},
+            alternatives_considered=[],
+            logical_steps=["System Error encountered", reason]  # schema requires >= 2 steps
+        ),
+        rejection_reason=reason,
+        token_usage=usage
+    )
+
+
+def is_error_result(result: ClassificationResult) -> bool:
+    """
+    True for a rejection_result built from an LLM/parsing error (no token
+    usage recorded), as opposed to a rule-based or screened rejection.
+    """
+    return result.status == "REJECTION" and result.token_usage is None and result.screened_by is None
+
+
+def aborted_result(reason: str, built: BuiltPrompt, partial_content: str, config: Dict[str, Any]) -> ClassificationResult:
+    """
+    REJECTION for a streamed completion cancelled by the StreamMonitor.
+    Token usage covers only what was generated before the abort.
+    """
+    return rejection_result(
+        f"Early abort: {reason}",
+        usage=token_usage(built, partial_content, config, aborted=True)
+    )
+
+
+def streaming_enabled(config: Dict[str, Any], validator) -> bool:
+    """Stream (and abort early) only when a Validator is available to judge partial output."""
+    return validator is not None and (config.get('streaming') or {}).get('enabled', False)
+
+
+def stream_completion(
+    backend: LLMBackend,
+    messages: List[Dict[str, str]],
+    config: Dict[str, Any],
+    monitor: StreamMonitor
+) -> str:
+    """
+    Stream a completion through `monitor`, cancelling it on EarlyAbort.
+
+    Returns:
+        Full completion content
+
+    Raises:
+        EarlyAbort: once the monitor is certain the response will be rejected
+    """
+    stream = backend.stream(
+        messages,
+        model=config.get('model', DEFAULT_MODEL),
+        temperature=config.get('temperature', 0.2),
+        max_tokens=config.get('max_tokens', DEFAULT_MAX_TOKENS)
+    )
+    try:
+        for delta in stream:
+            monitor.feed(delta)
+    finally:
+        stream.close()
+    return monitor.text
+
+
+def reason_with_llm(
+    backstory: str,
+    evidence: List[Dict],
+    config: Dict[str, Any],
+    backend: Optional[LLMBackend] = None,
+    validator=None
+) -> ClassificationResult:
     """
     Orchestrates the reasoning process: Prompt -> LLM -> Parse -> Initial Result.
+    The LLM is reached through `backend` (default: reasoning.backend from config).
+    With reasoning.streaming enabled and a `validator`, the completion is
+    streamed and cancelled as soon as it is certain to be rejected.
     """
-    
-    # 1. Format Evidence
-    evidence_text = ""
-    for i, chunk in enumerate(evidence):
-        evidence_text += f"[Node {chunk['chunk_id']}] (Chapter: {chunk['chapter']}):\n{chunk['text']}\n\n"
-        
-    # 2. Construct Prompt (Strictly constrained)
-    system_prompt = """You are an EVIDENCE-GROUNDED REASONING ENGINE.
-    Your task is to classify the provided narrative context based on the query.
-    
-    RULES:
-    1. You must ONLY use the provided evidence. Do not use external knowledge.
-    2. Every fact you state must be supported by a verbatim quote from the evidence.
-    3. You must evaluate valid alternative explanations.
-    4. Output MUST be valid JSON matching the ReasoningTrace schema.
-    5. If evidence is insufficient, set status to REJECTION.
-    """
-    
-    user_prompt = f"""
-    QUERY: {backstory}
-    
-    EVIDENCE:
-    {evidence_text}
-    
-    Output the JSON ReasoningTrace.
-    """
-    
-    # 3. Call LLM
+    # 1-2. Build the prompt within the configured input budget
+    with tracing.span("prompt_build", evidence_chunks=len(evidence)) as span:
+        built = PromptBuilder(config).build(backstory, evidence)
+        span.set(prompt_tokens=built.prompt_tokens)
+    with tracing.span("llm", model=config.get('model', DEFAULT_MODEL)) as span:
+        result = _complete_reasoning(built, evidence, config, backend, validator)
+        span.set(status=result.status, **(result.token_usage.model_dump() if result.token_usage else {}))
+        if result.rejection_reason:
+            # LLM/parse errors and early aborts (counted by app.record_result)
+            span.set(rejection_reason=result.rejection_reason)
+    return result
+
+
+def _complete_reasoning(built: BuiltPrompt, evidence: List[Dict], config: Dict[str, Any],
+                        backend: Optional[LLMBackend] = None, validator=None) -> ClassificationResult:
+    """Steps 3-4 of reason_with_llm for an already built prompt."""
+    messages = built.messages
+    cache = open_response_cache(config.get('cache'))
+    cache_key = request_fingerprint(messages, config)
+
+    # 3. Call LLM (unless the exact prompt was answered before)
     try:
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile", # Or specific model from config
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=config.get('temperature', 0.2),
-            response_format={"type": "json_object"}
-        )
-        
-        response_content = completion.choices[0].message.content
-        
-        # 4. Parse and Validate Schema (Basic parsing here, Validation module does the heavy lifting)
-        trace_data = json.loads(response_content)
-        trace = ReasoningTrace(**trace_data)
-        
-        # Create Result Wrapper
-        result = ClassificationResult(
-            status="SUCCESS",
-            target_class=trace.primary_hypothesis.hypothesis_text, # Simplified mapping
-            confidence=trace.primary_hypothesis.confidence_score,
-            reasoning_trace=trace
-        )
+        response_content = cache.get(cache_key) if cache is not None else None
+        from_cache = response_content is not None
+        completion = None
+
+        if not from_cache and streaming_enabled(config, validator):
+            monitor = StreamMonitor(validator, evidence)
+            try:
+                response_content = stream_completion(backend or get_backend(config), messages, config, monitor)
+            except EarlyAbort as abort:
+                return aborted_result(abort.reason, built, monitor.text, config)
+        elif not from_cache:
+            completion = (backend or get_backend(config)).complete(
+                messages,
+                model=config.get('model', DEFAULT_MODEL),
+                temperature=config.get('temperature', 0.2),
+                max_tokens=config.get('max_tokens', DEFAULT_MAX_TOKENS)
+            )
+            response_content = completion.content
+
+        # 4. Parse and Validate Schema
+        result = parse_reasoning_response(response_content)
+        result.token_usage = token_usage(built, response_content, config, completion, cached=from_cache)
+
+        # Only well-formed responses are recorded, so a bad answer can be retried
+        if cache is not None and not from_cache:
+            cache.put(cache_key, response_content, model=config.get('model', DEFAULT_MODEL))
         return result
-        
+
     except Exception as e:
-        # Fallback for LLM errors or parsing errors
-        print(f"LLM Error: {e}")
-        # Return a rejection result
-        # We need to construct a valid placeholder or re-raise
+        # Fallback for LLM errors, parsing errors or replay-mode cache misses.
         # For safety, we return a REJECTION result
-        return ClassificationResult(
-            status="REJECTION", 
-            confidence=0.0, 
-            reasoning_trace=ReasoningTrace( # Dummy trace to valid schema
-                primary_hypothesis={"hypothesis_text": "Error", "supporting_evidence": [], "confidence_score": 0.0},
-                alternatives_considered=[],
-                logical_steps=["System Error encountered"]
-            ),
-            rejection_reason=str(e)
-        )
+        return rejection_result(str(e))
+
+
+def reason_batch_with_llm(
+    claims: List[str],
+    evidence: List[Dict],
+    config: Dict[str, Any],
+    backend: Optional[LLMBackend] = None,
+    claim_evidence: Optional[List[List[Dict]]] = None
+) -> List[ClassificationResult]:
+    """
+    Reasons over several claims about the same story in ONE LLM call.
+
+    Args:
+        claims: Claims sharing a story (ideally a character)
+        evidence: De-duplicated evidence shared by all claims (retrieval.merge_evidence)
+        config: 'reasoning' config section
+        backend: LLM backend override
+        claim_evidence: Each claim's own evidence, used when a claim has to
+            fall back to a single-claim call
+
+    Returns:
+        One ClassificationResult per claim, in input order
+    """
+    if len(claims) == 1:
+        return [reason_with_llm(claims[0], evidence, config, backend)]
+
+    ids = claim_ids(len(claims))
+    built = PromptBuilder(config).build_batch(list(zip(ids, claims)), evidence)
+    max_tokens = batch_max_tokens(config, len(claims))
+    cache = open_response_cache(config.get('cache'))
+    cache_key = request_fingerprint(built.messages, config, max_tokens)
+    response_content, completion, from_cache = None, None, False
+
+    with tracing.span("llm", model=config.get('model', DEFAULT_MODEL), claims=len(claims)) as span:
+        try:
+            response_content = cache.get(cache_key) if cache is not None else None
+            from_cache = response_content is not None
+            if not from_cache:
+                completion = (backend or get_backend(config)).complete(
+                    built.messages,
+                    model=config.get('model', DEFAULT_MODEL),
+                    temperature=config.get('temperature', 0.2),
+                    max_tokens=max_tokens
+                )
+                response_content = completion.content
+                span.set(prompt_tokens=completion.prompt_tokens, completion_tokens=completion.completion_tokens)
+            span.set(cached=from_cache)
+            parsed = parse_batch_response(response_content, ids)
+        except Exception as e:
+            # Every claim falls back to its own call below
+            METRICS.inc("llm_batch_errors_total")
+            span.set(rejection_reason=str(e))
+            parsed = {claim_id: e for claim_id in ids}
+
+    usage = None
+    if response_content is not None:
+        usage = token_usage(built, response_content, config, completion, cached=from_cache, share=len(claims))
+        if cache is not None and not from_cache and not any(isinstance(r, Exception) for r in parsed.values()):
+            cache.put(cache_key, response_content, model=config.get('model', DEFAULT_MODEL))
+
+    results = []
+    for i, claim_id in enumerate(ids):
+        result = parsed[claim_id]
+        if isinstance(result, Exception):
+            # Fall back to a single-claim call for just this claim
+            own_evidence = claim_evidence[i] if claim_evidence else evidence
+            result = reason_with_llm(claims[i], own_evidence, config, backend)
+        else:
+            result.token_usage = usage
+        results.append(result)
+    return results
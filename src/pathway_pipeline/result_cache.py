@@ -0,0 +1,125 @@
+"""
+Service-level result reuse
+Blezecon's responsibility
+
+Two layers in front of the query path:
+    SingleFlight - concurrent identical requests share one in-flight
+                   computation instead of each running retrieval + LLM +
+                   validation
+    ResultCache  - bounded LRU of finished response bodies keyed on
+                   (story_id, backstory hash, config hash, index version),
+                   served with an ETag so clients can revalidate with
+                   If-None-Match
+
+Config keys (service.result_cache):
+    enabled, max_entries
+"""
+import asyncio
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from src.utils.metrics import METRICS
+
+
+# Sections whose values change query results
+RESULT_CONFIG_SECTIONS = ("chunking", "retrieval", "reasoning", "validation")
+
+
+def config_fingerprint(config: Dict[str, Any]) -> str:
+    """Hash of the config sections that affect a query result."""
+    relevant = {section: config.get(section) for section in RESULT_CONFIG_SECTIONS}
+    payload = json.dumps(relevant, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def result_key(story_id: str, backstory: str, config_hash: str, index_version: str) -> str:
+    backstory_hash = hashlib.sha1(backstory.encode("utf-8")).hexdigest()
+    return f"{story_id}:{backstory_hash}:{config_hash}:{index_version}"
+
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag for a response body."""
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class ResultCache:
+    """
+    Bounded LRU of response bodies.
+
+    Args:
+        max_entries: Bodies kept before the least recently used is evicted
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """(body, etag) or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                METRICS.inc("result_cache_total", outcome="miss")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            METRICS.inc("result_cache_total", outcome="hit")
+            return entry
+
+    def put(self, key: str, body: bytes) -> str:
+        """Store a body; returns its ETag."""
+        etag = body_etag(body)
+        with self._lock:
+            self._entries[key] = (body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key onto one task.
+
+    The shared task is shielded, so a caller that goes away (e.g. client
+    disconnect) does not cancel the computation for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            METRICS.inc("coalesced_total")
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
@@ -1,6 +1,8 @@
 import pathway as pw
 from typing import List, Dict
 
+from src.utils import tracing
+
 def retrieve_evidence(query: str, indexed_chunks: pw.Table, story_id: str, top_k: int = 8) -> List[Dict]:
     """
     Retrieves evidence with deterministic diversity enforcement.
@@ -50,40 +52,97 @@ def retrieve_evidence(query: str, indexed_chunks: pw.Table, story_id: str, top_k
 def filter_for_diversity(candidates: List[Dict], min_chapters: int = 3, limit: int = 8) -> List[Dict]:
     """
     Client-side diversity filter.
-    Enforces 'min_distinct_chapters'.
+    Enforces 'min_distinct_chapters': the best chunk of each of the first
+    min_chapters distinct chapters is kept, the remaining spots go to the
+    best-scoring chunks regardless of chapter. Best-first order is kept.
     """
-    selected = []
+    picked = set()
     seen_chapters = set()
     
-    # Primary pass: Try to pick unique chapters first
-    for chunk in candidates:
-        if len(selected) >= limit:
+    # Primary pass: the best chunk of up to min_chapters distinct chapters
+    for position, chunk in enumerate(candidates):
+        if len(picked) >= min(min_chapters, limit):
             break
         
         chap = chunk['chapter']
         if chap not in seen_chapters:
-            selected.append(chunk)
+            picked.add(position)
             seen_chapters.add(chap)
             
     # Secondary pass: Fill remaining spots with best scoring chunks regardless of chapter
-    # (avoiding duplicates)
-    for chunk in candidates:
-        if len(selected) >= limit:
+    for position in range(len(candidates)):
+        if len(picked) >= limit:
             break
-        if chunk not in selected:
-            selected.append(chunk)
+        picked.add(position)
             
-    return selected
+    return [candidates[position] for position in sorted(picked)]
 
 # Re-implementing the main function to handle the mock flow
 def retrieve_evidence(query: str, indexed_chunks: pw.Table, story_id: str, top_k: int = 8) -> List[Dict]:
     # In a full Pathway app, this would use pw.io.http or similar to query the live index.
     # Since we are setting up the structure:
-    print(f"    (Mock) Retrieving candidates for '{query[:20]}...' from story {story_id}")
+    # Mock return for verification flow (recorded as a span rather than printed per query)
+    with tracing.span("search", mock=True, story_id=story_id, query=query[:20]):
+        return [
+            {"chunk_id": "1", "text": "Evidence A", "chapter": "ch_1", "story_id": story_id},
+            {"chunk_id": "2", "text": "Evidence B", "chapter": "ch_2", "story_id": story_id},
+            {"chunk_id": "3", "text": "Evidence C", "chapter": "ch_3", "story_id": story_id},
+        ]
+
+
+def merge_evidence(evidence_lists: List[List[Dict]]) -> List[Dict]:
+    """
+    Shared evidence for several queries about the same story.
+    Interleaves the per-query rankings (every query's best chunk first, then
+    every query's second, ...) and drops duplicate chunk_ids, so the merged
+    list stays best-first for prompt budgeting.
+    """
+    merged = []
+    seen = set()
+    depth = max((len(evidence) for evidence in evidence_lists), default=0)
+    for rank in range(depth):
+        for evidence in evidence_lists:
+            if rank < len(evidence) and evidence[rank]['chunk_id'] not in seen:
+                seen.add(evidence[rank]['chunk_id'])
+                merged.append(evidence[rank])
+    return merged
+
+
+def retrieve_evidence_batch(
+    queries: List[str],
+    story_ids: List[str],
+    vector_index,
+    indexed_chunks: pw.Table,
+    top_k: int = 8,
+    min_chapters: int = 3
+) -> List[List[Dict]]:
+    """
+    Evidence for many queries at once.
     
-    # Mock return for verification flow
-    return [
-        {"chunk_id": "1", "text": "Evidence A", "chapter": "ch_1", "story_id": story_id},
-        {"chunk_id": "2", "text": "Evidence B", "chapter": "ch_2", "story_id": story_id},
-        {"chunk_id": "3", "text": "Evidence C", "chapter": "ch_3", "story_id": story_id},
-    ] 
+    With a materialized index (PathwayVectorIndex.materialize) all queries
+    are encoded in one batch and scored per story with one matrix product;
+    candidates are oversampled 3x and then diversity-filtered as above.
+    Without one, falls back to retrieve_evidence per query.
+    
+    Returns:
+        One evidence list per query, in input order
+    """
+    if vector_index is None or not vector_index.rows:
+        return [retrieve_evidence(query, indexed_chunks, story_id, top_k) for query, story_id in zip(queries, story_ids)]
+    with tracing.span("search", queries=len(queries)):
+        candidates = vector_index.search_many(queries, story_ids, top_k=top_k * 3)
+    with tracing.span("rerank", candidates=sum(len(pool) for pool in candidates), min_chapters=min_chapters):
+        return [select_evidence(pool, top_k, min_chapters) for pool in candidates]
+
+
+def select_evidence(pool: List[Dict], top_k: int = 8, min_chapters: int = 3) -> List[Dict]:
+    """
+    Final evidence from a best-first candidate pool: the best top_k * 3
+    candidates, diversity-filtered down to top_k (min_chapters <= 0: no filter).
+    A pool searched with a larger top_k gives the same result, so the
+    knob sweep searches once for its largest top_k.
+    """
+    pool = pool[:top_k * 3]
+    if min_chapters <= 0:
+        return pool[:top_k]
+    return filter_for_diversity(pool, min_chapters=min_chapters, limit=top_k)
@@ -0,0 +1,282 @@
+"""
+Pre-LLM screening cascade
+Gopal's responsibility (Reasoning Logic)
+
+Cheap checks that run between retrieval and reason_with_llm and answer the
+obvious cases without calling the 70B model. Stages run in order, cheapest
+first; the first one that is confident returns a REJECTION or CONTRADICTION
+with a recorded reason, otherwise the claim goes to the LLM as before.
+
+Stages (reasoning.screening.stages):
+    similarity         - best retrieval similarity below min_similarity (claims
+                         with no evidence at all are passed on, not rejected)
+    character_presence - the claim's character never appears in the story
+    lexical            - claim shares almost no content words with the
+                         evidence, or an evidence sentence restates the
+                         claim with the opposite polarity
+    nli                - small local NLI cross-encoder (optional model)
+"""
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.reasoning_validation.lexical import STOPWORDS, content_words, is_negated
+from src.reasoning_validation.schemas import ClassificationResult, ReasoningTrace
+from src.utils import tracing
+from src.utils.metrics import METRICS
+
+
+DEFAULT_STAGES = ["similarity", "character_presence", "lexical"]
+
+# Unicode-aware, so accented names ("Dantès", "Mercédès") stay one word
+_WORD = re.compile(r"\w[\w']*")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_CLAIM_PREFIX = re.compile(r"^\s*verify claim:\s*", re.I)
+
+
+def _words(text: str) -> List[str]:
+    """
+    Lower-cased words of text, NFC-normalised so composed and decomposed
+    accents compare equal; a possessive also yields its base ("dantès's"
+    -> "dantès's", "dantès").
+    """
+    words = []
+    for word in _WORD.findall(unicodedata.normalize("NFC", text).lower()):
+        words.append(word)
+        if "'" in word:
+            words.append(word.split("'")[0])
+    return words
+
+
+def screened_result(status: str, stage: str, reason: str, confidence: float) -> ClassificationResult:
+    """
+    Schema-valid result for a claim answered by the cascade.
+    """
+    return ClassificationResult(
+        status=status,
+        confidence=confidence,
+        reasoning_trace=ReasoningTrace(
+            primary_hypothesis={"hypothesis_text": reason, "supporting_evidence": [], "confidence_score": confidence},
+            alternatives_considered=[],
+            logical_steps=[f"Screened by the '{stage}' stage before the LLM call", reason]
+        ),
+        rejection_reason=reason,
+        screened_by=stage
+    )
+
+
+class ScreeningCascade:
+    """
+    Ordered cheap checks in front of the LLM
+
+    Config keys (reasoning.screening):
+        enabled, stages, min_similarity, min_lexical_overlap,
+        contradiction_overlap, nli_model, nli_threshold
+    """
+
+    def __init__(self, config: Dict[str, Any], story_texts: Optional[Dict[str, str]] = None):
+        self.enabled = config.get('enabled', False)
+        self.stages = list(config.get('stages', DEFAULT_STAGES))
+        self.min_similarity = config.get('min_similarity', 0.2)
+        self.min_lexical_overlap = config.get('min_lexical_overlap', 0.1)
+        self.contradiction_overlap = config.get('contradiction_overlap', 0.8)
+        self.nli_model_name = config.get('nli_model', 'cross-encoder/nli-deberta-v3-xsmall')
+        self.nli_threshold = config.get('nli_threshold', 0.9)
+        self.story_texts = story_texts if story_texts is not None else {}
+
+        unknown = [stage for stage in self.stages if not hasattr(self, f"_stage_{stage}")]
+        if unknown:
+            raise ValueError(f"Unknown screening stages: {unknown}")
+
+        self._nli_model = None
+        # story_id -> the story's words (see _words), built on first use
+        self._story_words: Dict[str, set] = {}
+        # (story_id, character) -> appears in the story (the per-story character index)
+        self._present: Dict[Tuple[str, str], bool] = {}
+        self._stats_lock = threading.Lock()
+        self.seen = 0
+        # Claims that reached screening without any evidence
+        self.no_evidence = 0
+        self.evaluated = {stage: 0 for stage in self.stages}
+        self.skipped = {stage: 0 for stage in self.stages}
+
+    def screen(
+        self,
+        claim: str,
+        evidence: List[Dict],
+        story_id: Optional[str] = None,
+        character: Optional[str] = None
+    ) -> Optional[ClassificationResult]:
+        """
+        Run the cascade over one claim.
+
+        Args:
+            claim: The query/claim
+            evidence: Retrieved chunks (may carry a 'similarity' score)
+            story_id: Story the claim is about
+            character: Character the claim is about, if known
+
+        Returns:
+            ClassificationResult when a stage is confident, else None (call the LLM)
+        """
+        if not self.enabled:
+            return None
+        claim = _CLAIM_PREFIX.sub("", claim)
+
+        with self._stats_lock:
+            self.seen += 1
+        for stage in self.stages:
+            with self._stats_lock:
+                self.evaluated[stage] += 1
+            result = getattr(self, f"_stage_{stage}")(claim, evidence, story_id, character)
+            if result is not None:
+                with self._stats_lock:
+                    self.skipped[stage] += 1
+                return result
+        return None
+
+    # ========== STAGES ==========
+
+    def _stage_similarity(self, claim, evidence, story_id, character):
+        if not evidence:
+            # Nothing retrieved says nothing about the claim (an empty or
+            # unindexed story): leave it to the LLM + Validator, but count it
+            with self._stats_lock:
+                self.no_evidence += 1
+            METRICS.inc("screening_passed_total", reason="no_evidence")
+            return None
+        scores = [chunk['similarity'] for chunk in evidence if chunk.get('similarity') is not None]
+        if scores and max(scores) < self.min_similarity:
+            return screened_result(
+                "REJECTION", "similarity",
+                f"Best retrieval similarity {max(scores):.2f} below {self.min_similarity}", 0.8
+            )
+        return None
+
+    def prefetch(self, story_id: str, characters: List[str] = ()):
+        """Build a story's word index and its character index ahead of its claims."""
+        for character in characters:
+            self.character_present(story_id, character)
+
+    def character_present(self, story_id: str, character: str) -> Optional[bool]:
+        """
+        Whether any part of the name ("Edmond Dantès" matches "Dantès")
+        occurs in the story; None if unknown. Computed once per (story, character).
+        """
+        key = (story_id, character)
+        if key in self._present:
+            return self._present[key]
+        story_text = self.story_texts.get(story_id)
+        names = [part for part in _words(character) if len(part) > 2 and part not in STOPWORDS]
+        if story_text is None or not names:
+            return None
+        if story_id not in self._story_words:
+            self._story_words[story_id] = set(_words(story_text))
+        present = any(name in self._story_words[story_id] for name in names)
+        self._present[key] = present
+        return present
+
+    def _stage_character_presence(self, claim, evidence, story_id, character):
+        if not character or not story_id or self.character_present(story_id, character) is not False:
+            return None
+        return screened_result(
+            "REJECTION", "character_presence",
+            f"Character '{character}' never appears in story '{story_id}'", 0.95
+        )
+
+    def _stage_lexical(self, claim, evidence, story_id, character):
+        claim_words = set(content_words(claim))
+        if not claim_words or not evidence:
+            return None
+
+        evidence_words = set()
+        for chunk in evidence:
+            evidence_words.update(content_words(chunk['text']))
+        overlap = len(claim_words & evidence_words) / len(claim_words)
+        if overlap < self.min_lexical_overlap:
+            return screened_result(
+                "REJECTION", "lexical",
+                f"Claim shares {overlap:.0%} of its content words with the evidence", 0.7
+            )
+
+        # A sentence restating the claim with the opposite polarity
+        claim_negated = is_negated(claim)
+        for chunk in evidence:
+            for sentence in _SENTENCE_SPLIT.split(chunk['text']):
+                shared = len(claim_words & set(content_words(sentence))) / len(claim_words)
+                if shared >= self.contradiction_overlap and is_negated(sentence) != claim_negated:
+                    return screened_result(
+                        "CONTRADICTION", "lexical",
+                        f"Node {chunk['chunk_id']} states the opposite: '{sentence.strip()[:120]}'", 0.7
+                    )
+        return None
+
+    def _stage_nli(self, claim, evidence, story_id, character):
+        if not evidence:
+            return None
+        model = self._load_nli()
+        if model is None:
+            return None
+
+        pairs = [(chunk['text'], claim) for chunk in evidence]
+        scores = model.predict(pairs, apply_softmax=True)
+        # nli-deberta-v3 label order: contradiction, entailment, neutral
+        best = max(range(len(pairs)), key=lambda i: scores[i][0])
+        if scores[best][0] >= self.nli_threshold:
+            return screened_result(
+                "CONTRADICTION", "nli",
+                f"NLI model contradiction probability {scores[best][0]:.2f} on node {evidence[best]['chunk_id']}",
+                float(scores[best][0])
+            )
+        return None
+
+    def _load_nli(self):
+        if self._nli_model is None:
+            # Loaded lazily by the first query that reaches the nli stage
+            with tracing.span("nli_load", model=self.nli_model_name) as span:
+                try:
+                    from sentence_transformers import CrossEncoder
+                    self._nli_model = CrossEncoder(self.nli_model_name)
+                except Exception as e:
+                    # The stage is skipped from now on; visible on /metrics
+                    METRICS.inc("screening_nli_unavailable_total")
+                    span.set(disabled=str(e))
+                    self._nli_model = False
+        return self._nli_model or None
+
+    # ========== REPORTING ==========
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Per-stage skip rates.
+
+        Returns:
+            {"screened": n, "skipped": n, "no_evidence": n,
+             "stages": {stage: {"evaluated", "skipped", "skip_rate"}}}
+        """
+        with self._stats_lock:
+            stages = {
+                stage: {
+                    "evaluated": self.evaluated[stage],
+                    "skipped": self.skipped[stage],
+                    "skip_rate": self.skipped[stage] / self.evaluated[stage] if self.evaluated[stage] else 0.0
+                }
+                for stage in self.stages
+            }
+            return {
+                "screened": self.seen,
+                "skipped": sum(self.skipped.values()),
+                "no_evidence": self.no_evidence,
+                "stages": stages
+            }
+
+    def print_report(self):
+        report = self.report()
+        if not report["screened"]:
+            return
+        print(f"🧹 Screening skipped {report['skipped']}/{report['screened']} LLM calls")
+        if report["no_evidence"]:
+            print(f"    ⚠️ {report['no_evidence']} claims had no evidence (passed to the LLM)")
+        for stage, stats in report["stages"].items():
+            print(f"    - {stage}: {stats['skipped']}/{stats['evaluated']} ({stats['skip_rate']:.1%})")
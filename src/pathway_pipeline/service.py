@@ -5,14 +5,26 @@ Blezecon's responsibility (OPTIONAL)
 Exposes Pathway app as HTTP REST API for real-time queries.
 This allows external systems to query your pipeline.
 """
+import json
+import os
+import time
+from typing import Any, Optional, List, Dict, Union
+
 import pathway as pw
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional, List, Dict
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, TypeAdapter
 import uvicorn
 
+from .admission import AdmissionController, Overloaded
 from .app import NovelAnalyzerApp
+from .index import UnknownStoryError
+from .reasoner import is_error_result
+from .result_cache import ResultCache, SingleFlight, body_etag, config_fingerprint, etag_matches, result_key
 from .schema import ReasoningResultSchema
+from src.reasoning_validation.schemas import ClassificationResult, EvidenceSpan
+from src.utils import tracing
+from src.utils.metrics import METRICS
 
 
 # ============= REQUEST/RESPONSE MODELS =============
@@ -30,10 +42,52 @@ class QueryResponse(BaseModel):
     decision: int  # 0 or 1
     reasoning: str
     confidence: float
-    evidence_used: List[Dict]
+    evidence_used: List[EvidenceSpan]
     processing_time_ms: float
 
 
+class BatchQueryItem(QueryRequest):
+    """One claim of a /query/batch request"""
+    request_id: Optional[str] = None  # defaults to the item's position
+    character: Optional[str] = None
+
+
+class BatchQueryRow(QueryResponse):
+    """One NDJSON row of a /query/batch response (processing_time_ms counts from the batch start)"""
+    request_id: str
+
+
+# Serialize responses straight to JSON bytes
+_QUERY_RESPONSE_JSON = TypeAdapter(QueryResponse)
+_BATCH_ROW_JSON = TypeAdapter(BatchQueryRow)
+
+
+def to_query_response(
+    story_id: str,
+    result: ClassificationResult,
+    processing_time_ms: float,
+    request_id: Optional[str] = None
+) -> QueryResponse:
+    """
+    Map a validated ClassificationResult to the API response (a
+    BatchQueryRow when request_id is given).
+    Every field comes from an already validated model, so nothing is
+    validated or copied again.
+    """
+    primary = result.reasoning_trace.primary_hypothesis
+    fields = dict(
+        story_id=story_id,
+        decision=1 if result.status == "SUCCESS" else 0,
+        reasoning=result.rejection_reason or primary.hypothesis_text,
+        confidence=result.confidence,
+        evidence_used=primary.supporting_evidence,
+        processing_time_ms=processing_time_ms
+    )
+    if request_id is not None:
+        return BatchQueryRow.model_construct(request_id=request_id, **fields)
+    return QueryResponse.model_construct(**fields)
+
+
 class HealthResponse(BaseModel):
     """Health check response"""
     status: str
@@ -50,8 +104,30 @@ api = FastAPI(
     version="1.0.0"
 )
 
+# Set by create_pathway_service for multi-worker mode (read by each worker's startup_event)
+CONFIG_ENV = "NOVEL_ANALYZER_CONFIG"
+SNAPSHOT_ENV = "NOVEL_ANALYZER_SNAPSHOT"
+
 # Global app instance (initialized on startup)
 pathway_app: Optional[NovelAnalyzerApp] = None
+# Concurrency limit + wait queue for /query (configured from the app's service section)
+admission = AdmissionController()
+# Identical concurrent /query requests share one computation; finished bodies are cached
+single_flight = SingleFlight()
+result_cache: Optional[ResultCache] = None
+config_hash = ""
+
+
+def init_service(app: NovelAnalyzerApp):
+    """Install a built app and size admission control and the result cache from its config."""
+    global pathway_app, admission, single_flight, result_cache, config_hash
+    service_config = app.config.get('service') or {}
+    cache_config = service_config.get('result_cache') or {}
+    pathway_app = app
+    admission = AdmissionController.from_config(service_config)
+    single_flight = SingleFlight()
+    result_cache = ResultCache(cache_config.get('max_entries', 10000)) if cache_config.get('enabled', False) else None
+    config_hash = config_fingerprint(app.config)
 
 
 # ============= ENDPOINTS =============
@@ -59,15 +135,22 @@ pathway_app: Optional[NovelAnalyzerApp] = None
 @api.on_event("startup")
 async def startup_event():
     """Initialize Pathway app on service startup"""
-    global pathway_app
+    if pathway_app is not None:
+        # Already built by create_pathway_service
+        return
     
     print("🚀 Starting Pathway service...")
     
-    # Initialize your Pathway app
-    pathway_app = NovelAnalyzerApp(config_path="configs/pathway.yaml")
+    # Initialize your Pathway app (configs/pathway.yaml has no retrieval/reasoning sections)
+    app = NovelAnalyzerApp(config_path=os.environ.get(CONFIG_ENV, "configs/system_rules.yaml"))
     
-    # Build the pipeline
-    pathway_app.build_pipeline()
+    # Multi-worker mode: the loader already built the snapshot, workers only map it
+    snapshot_path = os.environ.get(SNAPSHOT_ENV)
+    if snapshot_path:
+        app.attach_snapshot(snapshot_path)
+    else:
+        app.build_pipeline()
+    init_service(app)
     
     print("✅ Pathway service ready!")
 
@@ -88,12 +171,18 @@ async def health_check():
 
 
 @api.post("/query", response_model=QueryResponse)
-async def query_consistency(request: QueryRequest):
+async def query_consistency(request: QueryRequest, if_none_match: Optional[str] = Header(None)):
     """
     Check backstory consistency
     
+    Identical concurrent requests share one computation, and finished
+    results are cached per (story, backstory, config, index version); the
+    response carries an ETag, and a matching If-None-Match gets a 304.
+    With logging.tracing enabled, X-Trace-Id names the request's trace.
+    
     Args:
         request: Query request with story_id and backstory
+        if_none_match: ETag of a response the client already has
         
     Returns:
         Consistency check result
@@ -112,27 +201,51 @@ async def query_consistency(request: QueryRequest):
             detail="Service not ready. Please wait for initialization."
         )
     
-    try:
-        import time
+    key = result_key(request.story_id, request.backstory, config_hash, getattr(pathway_app, 'index_version', ''))
+    request_start = time.perf_counter()
+    
+    async def compute():
         start_time = time.time()
         
-        # Call your Pathway app
-        result = pathway_app.query(
-            story_id=request.story_id,
-            backstory=request.backstory
-        )
+        # Call your Pathway app (LLM call awaited on the async engine,
+        # retrieval/validation on the app's worker pool)
+        async with admission.slot():
+            result = await pathway_app.aquery_result(
+                story_id=request.story_id,
+                backstory=request.backstory
+            )
         
         processing_time = (time.time() - start_time) * 1000  # Convert to ms
         
-        return QueryResponse(
-            story_id=request.story_id,
-            decision=result['decision'],
-            reasoning=result['reasoning'],
-            confidence=result.get('confidence', 0.0),
-            evidence_used=result.get('evidence_used', []),
-            processing_time_ms=processing_time
-        )
+        body = _QUERY_RESPONSE_JSON.dump_json(to_query_response(request.story_id, result, processing_time))
+        # Transient LLM failures are not cached
+        if result_cache is not None and not is_error_result(result):
+            return body, result_cache.put(key, body)
+        return body, body_etag(body)
     
+    try:
+        with tracing.span("http.query", story_id=request.story_id) as trace:
+            cached = result_cache.get(key) if result_cache is not None else None
+            trace.set(result_cache_hit=cached is not None)
+            body, etag = cached if cached is not None else await single_flight.do(key, compute)
+        METRICS.observe("request_seconds", time.perf_counter() - request_start, endpoint="/query")
+        
+        headers = {"ETag": etag}
+        if trace.trace_id:
+            headers["X-Trace-Id"] = trace.trace_id
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+    
+    except UnknownStoryError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Overloaded as e:
+        METRICS.inc("shed_total", endpoint="/query")
+        return JSONResponse(
+            status_code=429,
+            content={"detail": str(e)},
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -140,19 +253,151 @@ async def query_consistency(request: QueryRequest):
         )
 
 
+def _batch_items(body: bytes, content_type: str) -> List[Union[BatchQueryItem, Exception]]:
+    """
+    Items of a /query/batch body: a JSON array, or NDJSON (one object per
+    line). Malformed items come back as the exception they raised.
+    
+    Raises:
+        ValueError: the body itself is not an array / NDJSON
+    """
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return [_parse_item(line) for line in body.split(b"\n") if line.strip()]
+    
+    items = json.loads(body)
+    if not isinstance(items, list):
+        raise ValueError("Expected a JSON array of {story_id, backstory} objects or an NDJSON body")
+    return [_parse_item(item) for item in items]
+
+
+def _parse_item(raw: Any) -> Union[BatchQueryItem, Exception]:
+    try:
+        if isinstance(raw, (bytes, str)):
+            return BatchQueryItem.model_validate_json(raw)
+        return BatchQueryItem.model_validate(raw)
+    except Exception as e:
+        return e
+
+
+@api.post("/query/batch")
+async def query_batch(request: Request):
+    """
+    Check many backstories in one request
+    
+    Accepts a JSON array or NDJSON (Content-Type: application/x-ndjson) of
+    {story_id, backstory[, character, request_id]} and streams one NDJSON
+    row per item back in completion order. Items share batched retrieval
+    and run concurrently on the reasoning engine; each retrieval block
+    holds one admission slot while it runs. A failed item (including one
+    shed by admission mid-stream) yields {"request_id", "story_id", "error"}.
+    
+    Example:
+        POST /query/batch
+        {"request_id": "a1", "story_id": "1", "backstory": "Character grew up in Chicago..."}
+        {"request_id": "a2", "story_id": "1", "backstory": "Character never left Paris..."}
+    """
+    if pathway_app is None:
+        raise HTTPException(status_code=503, detail="Service not ready. Please wait for initialization.")
+    
+    service_config = pathway_app.config.get('service') or {}
+    max_items = service_config.get('max_batch_items', 10000)
+    
+    # The body is read up front: Starlette's StreamingResponse listens on
+    # the same receive channel, so the body can't be consumed while streaming
+    try:
+        items = _batch_items(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Malformed batch body: {e}")
+    if len(items) > max_items:
+        raise HTTPException(status_code=413, detail=f"Batch of {len(items)} items exceeds max_batch_items ({max_items})")
+    
+    request_ids = [
+        item.request_id if isinstance(item, BatchQueryItem) and item.request_id is not None else str(position)
+        for position, item in enumerate(items)
+    ]
+    story_ids = [item.story_id if isinstance(item, BatchQueryItem) else "" for item in items]
+    
+    # Admission is charged per retrieval block inside the stream (one slot
+    # each, like a /query), so a batch can't bypass max_concurrency and a
+    # disconnect gives its slots back; shed up front if the queue is full
+    try:
+        admission.check()
+    except Overloaded as e:
+        METRICS.inc("shed_total", endpoint="/query/batch")
+        return JSONResponse(status_code=429, content={"detail": str(e)}, headers={"Retry-After": str(e.retry_after)})
+    
+    async def queries():
+        for item in items:
+            yield item if isinstance(item, Exception) else (item.story_id, item.backstory, item.character)
+    
+    async def rows():
+        start = time.time()
+        try:
+            async for position, result in pathway_app.aquery_stream(
+                queries(),
+                block_size=service_config.get('batch_block_size', 64),
+                max_in_flight=service_config.get('batch_max_in_flight', 64),
+                admit=admission.slot
+            ):
+                if isinstance(result, Exception):
+                    yield json.dumps({
+                        "request_id": request_ids[position],
+                        "story_id": story_ids[position],
+                        "error": str(result)
+                    }).encode("utf-8") + b"\n"
+                    continue
+                row = to_query_response(story_ids[position], result, (time.time() - start) * 1000, request_ids[position])
+                yield _BATCH_ROW_JSON.dump_json(row) + b"\n"
+        finally:
+            METRICS.observe("request_seconds", time.time() - start, endpoint="/query/batch")
+    
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
+@api.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Per-stage latency histograms and counters in Prometheus text format
+    
+    Stage timings (stage_seconds), request latency (request_seconds),
+    query outcomes, rejections by reason, LLM tokens and cache use, result
+    cache hits, coalesced requests and shed load. Values are per worker
+    process: with several uvicorn workers each scrape hits one of them.
+    """
+    return PlainTextResponse(METRICS.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+
 @api.get("/stories")
-async def list_stories():
+async def list_stories(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    q: Optional[str] = Query(None, description="Substring of the story_id"),
+    character: Optional[str] = Query(None, description="Substring of one of the story's top characters"),
+    min_words: Optional[int] = Query(None, ge=0),
+    max_words: Optional[int] = Query(None, ge=0)
+):
     """
-    List all available stories
+    List the indexed stories (served from the in-memory catalog)
     
     Returns:
-        List of story IDs
+        {"total", "offset", "limit", "index_version", "stories": [summary, ...]}
+        where a summary has story_id, word/chunk/chapter counts and top characters
+        
+    Example:
+        GET /stories?character=dant&limit=10
     """
     if pathway_app is None:
         raise HTTPException(status_code=503, detail="Service not ready")
     
-    # TODO: Implement story listing
-    return {"stories": ["1", "2", "3"]}  # Placeholder
+    catalog = pathway_app.catalog
+    total, stories = catalog.page(offset, limit, q=q, character=character, min_words=min_words, max_words=max_words)
+    return {
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "index_version": catalog.index_version,
+        "stories": stories
+    }
 
 
 @api.get("/story/{story_id}/metadata")
@@ -164,24 +409,19 @@ async def get_story_metadata(story_id: str):
         story_id: Story identifier
         
     Returns:
-        Story metadata
+        Catalog entry: counts, chapter offsets, top characters with mention
+        counts and the index version
     """
     if pathway_app is None:
         raise HTTPException(status_code=503, detail="Service not ready")
     
-    # TODO: Load metadata from data/metadata/
-    import json
-    
-    try:
-        metadata_path = f"data/metadata/novel_{story_id}_metadata.json"
-        with open(metadata_path, 'r') as f:
-            metadata = json.load(f)
-        return metadata
-    except FileNotFoundError:
+    metadata = pathway_app.catalog.get(story_id)
+    if metadata is None:
         raise HTTPException(
             status_code=404,
             detail=f"Story {story_id} not found"
         )
+    return metadata
 
 
 # ============= PATHWAY INTEGRATION =============
@@ -189,7 +429,8 @@ async def get_story_metadata(story_id: str):
 def create_pathway_service(
     host: str = "0.0.0.0",
     port: int = 8080,
-    config_path: str = "configs/pathway.yaml"
+    config_path: str = "configs/system_rules.yaml",
+    workers: Optional[int] = None
 ):
     """
     Create and run Pathway service
@@ -197,20 +438,39 @@ def create_pathway_service(
     This uses Pathway's native REST connector for streaming data.
     For batch processing, we use FastAPI above.
     
+    With several workers (service.workers), this process is the loader:
+    it builds the pipeline once and writes the snapshot to
+    service.snapshot_dir; each uvicorn worker process then attaches to
+    that snapshot (memory-mapped, not copied).
+    
     Args:
         host: Service host
         port: Service port
         config_path: Path to Pathway config
+        workers: Worker processes (default: service.workers, 1)
     """
     print(f"🌐 Starting Pathway REST service on {host}:{port}...")
     
     # Initialize app
-    global pathway_app
-    pathway_app = NovelAnalyzerApp(config_path)
-    pathway_app.build_pipeline()
+    app = NovelAnalyzerApp(config_path)
+    service_config = app.config.get('service') or {}
+    workers = workers or service_config.get('workers', 1)
+    app.build_pipeline()
+    
+    if workers <= 1:
+        init_service(app)
+        # Run FastAPI server
+        uvicorn.run(api, host=host, port=port)
+        return
     
-    # Run FastAPI server
-    uvicorn.run(api, host=host, port=port)
+    snapshot_path = service_config.get('snapshot_dir', './data/index/serving')
+    app.save_snapshot(snapshot_path)
+    # Drop the loader's copy before the workers map theirs
+    del app
+    os.environ[CONFIG_ENV] = config_path
+    os.environ[SNAPSHOT_ENV] = os.path.abspath(snapshot_path)
+    print(f"👷 Starting {workers} workers on snapshot {snapshot_path}")
+    uvicorn.run("src.pathway_pipeline.service:api", host=host, port=port, workers=workers)
 
 
 # ============= MAIN =============
@@ -0,0 +1,174 @@
+"""
+Stage cache
+Blezecon's responsibility
+
+Memoizes the build stages of NovelAnalyzerApp.build_pipeline on disk.
+Each stage declares in STAGES the config keys and upstream stages its
+output depends on. Its key hashes those config values, the upstream
+stages' keys and, for ingestion, the input files' names, sizes and mtimes.
+The output lives under <path>/<stage>/<key>/. A rebuild that changes only
+retrieval or reasoning knobs (e.g. retrieval.top_k, reasoning.temperature,
+see governance.allowed_knobs) computes the same keys. It then loads the
+stored texts, chunks, embeddings and index instead of recomputing them.
+
+Keys are computed without running anything, so a hit on a downstream
+stage (the index) never loads its upstream artifacts.
+
+Config keys (stage_cache):
+    enabled, path, max_entries (kept per stage, oldest removed first)
+"""
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Any, Callable, Dict
+
+from src.utils.metrics import METRICS
+
+
+# Stage -> what its output depends on. Bump "version" when a stage's code
+# changes what it produces.
+STAGES: Dict[str, Dict[str, Any]] = {
+    "ingestion": {"config": ["pathway.input_folder", "pathway.novel_glob"], "upstream": [], "version": 2},
+    "chunking": {"config": ["chunking"], "upstream": ["ingestion"], "version": 3},
+    # Suffix arrays over the story texts, with chunk boundaries for chunk_id lookup
+    "corpus_index": {"config": [], "upstream": ["chunking"], "version": 1},
+    "embedding": {
+        "config": ["retrieval.embedding_model_ref", "retrieval.dimension"],
+        "upstream": ["chunking"],
+        "version": 1
+    },
+    # Materialized vector index + story catalog
+    "index": {"config": ["catalog.top_characters"], "upstream": ["embedding"], "version": 1},
+}
+
+
+def config_value(config: Dict[str, Any], dotted: str) -> Any:
+    """config["a"]["b"] for "a.b"; None if any part is missing."""
+    value: Any = config
+    for part in dotted.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def input_fingerprint(folder: str, pattern: str = "*") -> str:
+    """Names, sizes and mtimes of the files in folder matching pattern (what ingestion reads)."""
+    entries = []
+    for path in sorted(glob.glob(os.path.join(folder, pattern))):
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            entries.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+    return hashlib.sha1(json.dumps(entries).encode("utf-8")).hexdigest()[:16]
+
+
+class StageCache:
+    """
+    On-disk memo of build stages (see module docstring).
+
+    Args:
+        config: Full app config (stage keys hash parts of it)
+        path: Root directory of the stored outputs
+        enabled: False runs every stage without storing anything
+        max_entries: Outputs kept per stage
+    """
+
+    def __init__(self, config: Dict[str, Any], path: str = "./data/cache/stages", enabled: bool = True, max_entries: int = 3):
+        self.config = config
+        self.path = path
+        self.enabled = enabled
+        self.max_entries = max_entries
+        # Extra key material per stage (ingestion: the input fingerprint)
+        self.inputs: Dict[str, str] = {}
+        self._keys: Dict[str, str] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "StageCache":
+        cache_config = config.get('stage_cache') or {}
+        return cls(
+            config,
+            path=cache_config.get('path', "./data/cache/stages"),
+            enabled=cache_config.get('enabled', False),
+            max_entries=cache_config.get('max_entries', 3)
+        )
+
+    def set_inputs(self, stage: str, fingerprint: str):
+        self.inputs[stage] = fingerprint
+        self._keys.clear()
+
+    def key(self, stage: str) -> str:
+        """Hash of the stage's code version, config keys, upstream keys and inputs."""
+        if stage not in self._keys:
+            spec = STAGES[stage]
+            payload = json.dumps({
+                "stage": stage,
+                "version": spec["version"],
+                "config": {name: config_value(self.config, name) for name in spec["config"]},
+                "upstream": {name: self.key(name) for name in spec["upstream"]},
+                "inputs": self.inputs.get(stage)
+            }, sort_keys=True, default=str)
+            self._keys[stage] = hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+        return self._keys[stage]
+
+    def stage_path(self, stage: str) -> str:
+        return os.path.join(self.path, stage, self.key(stage))
+
+    def run(
+        self,
+        stage: str,
+        compute: Callable[[], Any],
+        save: Callable[[Any, str], None],
+        load: Callable[[str], Any]
+    ) -> Any:
+        """
+        The stage's output: load(dir) if stored under the current key, else
+        compute(), stored with save(output, dir) before it is returned.
+
+        Args:
+            stage: Name in STAGES
+            compute: Builds the output (may run upstream stages through this cache)
+            save: Writes the output into an empty directory
+            load: Reads it back from that directory
+        """
+        if not self.enabled:
+            return compute()
+
+        path = self.stage_path(stage)
+        if os.path.exists(os.path.join(path, "stage.json")):
+            METRICS.inc("stage_cache_total", stage=stage, outcome="hit")
+            print(f"  ♻️  {stage}: reusing {path}")
+            # Recently used entries survive pruning
+            os.utime(os.path.join(path, "stage.json"))
+            return load(path)
+
+        METRICS.inc("stage_cache_total", stage=stage, outcome="miss")
+        output = compute()
+        # Written next to the final directory and renamed into place, so a
+        # crash mid-save never leaves an entry that looks complete
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        try:
+            save(output, tmp_path)
+            with open(os.path.join(tmp_path, "stage.json"), "w", encoding="utf-8") as f:
+                json.dump({"stage": stage, "key": self.key(stage), "created": time.time()}, f)
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_path, path)
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self._prune(stage)
+        return output
+
+    def _prune(self, stage: str):
+        """Keep the max_entries most recently used outputs of stage."""
+        root = os.path.join(self.path, stage)
+        entries = [
+            os.path.join(root, name) for name in os.listdir(root)
+            if os.path.exists(os.path.join(root, name, "stage.json"))
+        ]
+        entries.sort(key=lambda entry: os.path.getmtime(os.path.join(entry, "stage.json")), reverse=True)
+        for entry in entries[max(1, self.max_entries):]:
+            shutil.rmtree(entry, ignore_errors=True)
@@ -10,6 +10,11 @@ except (ImportError, AttributeError):
     def udf_decorator(func):
         return func
 
+def normalize_newlines(text: str) -> str:
+    """CRLF / CR line endings -> LF."""
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
 # ==============================================================================
 # FILE PARSING UDF (TXT & CSV ONLY)
 # ==============================================================================
@@ -32,11 +37,14 @@ def parse_file_content(data: bytes, path: str) -> str:
             return ""
     
     # TXT Handling
+    # Line endings are normalised to \n: the novels are CRLF, and chunking
+    # splits paragraphs on blank lines
     elif ext == 'txt':
         try:
-            return data.decode('utf-8')
+            text = data.decode('utf-8')
         except UnicodeDecodeError:
-            return data.decode('latin-1', errors='replace')
+            text = data.decode('latin-1', errors='replace')
+        return normalize_newlines(text)
     
     return "" 
 
@@ -56,12 +64,17 @@ def chunk_text(content: str, story_id: str, chunk_size: int = 500) -> list:
     current_word_count = 0
     chapter_idx = 1
     para_idx = 0
+    offset = 0  # char offset of the current paragraph in content
+    chunk_start = 0
     
     for para in paragraphs:
+        para_start = offset
+        offset += len(para) + 2
+        
         # Crude chapter detection
         if "chapter" in para.lower()[:20]:
             if current_chunk:
-                _commit_chunk(chunks, current_chunk, story_id, chapter_idx, para_idx, current_word_count)
+                _commit_chunk(chunks, current_chunk, story_id, chapter_idx, para_idx, current_word_count, chunk_start)
                 current_chunk = []
                 current_word_count = 0
                 para_idx = 0
@@ -71,21 +84,23 @@ def chunk_text(content: str, story_id: str, chunk_size: int = 500) -> list:
         if not words: continue
         
         if current_word_count + len(words) > chunk_size:
-            _commit_chunk(chunks, current_chunk, story_id, chapter_idx, para_idx, current_word_count)
+            _commit_chunk(chunks, current_chunk, story_id, chapter_idx, para_idx, current_word_count, chunk_start)
             current_chunk = []
             current_word_count = 0
             para_idx += 1
         
+        if not current_chunk:
+            chunk_start = para_start
         current_chunk.append(para)
         current_word_count += len(words)
     
     # Final chunk
     if current_chunk:
-         _commit_chunk(chunks, current_chunk, story_id, chapter_idx, para_idx, current_word_count)
+         _commit_chunk(chunks, current_chunk, story_id, chapter_idx, para_idx, current_word_count, chunk_start)
     
     return chunks
 
-def _commit_chunk(chunks, content_list, story_id, ch_idx, p_idx, w_count):
+def _commit_chunk(chunks, content_list, story_id, ch_idx, p_idx, w_count, char_position=0):
     text = "\n\n".join(content_list)
     chunks.append({
         "chunk_id": f"{story_id}_ch{ch_idx}_p{p_idx}",
@@ -94,5 +109,5 @@ def _commit_chunk(chunks, content_list, story_id, ch_idx, p_idx, w_count):
         "para_idx": int(p_idx),
         "text": text,
         "word_count": w_count,
-        "char_position": 0 # Placeholder
+        "char_position": char_position # Offset of the chunk's first paragraph in the novel
     })
@@ -0,0 +1,184 @@
+"""
+Contradiction detection (validation.contradiction_detection)
+
+Flags a result as CONTRADICTION when its primary hypothesis is negated by
+one of its own alternatives or by the evidence it cites.
+
+Methods:
+    text_overlap_conflict   - an alternative or quote restates the primary
+                              hypothesis (content-word overlap) with the
+                              opposite polarity
+    semantic_negation_check - same test with embedding similarity instead of
+                              word overlap; evidence is represented by the
+                              chunk embeddings already stored in the index,
+                              and only hypothesis texts (plus quotes whose
+                              chunk is unknown) are encoded, in one batch
+                              per call, through an LRU cache
+
+detect_many() checks a whole batch of results with one encode call and one
+vectorised similarity computation.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .lexical import content_words, is_negated, jaccard
+from .schemas import ClassificationResult
+
+
+Encoder = Callable[[List[str]], np.ndarray]
+EmbeddingLookup = Callable[[List[str]], Tuple[np.ndarray, np.ndarray]]
+
+
+class ContradictionDetector:
+    """
+    Args:
+        config: validation.contradiction_detection section
+        encode: Batch text encoder returning L2-normalised vectors
+            (PathwayVectorIndex.encode); without one only lexical checks run
+        lookup: chunk_ids -> (stored embeddings, found mask)
+            (PathwayVectorIndex.lookup_embeddings)
+    """
+
+    def __init__(self, config: Dict[str, Any], encode: Optional[Encoder] = None,
+                 lookup: Optional[EmbeddingLookup] = None):
+        self.enabled = config.get('enabled', False)
+        methods = config.get('methods', [])
+        self.lexical = 'text_overlap_conflict' in methods
+        self.semantic = 'semantic_negation_check' in methods and encode is not None
+        self.overlap_threshold = config.get('overlap_threshold', 0.6)
+        self.semantic_threshold = config.get('semantic_threshold', 0.8)
+        self.evidence_similarity_threshold = config.get('evidence_similarity_threshold', 0.6)
+        self.cache_size = config.get('embedding_cache_size', 10000)
+        self.encode = encode
+        self.lookup = lookup
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # Validation may run on several worker threads
+        self._cache_lock = threading.Lock()
+
+    # ========== EMBEDDINGS ==========
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Vectors for texts; only cache misses are encoded (one batch)."""
+        with self._cache_lock:
+            known = {t: self._cache[t] for t in texts if t in self._cache}
+            for text in known:
+                self._cache.move_to_end(text)
+        misses = list(dict.fromkeys(t for t in texts if t not in known))
+        if misses:
+            encoded = self.encode(misses)
+            with self._cache_lock:
+                for text, vector in zip(misses, encoded):
+                    known[text] = self._cache[text] = np.asarray(vector, dtype=np.float32)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        vectors = [known[text] for text in texts]
+        return np.stack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+    # ========== DETECTION ==========
+
+    def detect(self, result: ClassificationResult) -> Optional[str]:
+        return self.detect_many([result])[0]
+
+    def detect_many(self, results: List[ClassificationResult]) -> List[Optional[str]]:
+        """
+        Returns:
+            One contradiction reason (or None) per result
+        """
+        reasons: List[Optional[str]] = [None] * len(results)
+        if not self.enabled:
+            return reasons
+
+        if self.lexical:
+            for i, result in enumerate(results):
+                reasons[i] = self._lexical_conflict(result)
+        if self.semantic:
+            pending = [i for i, reason in enumerate(reasons) if reason is None]
+            for i, reason in zip(pending, self._semantic_conflicts([results[i] for i in pending])):
+                reasons[i] = reason
+        return reasons
+
+    def _lexical_conflict(self, result: ClassificationResult) -> Optional[str]:
+        primary = result.reasoning_trace.primary_hypothesis
+        primary_words = content_words(primary.hypothesis_text)
+        primary_negated = is_negated(primary.hypothesis_text)
+        if not primary_words:
+            return None
+
+        for alt in result.reasoning_trace.alternatives_considered:
+            if (not alt.is_contradicted and alt.confidence_score >= primary.confidence_score
+                    and is_negated(alt.hypothesis_text) != primary_negated
+                    and jaccard(primary_words, content_words(alt.hypothesis_text)) >= self.overlap_threshold):
+                return f"Alternative '{alt.hypothesis_text[:60]}' negates the primary hypothesis with equal or higher confidence"
+
+        for span in primary.supporting_evidence:
+            quote_words = set(content_words(span.quote_text))
+            shared = len(set(primary_words) & quote_words) / len(set(primary_words))
+            if shared >= self.overlap_threshold and is_negated(span.quote_text) != primary_negated:
+                return f"Quote '{span.quote_text[:60]}' negates the primary hypothesis"
+        return None
+
+    def _semantic_conflicts(self, results: List[ClassificationResult]) -> List[Optional[str]]:
+        if not results:
+            return []
+
+        # Texts to encode: every hypothesis, plus quotes whose chunk embedding is unknown
+        hypothesis_texts: List[str] = []
+        primary_row: List[int] = []
+        span_nodes: List[str] = []
+        span_owner: List[Tuple[int, Any]] = []
+        for i, result in enumerate(results):
+            trace = result.reasoning_trace
+            primary_row.append(len(hypothesis_texts))
+            hypothesis_texts.append(trace.primary_hypothesis.hypothesis_text)
+            hypothesis_texts.extend(alt.hypothesis_text for alt in trace.alternatives_considered)
+            for span in trace.primary_hypothesis.supporting_evidence:
+                span_nodes.append(span.source_node_id)
+                span_owner.append((i, span))
+
+        if self.lookup is not None and span_nodes:
+            span_vectors, found = self.lookup(span_nodes)
+        else:
+            span_vectors, found = None, np.zeros(len(span_nodes), dtype=bool)
+        fallback = [span_owner[j][1].quote_text for j in range(len(span_nodes)) if not found[j]]
+
+        encoded = self._embed(hypothesis_texts + fallback)
+        hypotheses = encoded[:len(hypothesis_texts)]
+        if span_vectors is None:
+            span_vectors = np.zeros((len(span_nodes), hypotheses.shape[1]), dtype=np.float32)
+        if fallback:
+            span_vectors = span_vectors.copy()
+            span_vectors[~found] = encoded[len(hypothesis_texts):]
+
+        # Pairs (result, primary vector, other vector, threshold, reason) compared in one pass
+        owners, left, right, thresholds, labels = [], [], [], [], []
+        for i, result in enumerate(results):
+            primary = result.reasoning_trace.primary_hypothesis
+            negated = is_negated(primary.hypothesis_text)
+            for k, alt in enumerate(result.reasoning_trace.alternatives_considered):
+                if (not alt.is_contradicted and alt.confidence_score >= primary.confidence_score
+                        and is_negated(alt.hypothesis_text) != negated):
+                    owners.append(i)
+                    left.append(hypotheses[primary_row[i]])
+                    right.append(hypotheses[primary_row[i] + 1 + k])
+                    thresholds.append(self.semantic_threshold)
+                    labels.append(f"Alternative '{alt.hypothesis_text[:60]}'")
+        for j, (i, span) in enumerate(span_owner):
+            primary = results[i].reasoning_trace.primary_hypothesis
+            if is_negated(span.quote_text) != is_negated(primary.hypothesis_text):
+                owners.append(i)
+                left.append(hypotheses[primary_row[i]])
+                right.append(span_vectors[j])
+                thresholds.append(self.evidence_similarity_threshold)
+                labels.append(f"Quote '{span.quote_text[:60]}'")
+
+        reasons: List[Optional[str]] = [None] * len(results)
+        if not owners:
+            return reasons
+        similarity = np.einsum("ij,ij->i", np.stack(left), np.stack(right))
+        for owner, sim, threshold, label in zip(owners, similarity, thresholds, labels):
+            if reasons[owner] is None and sim >= threshold:
+                reasons[owner] = f"{label} semantically negates the primary hypothesis (similarity {sim:.2f})"
+        return reasons
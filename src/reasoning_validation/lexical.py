@@ -0,0 +1,39 @@
+"""
+Lexical helpers shared by pre-LLM screening and contradiction detection
+"""
+import re
+from typing import List
+
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+STOPWORDS = frozenset("""
+a about after again against all also am an and any are as at be because been before being between both
+but by can could did do does doing down during each few for from further had has have having he her here
+hers herself him himself his how i if in into is it its itself just me more most my myself now of off on
+once only or other our ours ourselves out over own same she should so some such than that the their theirs
+them themselves then there these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+NEGATIONS = frozenset("not no never nor none nobody nothing neither without cannot n't".split())
+
+
+def content_words(text: str) -> List[str]:
+    """Lower-cased words of text minus stopwords and negation cues."""
+    return [
+        w for w in _WORD.findall(text.lower().replace("n't", " n't"))
+        if w not in STOPWORDS and w not in NEGATIONS and len(w) > 1
+    ]
+
+
+def is_negated(text: str) -> bool:
+    """True if text contains a negation cue."""
+    words = _WORD.findall(text.lower().replace("n't", " n't"))
+    return any(w in NEGATIONS for w in words)
+
+
+def jaccard(a: List[str], b: List[str]) -> float:
+    """Jaccard overlap of two word lists."""
+    a, b = set(a), set(b)
+    return len(a & b) / len(a | b) if a or b else 0.0
@@ -9,6 +9,7 @@ class EvidenceSpan(BaseModel):
     chapter_id: str = Field(..., description="ID of the chapter containing the quote.")
     paragraph_index: Optional[int] = Field(None, description="Index of the paragraph within the chapter.")
     source_node_id: str = Field(..., description="Pathway node ID for verification.")
+    corpus_chunk_ids: Optional[List[str]] = Field(None, description="Chunks where the quote was found in the full novel when it was not in the retrieved context.")
 
 class AlternativeHypothesis(BaseModel):
     """
@@ -33,6 +34,17 @@ class ReasoningTrace(BaseModel):
             raise ValueError("Reasoning must have at least 2 logical steps.")
         return v
 
+class TokenUsage(BaseModel):
+    """
+    Token accounting for one reasoning call.
+    """
+    prompt_tokens: int = Field(..., ge=0)
+    completion_tokens: int = Field(..., ge=0)
+    trimmed_chunks: int = Field(0, description="Evidence chunks summarised to fit the input budget.")
+    dropped_chunks: int = Field(0, description="Evidence chunks left out to fit the input budget.")
+    cached: bool = Field(False, description="True if the completion came from the response cache.")
+    aborted: bool = Field(False, description="True if a streamed completion was cancelled early.")
+
 class ClassificationResult(BaseModel):
     """
     Final output schema for the classification task.
@@ -42,6 +54,8 @@ class ClassificationResult(BaseModel):
     confidence: float = Field(..., ge=0.0, le=1.0)
     reasoning_trace: ReasoningTrace
     rejection_reason: Optional[str] = Field(None, description="Reason for rejection if status is not SUCCESS.")
+    token_usage: Optional[TokenUsage] = Field(None, description="Prompt/completion tokens spent on this result.")
+    screened_by: Optional[str] = Field(None, description="Screening stage that answered without calling the LLM.")
 
     class Config:
         extra = "forbid"
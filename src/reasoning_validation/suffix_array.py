@@ -0,0 +1,265 @@
+"""
+Corpus-wide quote lookup
+
+A per-story suffix array over the whitespace-normalised novel text answers
+"does this exact quote occur anywhere in the novel, and where" with a binary
+search whose comparisons touch at most len(quote) characters
+(O(len(quote) * log n)). Validator uses it as a secondary check, so a real
+passage that merely wasn't retrieved is told apart from a fabrication, and
+matches are mapped back to chunk_ids through the chunks' char_position.
+
+Built at ingestion (NovelAnalyzerApp.build_pipeline) and persisted next to
+the index snapshot as one directory of .npy files per story, which serving
+workers memory-map instead of loading.
+"""
+import hashlib
+import json
+import os
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# One-to-one folds, so normalised offsets still map back to the original text
+_FOLD_CODES = {
+    0x2018: 0x27, 0x2019: 0x27, 0x201A: 0x27, 0x201B: 0x27, 0x2032: 0x27,
+    0x201C: 0x22, 0x201D: 0x22, 0x201E: 0x22, 0x201F: 0x22, 0x2033: 0x22,
+    0x2013: 0x2D, 0x2014: 0x2D, 0x2015: 0x2D, 0x2212: 0x2D,
+}
+_WHITESPACE_CODES = np.array(
+    [0x09, 0x0A, 0x0B, 0x0C, 0x0D, 0x20, 0x85, 0xA0, 0x1680, 0x2028, 0x2029, 0x202F, 0x205F, 0x3000]
+    + list(range(0x2000, 0x200B)),
+    dtype=np.uint32
+)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def normalize_with_offsets(text: str) -> Tuple[str, np.ndarray]:
+    """
+    Collapse whitespace runs to one space and fold typographic quotes/dashes.
+
+    Returns:
+        (normalised text, original char offset of every normalised char)
+    """
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    if len(codes) == 0:
+        return "", np.zeros(0, dtype=np.int32)
+    folded = codes.copy()
+    for src, dst in _FOLD_CODES.items():
+        folded[codes == src] = dst
+
+    ws = np.isin(codes, _WHITESPACE_CODES)
+    prev_ws = np.empty_like(ws)
+    prev_ws[0] = True  # drops leading whitespace
+    prev_ws[1:] = ws[:-1]
+    keep = ~ws | ~prev_ws
+
+    out = np.where(ws, np.uint32(0x20), folded)[keep]
+    offsets = np.nonzero(keep)[0].astype(np.int32)
+    return out.astype("<u4").tobytes().decode("utf-32-le"), offsets
+
+
+def normalize_quote(quote: str) -> str:
+    return normalize_with_offsets(quote)[0].rstrip(" ")
+
+
+def build_suffix_array(text: str) -> np.ndarray:
+    """
+    Suffix array by prefix doubling (numpy sorts, O(n log^2 n)).
+
+    Returns:
+        int32 array of suffix start positions in lexicographic order
+    """
+    n = len(text)
+    if n == 0:
+        return np.zeros(0, dtype=np.int32)
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    _, rank = np.unique(codes, return_inverse=True)
+    rank = rank.astype(np.int64)
+
+    k = 1
+    while True:
+        # Sort by (rank of first k chars, rank of next k chars); -1 = past the end
+        second = np.full(n, -1, dtype=np.int64)
+        second[:n - k] = rank[k:]
+        key = rank * (n + 1) + (second + 1)
+        sa = np.argsort(key, kind="stable")
+        sorted_key = key[sa]
+        new_rank = np.empty(n, dtype=np.int64)
+        new_rank[sa] = np.concatenate(([0], np.cumsum(sorted_key[1:] != sorted_key[:-1])))
+        rank = new_rank
+        if rank[sa[-1]] == n - 1 or k >= n:
+            return sa.astype(np.int32)
+        k *= 2
+
+
+class StorySuffixIndex:
+    """
+    Exact quote lookup over one novel
+
+    Args:
+        story_id: Story the text belongs to
+        text: Normalised story text (see normalize_with_offsets)
+        suffix_array: build_suffix_array(text)
+        offsets: Original char offset of each normalised char
+        chunk_starts: Sorted char_position of the story's chunks
+        chunk_ids: chunk_id for each entry of chunk_starts
+        source_hash: text_hash of the original text (staleness check)
+    """
+
+    def __init__(self, story_id: str, text: str, suffix_array: np.ndarray, offsets: np.ndarray,
+                 chunk_starts: Sequence[int] = (), chunk_ids: Sequence[str] = (), source_hash: str = ""):
+        self.story_id = story_id
+        self.text = text
+        self.suffix_array = suffix_array
+        self.offsets = offsets
+        self.chunk_starts = [int(p) for p in chunk_starts]
+        self.chunk_ids = [str(c) for c in chunk_ids]
+        self.source_hash = source_hash
+
+    @classmethod
+    def build(cls, story_id: str, text: str, chunks: Sequence[Dict] = ()) -> "StorySuffixIndex":
+        """
+        Args:
+            story_id: Story id
+            text: Raw story text as ingested
+            chunks: The story's chunks ('chunk_id', 'char_position')
+        """
+        normalized, offsets = normalize_with_offsets(text)
+        ordered = sorted(chunks, key=lambda c: c['char_position'])
+        return cls(
+            story_id,
+            normalized,
+            build_suffix_array(normalized),
+            offsets,
+            [c['char_position'] for c in ordered],
+            [c['chunk_id'] for c in ordered],
+            text_hash(text)
+        )
+
+    # ========== LOOKUP ==========
+
+    def _bound(self, quote: str, upper: bool) -> int:
+        text, sa, m = self.text, self.suffix_array, len(quote)
+        lo, hi = 0, len(sa)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = int(sa[mid])
+            prefix = text[start:start + m]
+            if prefix < quote or (upper and prefix == quote):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, quote: str, limit: Optional[int] = 32) -> List[int]:
+        """
+        Returns:
+            Sorted original-text char offsets where quote occurs (at most `limit`)
+        """
+        quote = normalize_quote(quote)
+        if not quote:
+            return []
+        lo = self._bound(quote, upper=False)
+        hi = self._bound(quote, upper=True)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return sorted(int(self.offsets[p]) for p in self.suffix_array[lo:hi])
+
+    def contains(self, quote: str) -> bool:
+        return bool(self.find(quote, limit=1))
+
+    def chunk_id_at(self, offset: int) -> Optional[str]:
+        """chunk_id of the chunk starting at or before an original-text offset."""
+        i = bisect_right(self.chunk_starts, offset) - 1
+        return self.chunk_ids[i] if i >= 0 else None
+
+    def locate(self, quote: str, limit: Optional[int] = 32) -> List[Tuple[int, Optional[str]]]:
+        """
+        Returns:
+            (char offset, chunk_id) for each occurrence of quote
+        """
+        return [(offset, self.chunk_id_at(offset)) for offset in self.find(quote, limit)]
+
+    # ========== PERSISTENCE ==========
+
+    def save(self, path: str):
+        """
+        One directory per story: the arrays as .npy files (so load() can
+        memory-map them) plus the text and chunk boundaries.
+        """
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "suffix_array.npy"), self.suffix_array)
+        np.save(os.path.join(path, "offsets.npy"), self.offsets)
+        with open(os.path.join(path, "text.txt"), "w", encoding="utf-8", newline="") as f:
+            f.write(self.text)
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "story_id": self.story_id,
+                "chunk_starts": self.chunk_starts,
+                "chunk_ids": self.chunk_ids,
+                "source_hash": self.source_hash
+            }, f)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = None) -> "StorySuffixIndex":
+        """
+        Args:
+            path: Directory written by save()
+            mmap_mode: e.g. "r" to map the arrays instead of reading them,
+                so several worker processes share one copy in the page cache
+        """
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(path, "text.txt"), encoding="utf-8", newline="") as f:
+            text = f.read()
+        return cls(
+            meta["story_id"],
+            text,
+            np.load(os.path.join(path, "suffix_array.npy"), mmap_mode=mmap_mode),
+            np.load(os.path.join(path, "offsets.npy"), mmap_mode=mmap_mode),
+            meta["chunk_starts"],
+            meta["chunk_ids"],
+            meta["source_hash"]
+        )
+
+
+def _file_name(story_id: str) -> str:
+    return hashlib.sha1(story_id.encode("utf-8")).hexdigest()[:16]
+
+
+def load_or_build(story_id: str, text: str, chunks: Sequence[Dict], snapshot_dir: Optional[str]) -> StorySuffixIndex:
+    """
+    Reuse a persisted index when the story text is unchanged, else build and persist it.
+    """
+    path = os.path.join(snapshot_dir, _file_name(story_id)) if snapshot_dir else None
+    if path and os.path.exists(os.path.join(path, "meta.json")):
+        index = StorySuffixIndex.load(path)
+        if index.source_hash == text_hash(text):
+            return index
+    index = StorySuffixIndex.build(story_id, text, chunks)
+    if path:
+        index.save(path)
+    return index
+
+
+def save_all(indexes: Dict[str, StorySuffixIndex], snapshot_dir: str):
+    for story_id, index in indexes.items():
+        index.save(os.path.join(snapshot_dir, _file_name(story_id)))
+
+
+def load_all(snapshot_dir: str, mmap_mode: Optional[str] = None) -> Dict[str, StorySuffixIndex]:
+    """Every story index under snapshot_dir, by story_id."""
+    indexes = {}
+    if not os.path.isdir(snapshot_dir):
+        return indexes
+    for name in sorted(os.listdir(snapshot_dir)):
+        path = os.path.join(snapshot_dir, name)
+        if os.path.exists(os.path.join(path, "meta.json")):
+            index = StorySuffixIndex.load(path, mmap_mode=mmap_mode)
+            indexes[index.story_id] = index
+    return indexes
@@ -1,54 +1,132 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from .schemas import ClassificationResult, EvidenceSpan
+from .quote_index import QuoteIndex
+from .suffix_array import StorySuffixIndex
+from .contradiction import ContradictionDetector
+from src.utils import tracing
+from src.utils.metrics import METRICS
 import yaml # Assuming PyYAML is installed
 
 class Validator:
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], corpus: Optional[Dict[str, StorySuffixIndex]] = None,
+                 contradiction_detector: Optional[ContradictionDetector] = None):
         self.config = config
         self.min_confidence = config['validation'].get('reject_if_confidence_below', 0.4)
         self.min_evidence_count = config['validation'].get('min_evidence', 3)
-        self.require_quote_integrity = config['validation']['quote_integrity'].get('must_match_source_substring', True)
+        quote_integrity = config['validation']['quote_integrity']
+        self.require_quote_integrity = quote_integrity.get('must_match_source_substring', True)
+        self.normalize_quotes = quote_integrity.get('normalize', False)
+        self.max_edit_ratio = quote_integrity.get('max_edit_ratio', 0.05) if quote_integrity.get('allow_fuzzy_match', False) else 0.0
+        # Secondary check against the whole novel (per-story suffix arrays, filled at ingestion)
+        corpus_lookup = config['validation'].get('corpus_lookup') or {}
+        self.corpus_lookup = corpus_lookup.get('enabled', False)
+        self.accept_out_of_context = corpus_lookup.get('accept_out_of_context', False)
+        self.corpus = corpus if corpus is not None else {}
+        # Lexical checks only, unless the app passes a detector wired to the vector index
+        self.contradictions = contradiction_detector or ContradictionDetector(
+            config['validation'].get('contradiction_detection') or {}
+        )
 
     def validate_classification(self, result: ClassificationResult, retrieved_context: List[Dict[str, str]]) -> ClassificationResult:
         """
         Validates the classification result against system rules.
-        Modifies the result status to REJECTION if checks fail.
+        Modifies the result status to REJECTION if checks fail, or to
+        CONTRADICTION if the primary hypothesis is negated by its own
+        alternatives or evidence.
         """
+        return self.validate_many([result], [retrieved_context])[0]
+
+    def validate_many(self, results: List[ClassificationResult], contexts: List[List[Dict[str, str]]]) -> List[ClassificationResult]:
+        """
+        validate_classification over a batch; contradiction detection for
+        the results that pass the rules runs as one batched call.
+        """
+        with METRICS.timer("validation"), tracing.span("validate", results=len(results)) as trace_span:
+            passed = []
+            for result, ctx in zip(results, contexts):
+                # Already rejected upstream (LLM error, early abort): not counted as a rule rejection
+                was_success = result.status == "SUCCESS"
+                rule = self._apply_rules(result, ctx)
+                if rule is None and result.status == "SUCCESS":
+                    passed.append(result)
+                elif rule is not None and was_success:
+                    METRICS.inc("rejections_total", reason=rule)
+            for result, reason in zip(passed, self.contradictions.detect_many(passed)):
+                if reason:
+                    result.status = "CONTRADICTION"
+                    result.rejection_reason = reason
+                    METRICS.inc("rejections_total", reason="contradiction")
+            trace_span.set(status=[result.status for result in results])
+        return results
+
+    def _apply_rules(self, result: ClassificationResult, retrieved_context: List[Dict[str, str]]) -> Optional[str]:
+        """Applies the rejection rules; returns the rule that rejected the result, or None."""
         # 1. Check Confidence
-        if result.confidence < self.min_confidence:
+        reason = self.check_confidence(result.confidence)
+        if reason:
             result.status = "REJECTION"
-            result.rejection_reason = f"Confidence {result.confidence} below threshold {self.min_confidence}"
-            return result
+            result.rejection_reason = reason
+            return "confidence"
 
         # 2. Check Evidence Count
         primary_evidence = result.reasoning_trace.primary_hypothesis.supporting_evidence
-        if len(primary_evidence) < self.min_evidence_count:
+        reason = self.check_evidence_count(len(primary_evidence))
+        if reason:
             result.status = "REJECTION"
-            result.rejection_reason = f"Insufficient evidence: {len(primary_evidence)} spans provided, required {self.min_evidence_count}"
-            return result
+            result.rejection_reason = reason
+            return "evidence_count"
 
-        # 3. Check Quote Integrity
+        # 3. Check Quote Integrity (all spans in one indexed pass)
         if self.require_quote_integrity:
-            for span in primary_evidence:
-                if not self._verify_quote_in_context(span, retrieved_context):
+            quotes = self.quote_index(retrieved_context)
+            verified = quotes.verify_many(primary_evidence)
+            for span, ok in zip(primary_evidence, verified):
+                reason = None if ok else self._check_outside_context(span, quotes.story_id)
+                if reason:
                     result.status = "REJECTION"
-                    result.rejection_reason = f"Quote fabrication detected: '{span.quote_text[:30]}...'"
-                    return result
-        
-        return result
+                    result.rejection_reason = reason
+                    return "quote_integrity"
+        return None
+
+    # Individual rules, also applied to partial output by llm_streaming.StreamMonitor.
+    # Each returns the rejection reason, or None if the rule passes.
+
+    def check_confidence(self, confidence: float) -> Optional[str]:
+        if confidence < self.min_confidence:
+            return f"Confidence {confidence} below threshold {self.min_confidence}"
+        return None
 
-    def _verify_quote_in_context(self, span: EvidenceSpan, context_nodes: List[Dict[str, str]]) -> bool:
+    def check_evidence_count(self, count: int) -> Optional[str]:
+        if count < self.min_evidence_count:
+            return f"Insufficient evidence: {count} spans provided, required {self.min_evidence_count}"
+        return None
+
+    def check_quote(self, span: EvidenceSpan, quotes: QuoteIndex) -> Optional[str]:
+        if self.require_quote_integrity and not quotes.verify(span):
+            return self._check_outside_context(span, quotes.story_id)
+        return None
+
+    def _check_outside_context(self, span: EvidenceSpan, story_id: Optional[str]) -> Optional[str]:
         """
-        Verifies that the span.quote_text exists verbatim in the corresponding chapter/node.
+        A quote missing from the retrieved context is only a fabrication if it
+        is nowhere in the novel either. Real passages are tagged with the
+        chunks they come from (and accepted if accept_out_of_context).
         """
-        # In a real implementation, we strictly check node_id matching.
-        # Here we check if the text exists in the specific referenced node.
-        target_node = next((n for n in context_nodes if n.get('id') == span.source_node_id), None)
-        
-        if not target_node:
-            # If node not found in retrieved context, it's a hallucination or reference error
-            return False
-            
-        source_text = target_node.get('text', "")
-        # Strict substring match
-        return span.quote_text in source_text
+        index = self.corpus.get(story_id) if self.corpus_lookup and story_id else None
+        matches = index.locate(span.quote_text) if index is not None else []
+        if not matches:
+            return self._fabrication_reason(span)
+
+        chunk_ids = sorted(set(chunk_id for _, chunk_id in matches if chunk_id))
+        if self.accept_out_of_context:
+            span.corpus_chunk_ids = chunk_ids
+            return None
+        return f"Quote not in retrieved context (found in the novel at {', '.join(chunk_ids[:3]) or 'an unchunked offset'})"
+
+    def quote_index(self, retrieved_context: List[Dict[str, str]]) -> QuoteIndex:
+        """chunk_id -> text map for one result, matching in the configured mode."""
+        return QuoteIndex(retrieved_context, normalize=self.normalize_quotes, max_edit_ratio=self.max_edit_ratio)
+
+    @staticmethod
+    def _fabrication_reason(span: EvidenceSpan) -> str:
+        return f"Quote fabrication detected: '{span.quote_text[:30]}...'"
@@ -13,6 +13,7 @@ def load_env(env_path=".env"):
              return
     
     print(f"🔧 Loading environment from {env_path}...")
+    loaded = 0
     try:
         with open(env_path, "r") as f:
             for line in f:
@@ -27,7 +28,8 @@ def load_env(env_path=".env"):
                         value = value[1:-1]
                     
                     os.environ[key.strip()] = value
-                    # Mask value in log
-                    print(f"  - Set {key.strip()}")
+                    loaded += 1
+        # Values (and key names) stay out of the log
+        print(f"  ✅ Set {loaded} variables")
     except Exception as e:
         print(f"❌ Error loading .env: {e}")
@@ -4,6 +4,7 @@ Blezecon's responsibility
 """
 import hashlib
 import json
+import os
 import pickle
 from pathlib import Path
 from typing import Any, Dict
@@ -24,6 +25,31 @@ def safe_write_json(data: Dict, filepath: str):
         json.dump(data, f, indent=2, ensure_ascii=False)
 
 
+def atomic_write_text(text: str, filepath: str):
+    """
+    Write a text file so readers see either the old or the complete new
+    content: written to a temp file in the same directory, fsynced, then
+    renamed over the target.
+    
+    Args:
+        text: File content
+        filepath: Output path
+    """
+    filepath = Path(filepath)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = filepath.with_name(f".{filepath.name}.{os.getpid()}.tmp")
+    
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
 def safe_write_pickle(data: Any, filepath: str):
     """
     Safely write pickle file
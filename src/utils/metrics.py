@@ -0,0 +1,180 @@
+"""
+In-process metrics
+Blezecon's responsibility
+
+Counters and latency histograms shared by the pipeline, the service and
+the batch scripts. Histograms use fixed log-spaced buckets (about 12%
+apart), so recording is O(1), memory is constant and p50/p95/p99 are
+read back to within one bucket.
+
+Usage:
+    from src.utils.metrics import METRICS
+
+    with METRICS.timer("retrieval"):
+        ...
+    METRICS.inc("llm_tokens_total", 812, kind="prompt")
+
+Exposed as Prometheus text (service.py /metrics) and as a JSON summary
+(METRICS.summary(), printed at the end of batch scripts).
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+
+# Bucket upper bounds in seconds: 0.1 ms .. ~10 min, ratio 1.122 (2 per 6 dB)
+BUCKETS: List[float] = [1e-4 * 10 ** (i / 20) for i in range(137)]
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (seconds)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot: above the largest bucket
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (capped at the max seen)."""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+
+class MetricsRegistry:
+    """Thread-safe named counters and histograms with labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str, name: str = "stage_seconds"):
+        """Time a block into the `name` histogram, labelled by stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, stage=stage)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    # ========== EXPORT ==========
+
+    def prometheus_text(self, prefix: str = "novel_analyzer_") -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE {prefix}{name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{prefix}{name}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                for labels, hist in sorted(series.items()):
+                    cumulative = 0
+                    # Only buckets that changed, plus +Inf, keep the output short
+                    for bound, n in zip(BUCKETS, hist.counts):
+                        cumulative += n
+                        if n:
+                            lines.append(f"{prefix}{name}_bucket{_format_labels(labels, ('le', f'{bound:.6g}'))} {cumulative}")
+                    lines.append(f"{prefix}{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {hist.count}")
+                    lines.append(f"{prefix}{name}_sum{_format_labels(labels)} {hist.sum:.6f}")
+                    lines.append(f"{prefix}{name}_count{_format_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Dict]:
+        """
+        Returns:
+            {"latency_ms": {name: {labels: {count, mean, p50, p95, p99, max}}},
+             "counters": {name: {labels: value}}}
+        """
+        def label_key(labels: Labels) -> str:
+            return ",".join(f"{k}={v}" for k, v in labels) or "all"
+
+        with self._lock:
+            latency = {
+                name: {
+                    label_key(labels): {
+                        "count": hist.count,
+                        "mean": round(1000 * hist.sum / hist.count, 2) if hist.count else 0.0,
+                        "p50": round(1000 * hist.quantile(0.50), 2),
+                        "p95": round(1000 * hist.quantile(0.95), 2),
+                        "p99": round(1000 * hist.quantile(0.99), 2),
+                        "max": round(1000 * hist.max, 2),
+                    }
+                    for labels, hist in sorted(series.items())
+                }
+                for name, series in sorted(self.histograms.items())
+            }
+            counters = {
+                name: {label_key(labels): value for labels, value in sorted(series.items())}
+                for name, series in sorted(self.counters.items())
+            }
+        return {"latency_ms": latency, "counters": counters}
+
+    def print_report(self):
+        """Per-stage latency table plus counters (end of batch scripts)."""
+        summary = self.summary()
+        stages = summary["latency_ms"].get("stage_seconds", {})
+        if stages:
+            print("⏱️  Stage latency (ms)")
+            print(f"    {'stage':<18}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+            for labels, stats in stages.items():
+                stage = labels.split("=", 1)[-1]
+                print(f"    {stage:<18}{stats['count']:>8}{stats['p50']:>10.1f}{stats['p95']:>10.1f}"
+                      f"{stats['p99']:>10.1f}{stats['max']:>10.1f}")
+        for name, series in summary["counters"].items():
+            print(f"📊 {name}: " + ", ".join(f"{labels}={value:g}" for labels, value in series.items()))
+
+
+# Process-wide registry
+METRICS = MetricsRegistry()
@@ -0,0 +1,200 @@
+"""
+Request tracing
+Blezecon's responsibility
+
+Each query gets a trace id and nested spans (query -> retrieve -> rerank
+-> screen -> prompt_build -> llm -> validate) carrying attributes such as
+chunk and token counts. Spans of a trace are buffered on its root span and
+appended to a JSONL file when the root ends, one span per line:
+
+    {"trace_id", "span_id", "parent_id", "name", "start", "duration_ms",
+     "attrs", "error"}
+
+When tracing is off (the default) span() returns one shared no-op object,
+so instrumented code pays for a function call and nothing else.
+
+Config keys (logging.tracing):
+    enabled, path, slow_ms (only export traces whose root took at least this long)
+
+Usage:
+    from src.utils import tracing
+
+    with tracing.span("retrieve", story_id=story_id) as span:
+        chunks = ...
+        span.set(chunks=len(chunks))
+
+Work handed to a thread pool keeps its parent span via bind(fn).
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation inside a trace."""
+
+    __slots__ = ("tracer", "name", "attrs", "trace_id", "span_id", "parent_id",
+                 "root", "start", "duration_ms", "error", "_started", "_token", "_finished")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.span_id = uuid.uuid4().hex[:16]
+        self.error: Optional[str] = None
+        self.duration_ms = 0.0
+
+    def set(self, **attrs) -> "Span":
+        self.attrs.update(attrs)
+        return self
+
+    def __enter__(self) -> "Span":
+        parent = _current.get()
+        # A parent whose trace was already exported (e.g. work outliving its
+        # request) starts a new trace instead of losing its spans
+        if parent is None or parent.root._finished is None:
+            self.trace_id = uuid.uuid4().hex
+            self.parent_id = None
+            self.root = self
+            self._finished: List[dict] = []
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self.root = parent.root
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            # Exited in another context than it was entered in (e.g. a generator)
+            pass
+        finished = self.root._finished
+        if finished is None:
+            return False
+        finished.append(self.to_dict())
+        if self.root is self:
+            self._finished = None
+            self.tracer.export(finished, self.duration_ms)
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration_ms, 3),
+            "attrs": self.attrs,
+            "error": self.error
+        }
+
+
+class _NoopSpan:
+    """Returned by span() while tracing is disabled."""
+
+    trace_id = None
+
+    def set(self, **attrs) -> "_NoopSpan":
+        return self
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Creates spans and appends finished traces to a JSONL file.
+
+    Args:
+        enabled: False makes every span a no-op
+        path: JSONL output file
+        slow_ms: Only export traces whose root span took at least this long
+    """
+
+    def __init__(self, enabled: bool = False, path: str = "./logs/traces.jsonl", slow_ms: float = 0.0):
+        self.enabled = enabled
+        self.path = path
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._file = None
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "Tracer":
+        config = config or {}
+        return cls(
+            enabled=config.get('enabled', False),
+            path=config.get('path', "./logs/traces.jsonl"),
+            slow_ms=config.get('slow_ms', 0.0)
+        )
+
+    def span(self, name: str, **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def export(self, spans: List[dict], duration_ms: float):
+        """Append one finished trace (its root span last)."""
+        if duration_ms < self.slow_ms:
+            return
+        lines = "".join(json.dumps(record, default=str) + "\n" for record in spans)
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(lines)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+# Process-wide tracer (disabled until configure() is called with tracing enabled)
+TRACER = Tracer()
+
+
+def configure(logging_config: Optional[Dict[str, Any]]) -> Tracer:
+    """Replace the process-wide tracer from the config's logging section."""
+    global TRACER
+    TRACER.close()
+    TRACER = Tracer.from_config((logging_config or {}).get('tracing'))
+    return TRACER
+
+
+def span(name: str, **attrs):
+    """Span on the process-wide tracer (a no-op unless tracing is enabled)."""
+    return TRACER.span(name, **attrs)
+
+
+def current_trace_id() -> Optional[str]:
+    current = _current.get()
+    return current.trace_id if current is not None else None
+
+
+def bind(fn: Callable) -> Callable:
+    """fn wrapped to run in the caller's context (keeps the current span across run_in_executor)."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
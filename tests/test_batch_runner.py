@@ -0,0 +1,119 @@
+"""
+Tests for the resumable batch prediction runner
+"""
+import asyncio
+import threading
+
+import pandas as pd
+import pytest
+
+from src.pathway_pipeline.batch_runner import Checkpoint, run_batch
+from src.pathway_pipeline.reasoner import rejection_result
+from src.pathway_pipeline.screening import screened_result
+
+
+class Crash(BaseException):
+    """Stands in for the process dying mid-run."""
+
+
+class FakeApp:
+    config = {"reasoning": {}}
+
+    def __init__(self, crash_on=None, error_on=()):
+        self.crash_on = crash_on
+        self.error_on = set(error_on)
+        self.queried = []
+        self.prefetched = []
+        self.crashed = False
+
+    def story_footprint(self, story_id):
+        return 1 << 20
+
+    def prefetch(self, story_id, characters=()):
+        self.prefetched.append((story_id, list(characters)))
+
+    async def aquery_stream(self, queries, block_size=64, max_in_flight=64):
+        position = 0
+        async for story_id, backstory, character in queries:
+            claim = backstory.split(": ", 1)[1]
+            if claim == self.crash_on:
+                self.crashed = True
+                raise Crash()
+            if self.crashed:
+                # Nothing else finishes once the process is gone
+                await asyncio.Event().wait()
+            self.queried.append(claim)
+            await asyncio.sleep(0)
+            if claim in self.error_on:
+                # Failed LLM call: REJECTION without token usage
+                yield position, rejection_result("boom")
+            else:
+                yield position, screened_result(
+                    "SUCCESS" if claim.startswith("true") else "REJECTION", "test", claim, 0.9
+                )
+            position += 1
+
+
+DF = pd.DataFrame({
+    "id": [10, 11, 12, 13],
+    "book_name": ["monte"] * 4,
+    "char": ["Dantes"] * 4,
+    "content": ["true a", "false b", "true c", "true d"],
+})
+
+
+def test_run_resumes_from_checkpoint_and_retries_failures(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+
+    with pytest.raises(Crash):
+        asyncio.run(run_batch(FakeApp(crash_on="true c"), DF, checkpoint, concurrency=1))
+    assert set(checkpoint.load()) == {"10", "11"}
+
+    flaky = FakeApp(error_on={"true d"})
+    results = asyncio.run(run_batch(flaky, DF, checkpoint, concurrency=1))
+    assert flaky.queried == ["true c", "true d"]
+    assert results == [{"id": 10, "prediction": 1}, {"id": 11, "prediction": 0},
+                       {"id": 12, "prediction": 1}, {"id": 13, "prediction": 0}]
+    # The failed row was not checkpointed, so the next run retries only it
+    retry = FakeApp()
+    results = asyncio.run(run_batch(retry, DF, checkpoint, concurrency=1))
+    assert retry.queried == ["true d"] and results[3] == {"id": 13, "prediction": 1}
+
+    # An edited row is not skipped
+    edited = DF.assign(content=["true a", "true b (edited)", "true c", "true d"])
+    rerun = FakeApp()
+    asyncio.run(run_batch(rerun, edited, checkpoint, concurrency=1))
+    assert rerun.queried == ["true b (edited)"]
+
+
+def test_rows_run_grouped_by_story_and_prefetched_once():
+    df = pd.DataFrame({
+        "id": [1, 2, 3, 4, 5],
+        "book_name": ["monte", "castaways", "monte", "castaways", "monte"],
+        "char": ["Dantes", "Grant", "Mercedes", "Grant", "Dantes"],
+        "content": ["true a", "true b", "false c", "true d", "true e"],
+    })
+    app = FakeApp()
+    results = asyncio.run(run_batch(app, df, concurrency=1, memory_budget_mb=1))
+
+    # A 1 MB budget admits one story at a time: each story's rows run back to back
+    assert app.prefetched == [("monte", ["Dantes", "Mercedes"]), ("castaways", ["Grant"])]
+    assert app.queried == ["true a", "true e", "false c", "true b", "true d"]
+    assert [result["id"] for result in results] == [1, 2, 3, 4, 5]
+    assert [result["prediction"] for result in results] == [1, 1, 0, 1, 1]
+
+
+def test_checkpoint_appends_run_off_the_event_loop(tmp_path, monkeypatch):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    threads = []
+    append = checkpoint.append
+
+    def tracking_append(records):
+        threads.append(threading.current_thread())
+        append(records)
+
+    monkeypatch.setattr(checkpoint, "append", tracking_append)
+    asyncio.run(run_batch(FakeApp(), DF, checkpoint, concurrency=2))
+
+    assert len(threads) == 4 and threading.main_thread() not in threads
+    assert set(checkpoint.load()) == {"10", "11", "12", "13"}
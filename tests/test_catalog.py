@@ -0,0 +1,66 @@
+"""
+Tests for the story catalog behind /stories
+"""
+import asyncio
+
+from src.pathway_pipeline.catalog import StoryCatalog
+
+
+CHUNKS = [
+    {"chunk_id": "monte_0", "story_id": "monte", "chapter": "ch_1", "char_position": 0,
+     "text": "The young sailor Dantès returned. Mercedes waited for Dantès at the harbour."},
+    {"chunk_id": "monte_1", "story_id": "monte", "chapter": "ch_2", "char_position": 80,
+     "text": "Villefort read the letter. The Abbé spoke to Dantès of the treasure."},
+    {"chunk_id": "castaways_0", "story_id": "castaways", "chapter": "ch_1", "char_position": 0,
+     "text": "Lord Glenarvan sailed. Mary Grant and Robert Grant hoped to find their father Grant."},
+]
+
+
+def test_catalog_counts_chapters_and_characters(tmp_path):
+    catalog = StoryCatalog.build(CHUNKS, "v1", character_limit=3)
+    monte = catalog.get("monte")
+
+    assert monte["chunk_count"] == 2 and monte["chapter_count"] == 2
+    assert monte["word_count"] == sum(len(chunk["text"].split()) for chunk in CHUNKS[:2])
+    assert [chapter["char_position"] for chapter in monte["chapters"]] == [0, 80]
+    assert monte["top_characters"][0] == {"name": "Dantès", "mentions": 3}
+    # Sentence-initial "The" is not a name
+    assert all(character["name"] != "The" for character in monte["top_characters"])
+
+    total, stories = catalog.page(character="grant")
+    assert total == 1 and stories[0]["story_id"] == "castaways"
+    assert catalog.page(offset=1, limit=1) == (2, [catalog.page()[1][1]])
+
+    catalog.save(str(tmp_path / "catalog.json"))
+    assert StoryCatalog.load(str(tmp_path / "catalog.json")).entries == catalog.entries
+
+
+class CatalogApp:
+    config = {}
+    catalog = StoryCatalog.build(CHUNKS, "v1")
+
+
+def test_story_endpoints_serve_the_catalog():
+    import httpx
+    from src.pathway_pipeline import service
+
+    service.pathway_app = CatalogApp()
+
+    async def run():
+        transport = httpx.ASGITransport(app=service.api)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            listing = await client.get("/stories", params={"limit": 1})
+            metadata = await client.get("/story/monte/metadata")
+            missing = await client.get("/story/unknown/metadata")
+            return listing, metadata, missing
+
+    try:
+        listing, metadata, missing = asyncio.run(run())
+    finally:
+        service.pathway_app = None
+
+    body = listing.json()
+    assert body["total"] == 2 and body["index_version"] == "v1"
+    assert [story["story_id"] for story in body["stories"]] == ["castaways"]
+    assert metadata.json()["chapter_count"] == 2
+    assert missing.status_code == 404
@@ -0,0 +1,37 @@
+"""
+Tests for the columnar chunk store
+"""
+import numpy as np
+
+from src.pathway_pipeline.chunk_store import ChunkStore
+
+
+CHUNKS = [
+    {"chunk_id": "monte_ch1_p0", "story_id": "monte", "chapter": 1, "para_idx": 0,
+     "text": "Dantès returned to Marseille.", "word_count": 4, "char_position": 0, "embedding": [3.0, 4.0]},
+    {"chunk_id": "castaways_ch1_p0", "story_id": "castaways", "chapter": "ch_1", "para_idx": 0,
+     "text": "Lord Glenarvan sailed.", "char_position": 0},
+    {"chunk_id": "monte_ch2_p1", "story_id": "monte", "chapter": 2, "para_idx": 1,
+     "text": "The Abbé spoke — of treasure.", "word_count": 6, "char_position": 31, "embedding": [0.0, 1.0]},
+]
+
+
+def test_rows_are_grouped_by_story_and_round_trip(tmp_path):
+    store = ChunkStore.from_chunks(iter(CHUNKS))
+
+    assert store.stories == ["castaways", "monte"]
+    assert [row["chunk_id"] for row in store] == ["castaways_ch1_p0", "monte_ch1_p0", "monte_ch2_p1"]
+    assert store.story_slices() == {"castaways": (0, 1), "monte": (1, 3)}
+    # Rows read like the chunk dicts they came from (chapter as an int, word_count counted if missing)
+    assert {**store[2], "similarity": 0.5} == {**{k: v for k, v in CHUNKS[2].items() if k != "embedding"}, "similarity": 0.5}
+    assert store[0]["chapter"] == 1 and store[0]["word_count"] == 3
+    assert list(store.missing_embeddings()) == [0]
+    assert store.embeddings.dtype == np.float32 and store.embeddings[1].tolist() == [3.0, 4.0]
+
+    store.save(str(tmp_path))
+    loaded = ChunkStore.load(str(tmp_path))
+    assert isinstance(loaded.embeddings, np.memmap)
+    assert [dict(row) for row in loaded] == [dict(row) for row in store]
+    assert loaded.stories == store.stories
+    # Gathered rows equal the per-row views, memory-mapped or not
+    assert loaded.records([2, 0]) == [dict(store[2]), dict(store[0])]
@@ -0,0 +1,50 @@
+"""
+Tests for the paragraph chunking rule
+"""
+from src.pathway_pipeline.chunking import split_into_chunks
+from src.pathway_pipeline.udfs import parse_file_content
+
+
+def test_crlf_novel_splits_into_paragraph_chunks():
+    paragraphs = [f"Dantès waited in the prison for day number {i} to pass." for i in range(300)]
+    data = "\r\n\r\n".join(paragraphs).encode("utf-8")
+
+    text = parse_file_content(data, "monte.txt")
+    assert "\r" not in text
+    for content in (text, data.decode("utf-8")):
+        chunks = split_into_chunks(content, "monte", max_words=600)
+        assert len(chunks) > 1
+        assert all(0 < chunk["word_count"] <= 600 for chunk in chunks)
+        assert sum(chunk["word_count"] for chunk in chunks) == sum(len(p.split()) for p in paragraphs)
+        # char_position points into the (LF) text ingestion produces
+        assert all(text[chunk["char_position"]:].startswith(chunk["text"][:40]) for chunk in chunks)
+
+
+def test_oversized_first_paragraph_is_not_preceded_by_an_empty_chunk():
+    chunks = split_into_chunks("word " * 700 + "\n\nshort tail", "monte", max_words=600)
+    assert [chunk["word_count"] for chunk in chunks] == [700, 2]
+    assert len({chunk["chunk_id"] for chunk in chunks}) == 2
+
+
+def test_chapter_headings_start_chapters_and_feed_the_catalog():
+    from src.pathway_pipeline.catalog import story_entry
+
+    contents = "Chapter 1. Marseilles\nChapter 2. Father and Son\nChapter 3. The Catalans"
+    sections = ["THE COUNT OF MONTE CRISTO", contents]
+    for number, title in ((1, "Marseilles"), (2, "Father and Son"), (3, "The Catalans")):
+        sections.append(f"Chapter {number}. {title}")
+        sections.extend(f"Paragraph {i} of chapter {number} tells of Dantès." for i in range(3))
+    # A long title wrapped onto a second line is still a heading
+    sections[-4] = "CHAPTER III. How a Gardener May Get Rid of the Dormice that Eat His\nPeaches"
+    text = "\n\n".join(sections)
+
+    chunks = split_into_chunks(text, "monte", max_words=20)
+    chapters = [chunk["chapter"] for chunk in chunks]
+    assert chapters == sorted(chapters) and set(chapters) == {0, 1, 2, 3}
+    assert chapters.count(1) == chapters.count(2) == 2
+    assert len({chunk["chunk_id"] for chunk in chunks}) == len(chunks)
+
+    entry = story_entry("monte", chunks, "v1")
+    assert entry["chapter_count"] == 4
+    offsets = [chapter["char_position"] for chapter in entry["chapters"]]
+    assert offsets == [0] + [text.rindex(heading) for heading in ("Chapter 1. M", "Chapter 2. F", "CHAPTER III.")]
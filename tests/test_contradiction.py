@@ -0,0 +1,76 @@
+"""
+Tests for contradiction detection with cached embeddings
+"""
+import numpy as np
+
+from src.reasoning_validation.contradiction import ContradictionDetector
+from src.reasoning_validation.schemas import ClassificationResult
+
+
+CONFIG = {"enabled": True, "methods": ["text_overlap_conflict", "semantic_negation_check"]}
+
+
+class FakeEncoder:
+    """Same-length texts get the same unit vector; records every batch."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        vectors = np.zeros((len(texts), 4), dtype=np.float32)
+        for row, text in enumerate(texts):
+            vectors[row, len(text) % 4] = 1.0
+        return vectors
+
+
+def _result(primary, alternative="Edmond is a sailor", quote="He sailed often", node="c1", alt_conf=0.5):
+    return ClassificationResult(
+        status="SUCCESS",
+        confidence=0.8,
+        reasoning_trace={
+            "primary_hypothesis": {
+                "hypothesis_text": primary,
+                "supporting_evidence": [{"quote_text": quote, "chapter_id": "ch_1", "source_node_id": node}],
+                "confidence_score": 0.8,
+            },
+            "alternatives_considered": [{"hypothesis_text": alternative, "confidence_score": alt_conf}],
+            "logical_steps": ["step one", "step two"],
+        },
+    )
+
+
+def test_text_overlap_conflict_flags_negated_alternative():
+    detector = ContradictionDetector({"enabled": True, "methods": ["text_overlap_conflict"]})
+    flagged = _result("Edmond trusted Fernand completely", "Edmond never trusted Fernand completely", alt_conf=0.9)
+    weaker = _result("Edmond trusted Fernand completely", "Edmond never trusted Fernand completely", alt_conf=0.2)
+
+    reasons = detector.detect_many([flagged, weaker])
+
+    assert reasons[0] and "negates" in reasons[0]
+    assert reasons[1] is None
+
+
+def test_semantic_check_uses_stored_chunk_embeddings_and_one_encode_batch():
+    encoder = FakeEncoder()
+    stored = {"c1": np.array([1, 0, 0, 0], dtype=np.float32)}
+
+    def lookup(chunk_ids):
+        found = np.array([c in stored for c in chunk_ids])
+        matrix = np.stack([stored.get(c, np.zeros(4, dtype=np.float32)) for c in chunk_ids])
+        return matrix, found
+
+    detector = ContradictionDetector(CONFIG, encode=encoder, lookup=lookup)
+    # len 12 -> axis 0 matches chunk c1; the quote is negated, the claim is not
+    contradicted = _result("Abbe is kind", quote="He was not kind", node="c1")
+    unknown_node = _result("Abbe is kind", quote="He was not kind", node="c9")
+
+    reasons = detector.detect_many([contradicted, unknown_node])
+
+    assert reasons[0] and "similarity 1.00" in reasons[0]
+    # c9 is not in the index, so its quote was encoded in the same batch
+    assert len(encoder.calls) == 1 and "He was not kind" in encoder.calls[0]
+
+    # Hypothesis embeddings are cached across calls
+    detector.detect_many([contradicted])
+    assert len(encoder.calls) == 1
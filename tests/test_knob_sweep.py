@@ -0,0 +1,104 @@
+"""
+Tests for the offline knob sweep
+"""
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from src.pathway_pipeline.app import NovelAnalyzerApp
+from src.pathway_pipeline.index import UnknownStoryError, register_embedding_model
+from src.pathway_pipeline.knob_sweep import expand_grid, pick_cheapest, run_sweep
+from src.pathway_pipeline.llm_standin import SyntheticBackend
+
+
+class WordModel:
+    """Embedding model stand-in: counts of a few words."""
+
+    def encode(self, texts, **kwargs):
+        words = ["Dantès", "Marseille", "prison", "letter"]
+        vectors = np.array([[text.count(word) for word in words] for text in texts], dtype=np.float32) + 1e-3
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class CountingBackend(SyntheticBackend):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def acomplete(self, messages, model, temperature, max_tokens=None):
+        self.calls += 1
+        return await super().acomplete(messages, model, temperature, max_tokens)
+
+    async def astream(self, messages, model, temperature, max_tokens=None):
+        self.calls += 1
+        async for piece in super().astream(messages, model, temperature, max_tokens):
+            yield piece
+
+
+def test_grid_rejects_knobs_outside_governance():
+    config = {"governance": {"allowed_knobs": ["retrieval.top_k", "validation.reject_if_confidence_below"]}}
+    points = expand_grid({"retrieval.top_k": [4, 8], "validation.reject_if_confidence_below": [0.3, 0.5]}, config)
+    assert len(points) == 4 and {"retrieval.top_k": 8, "validation.reject_if_confidence_below": 0.3} in points
+    with pytest.raises(ValueError):
+        expand_grid({"chunking.target_words": [300]}, config)
+
+
+def test_pick_cheapest_meeting_target():
+    results = [
+        {"knobs": {"top_k": 8}, "accuracy": 0.8, "tokens_per_row": 900, "p95_ms": 40},
+        {"knobs": {"top_k": 4}, "accuracy": 0.7, "tokens_per_row": 500, "p95_ms": 30},
+        {"knobs": {"top_k": 2}, "accuracy": 0.5, "tokens_per_row": 300, "p95_ms": 20},
+    ]
+    assert pick_cheapest(results, 0.7)["knobs"] == {"top_k": 4}
+    assert pick_cheapest(results, 0.9) is None
+
+
+def test_threshold_points_share_llm_calls(tmp_path):
+    novels = tmp_path / "raw"
+    novels.mkdir()
+    (novels / "monte.txt").write_text("\n\n".join(
+        f"CHAPTER {i}\n\n" + f"Dantès wrote a letter in the prison of Marseille on day {i}. " * 40 for i in range(12)
+    ), encoding="utf-8")
+    with open("configs/system_rules.yaml") as f:
+        config = yaml.safe_load(f)
+    config['pathway']['input_folder'] = str(novels)
+    config['stage_cache']['enabled'] = False
+    config['catalog']['path'] = None
+    config['validation']['corpus_lookup']['snapshot_dir'] = None
+    config['reasoning']['cache']['enabled'] = False
+    config['reasoning']['requests_per_minute'] = config['reasoning']['tokens_per_minute'] = None
+    config['reasoning']['screening'] = {'enabled': False}
+    config['retrieval']['embedding_model_ref'] = "word-model"
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config))
+
+    register_embedding_model("word-model", WordModel())
+    backend = CountingBackend()
+    app = NovelAnalyzerApp(str(config_path), llm_backend=backend)
+    app.load_story_texts()
+    app.build_corpus_index()
+    app.materialize_index()
+
+    df = pd.DataFrame([
+        {"id": 1, "book_name": "monte", "char": "Dantès", "content": "Dantès wrote a letter in prison.", "label": "consistent"},
+        # CSV book names need not match the file stem's case
+        {"id": 2, "book_name": "Monte", "char": "Dantès", "content": "Dantès never saw Marseille.", "label": "contradict"},
+    ])
+    with pytest.raises(UnknownStoryError):
+        app.resolve_story("castaways")
+
+    grid = {"retrieval.top_k": [3, 4], "validation.reject_if_confidence_below": [0.0, 1.0]}
+    report = asyncio.run(run_sweep(app, df, grid))
+
+    assert len(report["points"]) == 4
+    # One call per (claim, evidence): the threshold points reuse them
+    assert backend.calls == report["llm_calls"] <= 4
+    by_knobs = {tuple(point["knobs"].values()): point for point in report["points"]}
+    for top_k in (3, 4):
+        lenient, strict = by_knobs[(top_k, 0.0)], by_knobs[(top_k, 1.0)]
+        assert lenient["tokens_per_row"] == strict["tokens_per_row"] > 0
+        # Nothing passes a confidence threshold of 1.0: every row is predicted 0
+        assert strict["accuracy"] == 0.5
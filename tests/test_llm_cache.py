@@ -0,0 +1,82 @@
+"""
+Tests for the persistent LLM response cache
+"""
+import sqlite3
+
+import pytest
+
+from src.pathway_pipeline.llm_cache import CacheMissError, LLMResponseCache, prompt_fingerprint
+
+
+def test_fingerprint_covers_every_input():
+    base = prompt_fingerprint("m", "sys", "user", 0.2, 1024)
+    assert base == prompt_fingerprint("m", "sys", "user", 0.2, 1024)
+    assert base != prompt_fingerprint("m2", "sys", "user", 0.2, 1024)
+    assert base != prompt_fingerprint("m", "sys", "user2", 0.2, 1024)
+    assert base != prompt_fingerprint("m", "sys", "user", 0.3, 1024)
+    assert base != prompt_fingerprint("m", "sys", "user", 0.2, 512)
+
+
+def test_round_trip_persists_to_disk(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = LLMResponseCache(path)
+    assert cache.get("k") is None
+    cache.put("k", '{"a": 1}')
+    cache.close()
+
+    reopened = LLMResponseCache(path)
+    assert reopened.get("k") == '{"a": 1}'
+
+
+def test_replay_mode_never_misses_silently(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    LLMResponseCache(path).put("known", "response")
+
+    replay = LLMResponseCache(path, mode="replay")
+    assert replay.get("known") == "response"
+    replay.put("new", "ignored")
+    with pytest.raises(CacheMissError):
+        replay.get("new")
+
+
+def test_size_eviction_keeps_most_recent(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    for key in ["a", "b", "c"]:
+        cache.put(key, key)
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    assert cache.get("c") == "c"
+
+
+def test_ttl_expiry(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=-1)
+    cache.put("k", "v")
+    assert cache.get("k") is None
+
+
+def test_replay_opens_the_recording_read_only(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    recorder = LLMResponseCache(str(path))
+    recorder.put("known", "response")
+    recorder.close()
+    path.chmod(0o444)
+
+    replay = LLMResponseCache(str(path), mode="replay")
+    assert replay.get("known") == "response"
+    # The connection itself refuses writes (not just the cache's mode checks)
+    with pytest.raises(sqlite3.OperationalError):
+        replay._conn.execute("DELETE FROM responses")
+    with pytest.raises(FileNotFoundError):
+        LLMResponseCache(str(tmp_path / "missing.sqlite"), mode="replay")
+    assert not (tmp_path / "missing.sqlite").exists()
+
+
+def test_size_eviction_is_amortised(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"), max_entries=200)
+    for i in range(202):
+        cache.put(str(i), "v")
+    # Within the 1% slack: nothing evicted yet
+    assert len(cache) == 202
+    cache.put("202", "v")
+    assert len(cache) == 200
+    assert cache.get("0") is None and cache.get("202") == "v"
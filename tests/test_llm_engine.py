@@ -0,0 +1,155 @@
+"""
+Tests for the async reasoning engine against a local fake Groq endpoint
+"""
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.pathway_pipeline.llm_engine import AsyncReasoningEngine, RateLimitScheduler
+
+
+TRACE = {
+    "primary_hypothesis": {
+        "hypothesis_text": "Consistent",
+        "supporting_evidence": [],
+        "confidence_score": 0.8
+    },
+    "alternatives_considered": [],
+    "logical_steps": ["Step 1", "Step 2"]
+}
+
+
+def _completion(content: str) -> dict:
+    return {
+        "id": "fake",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "fake-model",
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+    }
+
+
+@pytest.fixture
+def fake_endpoint():
+    """
+    Serves /openai/v1/chat/completions; fails the first `failures` calls with 429.
+    Batched prompts are answered with state["batch_content"] when set.
+    """
+    state = {"calls": 0, "failures": 0, "batch_content": None}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            state["calls"] += 1
+            content = json.dumps(TRACE)
+            if state["batch_content"] and "CLAIMS:" in request["messages"][-1]["content"]:
+                content = state["batch_content"]
+            if state["calls"] <= state["failures"]:
+                body, status = b'{"error": {"message": "rate limited"}}', 429
+            else:
+                body, status = json.dumps(_completion(content)).encode(), 200
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", state
+    server.shutdown()
+
+
+def _engine(base_url: str, **overrides) -> AsyncReasoningEngine:
+    config = {"backend": {"base_url": base_url}, "concurrency": 4, "backoff_base_s": 0.01,
+              "backoff_max_s": 0.05, "call_deadline_s": 5.0}
+    config.update(overrides)
+    return AsyncReasoningEngine(config)
+
+
+def test_reason_many_runs_all_calls(fake_endpoint):
+    base_url, state = fake_endpoint
+    evidence = [{"chunk_id": "1", "chapter": 1, "text": "Evidence A"}]
+
+    results = _engine(base_url).run_many([("claim", evidence)] * 5)
+
+    assert [r.status for r in results] == ["SUCCESS"] * 5
+    assert state["calls"] == 5
+
+
+def test_retries_after_rate_limit(fake_endpoint):
+    base_url, state = fake_endpoint
+    state["failures"] = 2
+
+    results = _engine(base_url).run_many([("claim", [])])
+
+    assert results[0].status == "SUCCESS"
+    assert state["calls"] == 3
+
+
+def test_gives_up_after_max_retries(fake_endpoint):
+    base_url, state = fake_endpoint
+    state["failures"] = 100
+
+    results = _engine(base_url, max_retries=1).run_many([("claim", [])])
+
+    assert results[0].status == "REJECTION"
+    assert state["calls"] == 2
+
+
+def test_reason_batch_falls_back_for_missing_claims(fake_endpoint):
+    base_url, state = fake_endpoint
+    evidence = [{"chunk_id": "1", "chapter": 1, "text": "Evidence A"}]
+    state["batch_content"] = json.dumps({"results": [{"claim_id": "C1", **TRACE}]})
+
+    results = asyncio.run(_engine(base_url).reason_batch(["claim one", "claim two"], evidence))
+
+    assert [r.status for r in results] == ["SUCCESS", "SUCCESS"]
+    # One batched call, plus a single-claim retry for the claim it left out
+    assert state["calls"] == 2
+
+
+def test_scheduler_waits_for_request_budget():
+    clock = {"now": 0.0}
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        clock["now"] += seconds
+
+    scheduler = RateLimitScheduler(requests_per_minute=2, clock=lambda: clock["now"], sleep=fake_sleep)
+
+    async def run():
+        for _ in range(3):
+            await scheduler.acquire(tokens=1)
+
+    asyncio.run(run())
+    assert slept == [60.0]
+
+
+def test_llm_errors_go_to_the_trace_not_stdout(fake_endpoint, tmp_path, capsys):
+    from src.utils import tracing
+
+    base_url, state = fake_endpoint
+    state["failures"] = 100
+    path = tmp_path / "traces.jsonl"
+    tracing.configure({"tracing": {"enabled": True, "path": str(path)}})
+    try:
+        results = _engine(base_url, max_retries=0).run_many([("claim", [])])
+    finally:
+        tracing.configure(None)
+
+    assert results[0].status == "REJECTION"
+    assert capsys.readouterr().out == ""
+    llm = [span for span in map(json.loads, path.read_text().splitlines()) if span["name"] == "llm"]
+    assert llm[0]["attrs"]["status"] == "REJECTION"
+    assert llm[0]["attrs"]["rejection_reason"] == results[0].rejection_reason
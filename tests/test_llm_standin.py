@@ -0,0 +1,116 @@
+"""
+Tests for the local LLM stand-in
+"""
+import asyncio
+import json
+
+import pytest
+
+from src.pathway_pipeline.llm_backend import LLMBackendError
+from src.pathway_pipeline.llm_cache import LLMResponseCache, prompt_fingerprint
+from src.pathway_pipeline.llm_standin import LatencyModel, StandinResponder, SyntheticBackend, create_standin_app
+from src.pathway_pipeline.prompt_builder import build_batch_messages, build_messages
+from src.pathway_pipeline.reasoner import parse_batch_response
+from src.reasoning_validation.schemas import ReasoningTrace
+
+
+EVIDENCE = [
+    {"chunk_id": "monte_ch8_p3", "chapter": "ch_8", "text": "Dantès was taken to the Chateau d'If. The door closed."},
+    {"chunk_id": "monte_ch9_p1", "chapter": "ch_9", "text": "Mercedes waited by the harbour for news."},
+]
+
+
+def test_synthetic_responses_validate_and_quote_the_evidence():
+    backend = SyntheticBackend(StandinResponder(seed=1))
+
+    single = backend.complete(build_messages("Dantès was imprisoned.", EVIDENCE), "m", 0.2)
+    trace = ReasoningTrace.model_validate_json(single.content)
+    quotes = {span.source_node_id: span.quote_text for span in trace.primary_hypothesis.supporting_evidence}
+    assert quotes == {"monte_ch8_p3": "Dantès was taken to the Chateau d'If.",
+                      "monte_ch9_p1": "Mercedes waited by the harbour for news."}
+    assert single.prompt_tokens > 0 and single.completion_tokens > 0
+
+    claims = [("c1", "Dantès was imprisoned."), ("c2", "Mercedes left Marseille.")]
+    batched = asyncio.run(backend.acomplete(build_batch_messages(claims, EVIDENCE), "m", 0.2))
+    parsed = parse_batch_response(batched.content, ["c1", "c2"])
+    assert not any(isinstance(result, Exception) for result in parsed.values())
+
+
+def test_injected_errors_raise_backend_errors_with_retry_after():
+    backend = SyntheticBackend(StandinResponder(error_rate=1.0, error_statuses=(429,), retry_after_s=2.5, seed=1))
+    with pytest.raises(LLMBackendError) as error:
+        backend.complete(build_messages("claim", EVIDENCE), "m", 0.2)
+    assert error.value.status_code == 429 and error.value.retry_after == 2.5
+
+    backend = SyntheticBackend(StandinResponder(error_rate=1.0, error_statuses=(503,), seed=1))
+    with pytest.raises(LLMBackendError) as error:
+        backend.complete(build_messages("claim", EVIDENCE), "m", 0.2)
+    assert error.value.status_code == 503 and error.value.retry_after is None
+
+
+def test_replay_returns_the_recorded_content(tmp_path):
+    path = str(tmp_path / "recordings.sqlite")
+    messages = build_messages("Dantès was imprisoned.", EVIDENCE)
+    key = prompt_fingerprint("m", messages[0]["content"], messages[-1]["content"], 0.2, 512)
+    recordings = LLMResponseCache(path)
+    recordings.put(key, '{"recorded": true}')
+    recordings.close()
+
+    backend = SyntheticBackend(StandinResponder(recordings_path=path, fallback="error"))
+    assert backend.complete(messages, "m", 0.2, 512).content == '{"recorded": true}'
+    # Anything else was never recorded
+    with pytest.raises(LLMBackendError) as error:
+        backend.complete(messages, "m", 0.3, 512)
+    assert error.value.status_code == 404
+
+
+def test_latency_model_distributions():
+    import random
+
+    rng = random.Random(0)
+    assert LatencyModel("fixed", median_ms=100, ms_per_token=1).sample(rng, 50) == pytest.approx(0.15)
+    assert 0.01 <= LatencyModel("uniform", min_ms=10, max_ms=20).sample(rng) <= 0.02
+    with pytest.raises(ValueError):
+        LatencyModel("gamma")
+
+
+def test_sse_route_streams_well_formed_chunks():
+    import httpx
+
+    app = create_standin_app(StandinResponder(seed=1))
+    body = {"model": "m", "temperature": 0.2, "stream": True,
+            "messages": build_messages("Dantès was imprisoned.", EVIDENCE)}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/openai/v1/chat/completions", json=body)
+
+    response = asyncio.run(run())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = [line[len("data: "):] for line in response.text.split("\n\n") if line]
+    assert events[-1] == "[DONE]"
+    chunks = [json.loads(event) for event in events[:-1]]
+    assert all(chunk["object"] == "chat.completion.chunk" for chunk in chunks)
+    assert chunks[-1]["choices"][0]["finish_reason"] == "stop" and chunks[-1]["choices"][0]["delta"] == {}
+    content = "".join(chunk["choices"][0]["delta"].get("content", "") for chunk in chunks)
+    ReasoningTrace.model_validate_json(content)
+
+
+def test_replay_serves_what_the_engine_recorded_without_max_tokens_set(tmp_path):
+    from src.pathway_pipeline.llm_engine import AsyncReasoningEngine
+
+    path = str(tmp_path / "recordings.sqlite")
+    # reasoning.max_tokens unset: the recorded key and the request must agree on the default
+    config = {"cache": {"enabled": True, "mode": "read_write", "path": path}, "streaming": {"enabled": False}}
+    recorded = asyncio.run(AsyncReasoningEngine(config, SyntheticBackend(StandinResponder(seed=1)))
+                           .reason("Dantès was imprisoned.", EVIDENCE))
+    # Recorded even though the cache started empty
+    assert len(LLMResponseCache(path, mode="replay")) == 1
+
+    replaying = SyntheticBackend(StandinResponder(recordings_path=path, fallback="error"))
+    replayed = asyncio.run(AsyncReasoningEngine({"streaming": {"enabled": False}}, replaying)
+                           .reason("Dantès was imprisoned.", EVIDENCE))
+    assert replayed.reasoning_trace == recorded.reasoning_trace
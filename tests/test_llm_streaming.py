@@ -0,0 +1,61 @@
+"""
+Tests for incremental JSON parsing and early abort on streamed completions
+"""
+import json
+
+import pytest
+
+from src.pathway_pipeline.llm_streaming import EarlyAbort, IncrementalJSONParser, StreamMonitor
+from src.reasoning_validation.validation import Validator
+
+
+VALIDATION_CONFIG = {"validation": {"reject_if_confidence_below": 0.4, "min_evidence": 1,
+                                    "quote_integrity": {"must_match_source_substring": True}}}
+CONTEXT = [{"id": "n1", "chunk_id": "n1", "text": "Edmond sailed home to Marseille."}]
+
+
+def _trace(quote: str, confidence: float) -> str:
+    return json.dumps({
+        "primary_hypothesis": {
+            "hypothesis_text": "Consistent",
+            "supporting_evidence": [{"quote_text": quote, "chapter_id": "1", "source_node_id": "n1"}],
+            "confidence_score": confidence
+        },
+        "alternatives_considered": [],
+        "logical_steps": ["Step 1", "Step 2"]
+    })
+
+
+def _feed(monitor: StreamMonitor, text: str, piece: int = 7) -> int:
+    """Feed text in small pieces; returns how many characters were consumed."""
+    for i in range(0, len(text), piece):
+        monitor.feed(text[i:i + piece])
+    return len(text)
+
+
+def test_parser_reports_values_at_watched_paths():
+    seen = []
+    parser = IncrementalJSONParser({("a", "*", "b"): seen.append, ("c",): seen.append})
+    for ch in '{"a": [{"b": 1}, {"b": "x\\"y"}], "c": [true, null]}':
+        parser.feed(ch)
+
+    assert seen == [1, 'x"y', [True, None]]
+    assert parser.done
+
+
+def test_fabricated_quote_aborts_before_the_end():
+    monitor = StreamMonitor(Validator(VALIDATION_CONFIG), CONTEXT)
+    text = _trace("Edmond never left", 0.9)
+
+    with pytest.raises(EarlyAbort, match="Quote fabrication"):
+        _feed(monitor, text)
+    assert len(monitor.text) < len(text)
+
+
+def test_low_confidence_aborts_and_valid_trace_streams_through():
+    with pytest.raises(EarlyAbort, match="Confidence"):
+        _feed(StreamMonitor(Validator(VALIDATION_CONFIG), CONTEXT), _trace("Edmond sailed home", 0.1))
+
+    monitor = StreamMonitor(Validator(VALIDATION_CONFIG), CONTEXT)
+    _feed(monitor, _trace("Edmond sailed home", 0.9))
+    assert monitor.parser.done
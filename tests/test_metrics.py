@@ -0,0 +1,44 @@
+"""
+Tests for the in-process metrics registry and /metrics
+"""
+import asyncio
+
+from src.utils.metrics import MetricsRegistry, METRICS
+
+
+def test_histogram_quantiles_and_prometheus_text():
+    registry = MetricsRegistry()
+    for ms in range(1, 101):
+        registry.observe("stage_seconds", ms / 1000, stage="retrieval")
+    registry.inc("rejections_total", reason="confidence")
+    registry.inc("rejections_total", 2, reason="confidence")
+
+    stats = registry.summary()["latency_ms"]["stage_seconds"]["stage=retrieval"]
+    assert stats["count"] == 100 and stats["max"] == 100.0
+    # Buckets are ~12% apart, so quantiles are within one bucket of the exact value
+    assert 50 <= stats["p50"] <= 50 * 1.13
+    assert 95 <= stats["p95"] <= 100 and 99 <= stats["p99"] <= 100
+
+    text = registry.prometheus_text()
+    assert 'novel_analyzer_rejections_total{reason="confidence"} 3' in text
+    assert 'novel_analyzer_stage_seconds_bucket{stage="retrieval",le="+Inf"} 100' in text
+    assert 'novel_analyzer_stage_seconds_count{stage="retrieval"} 100' in text
+
+
+def test_metrics_endpoint_exposes_stage_timings():
+    import httpx
+    from src.pathway_pipeline import service
+
+    METRICS.reset()
+    with METRICS.timer("reasoning"):
+        pass
+
+    async def run():
+        transport = httpx.ASGITransport(app=service.api)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/metrics")
+
+    response = asyncio.run(run())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'novel_analyzer_stage_seconds_count{stage="reasoning"} 1' in response.text
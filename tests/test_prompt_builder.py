@@ -0,0 +1,100 @@
+"""
+Tests for the prompt builder's input budget
+"""
+import sys
+
+from src.pathway_pipeline import prompt_builder
+from src.pathway_pipeline.prompt_builder import ELISION, PromptBuilder, build_messages, format_evidence
+from src.pathway_pipeline.reasoner import token_usage
+
+
+BACKSTORY = "Dantès was imprisoned in the Chateau d'If after the letter."
+
+
+def _chunk(i: int) -> dict:
+    sentences = [
+        f"Sentence {j} of chunk {i} tells of the harbour, the ships and the sailors of Marseille."
+        for j in range(12)
+    ]
+    # One sentence per chunk shares words with the claim, so summaries keep it
+    sentences[5] = f"Dantès was taken to the Chateau d'If because of the letter ({i})."
+    return {"chunk_id": f"c{i}", "chapter": f"ch_{i}", "text": " ".join(sentences)}
+
+
+EVIDENCE = [_chunk(i) for i in range(5)]
+
+
+def _builder(spare_tokens: int, min_chunk_tokens: int = 64) -> PromptBuilder:
+    """Builder whose budget leaves spare_tokens for the evidence."""
+    builder = PromptBuilder({"min_chunk_tokens": min_chunk_tokens})
+    base = sum(builder.count(message["content"]) for message in build_messages(BACKSTORY, []))
+    builder.max_input_tokens = base + spare_tokens
+    return builder
+
+
+def _size(builder: PromptBuilder, built) -> int:
+    return sum(builder.count(message["content"]) for message in built.messages)
+
+
+def test_evidence_that_fits_is_untouched():
+    builder = _builder(10000)
+    built = builder.build(BACKSTORY, EVIDENCE)
+
+    assert built.evidence == EVIDENCE
+    assert built.trimmed_chunks == built.dropped_chunks == 0
+    assert built.prompt_tokens == _size(builder, built) <= builder.max_input_tokens
+
+
+def test_lowest_ranked_chunks_are_trimmed_first_and_stay_verbatim():
+    builder = PromptBuilder({})
+    costs = [builder.count(format_evidence(chunk)) for chunk in EVIDENCE]
+    # Room for the first four chunks and a summary of the last one
+    builder = _builder(sum(costs[:4]) + costs[4] // 2)
+    built = builder.build(BACKSTORY, EVIDENCE)
+
+    assert _size(builder, built) <= builder.max_input_tokens
+    assert built.trimmed_chunks == 1 and built.dropped_chunks == 0
+    assert built.evidence[:4] == EVIDENCE[:4]
+    summary = built.evidence[4]["text"]
+    assert summary != EVIDENCE[4]["text"] and "Chateau d'If" in summary
+    # Every sentence kept by the summary is a verbatim substring of the chunk
+    assert all(part in EVIDENCE[4]["text"] for part in summary.split(ELISION))
+
+
+def test_chunks_below_min_chunk_tokens_are_dropped_and_reported():
+    builder = PromptBuilder({})
+    costs = [builder.count(format_evidence(chunk)) for chunk in EVIDENCE]
+    # Two whole chunks plus a few tokens: the third would shrink below min_chunk_tokens
+    builder = _builder(sum(costs[:2]) + 10, min_chunk_tokens=64)
+    built = builder.build(BACKSTORY, EVIDENCE)
+
+    assert _size(builder, built) <= builder.max_input_tokens
+    assert [chunk["chunk_id"] for chunk in built.evidence] == ["c0", "c1"]
+    assert built.dropped_chunks == 3 and built.trimmed_chunks == 0
+
+    usage = token_usage(built, "{}", {})
+    assert usage.dropped_chunks == 3 and usage.trimmed_chunks == 0
+    assert usage.prompt_tokens == built.prompt_tokens
+
+
+def test_batched_prompt_fits_the_same_budget():
+    builder = PromptBuilder({})
+    costs = [builder.count(format_evidence(chunk)) for chunk in EVIDENCE]
+    builder = _builder(sum(costs[:3]))
+    claims = [("c1", BACKSTORY), ("c2", "Mercedes married Fernand.")]
+    built = builder.build_batch(claims, EVIDENCE)
+
+    assert _size(builder, built) <= builder.max_input_tokens
+    assert built.trimmed_chunks + built.dropped_chunks >= 2
+    assert "[Claim c2]" in built.messages[-1]["content"]
+
+
+def test_approximate_tokenizer_without_tiktoken(monkeypatch):
+    monkeypatch.setitem(sys.modules, "tiktoken", None)
+    prompt_builder.get_tokenizer.cache_clear()
+    try:
+        tokenizer = prompt_builder.get_tokenizer("cl100k_base")
+        assert isinstance(tokenizer, prompt_builder._ApproxTokenizer)
+        assert prompt_builder.count_tokens("Dantès wrote: 'a letter'.") == 8
+    finally:
+        prompt_builder.get_tokenizer.cache_clear()
@@ -0,0 +1,39 @@
+"""
+Tests for indexed quote integrity verification
+"""
+from src.reasoning_validation.quote_index import QuoteIndex, fuzzy_contains, min_edit_distance
+from src.reasoning_validation.schemas import EvidenceSpan
+
+
+CONTEXT = [
+    {"chunk_id": "1", "chapter": "ch_1", "text": "Edmond  sailed home to “Marseille” at dawn."},
+    {"chunk_id": "2", "chapter": "ch_2", "text": "Mercedes waited by the harbour."},
+]
+
+
+def _span(quote: str, node: str = "1") -> EvidenceSpan:
+    return EvidenceSpan(quote_text=quote, chapter_id="ch", source_node_id=node)
+
+
+def test_exact_mode_checks_each_span_against_its_own_node():
+    spans = [_span("sailed home"), _span("sailed"), _span("Mercedes waited", "2"),
+             _span("Mercedes waited"), _span("at dawn", "9")]
+
+    assert QuoteIndex(CONTEXT).verify_many(spans) == [True, True, True, False, False]
+
+
+def test_normalized_mode_folds_whitespace_and_quote_characters():
+    span = _span('Edmond sailed home to "Marseille"')
+
+    assert not QuoteIndex(CONTEXT).verify(span)
+    assert QuoteIndex(CONTEXT, normalize=True).verify(span)
+
+
+def test_fuzzy_mode_allows_bounded_edits():
+    assert min_edit_distance("harbor", "waited by the harbour.") == 1
+    assert fuzzy_contains("waited by the harbor", "Mercedes waited by the harbour.", 1)
+    assert not fuzzy_contains("waited by the station", "Mercedes waited by the harbour.", 2)
+
+    index = QuoteIndex(CONTEXT, max_edit_ratio=0.1)
+    assert index.verify(_span("Mercedes waitd by the harbor", "2"))
+    assert not index.verify(_span("Fernand waited at the inn", "2"))
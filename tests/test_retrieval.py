@@ -0,0 +1,70 @@
+"""
+Tests for batched retrieval over the materialized index
+"""
+import numpy as np
+
+from src.pathway_pipeline.index import PathwayVectorIndex
+from src.pathway_pipeline.retrieval import retrieve_evidence_batch, select_evidence
+
+
+VOCAB = ["abbe", "dantes", "mercedes", "villefort"]
+
+
+def _encode(texts):
+    vectors = np.array([[text.count(word) for word in VOCAB] for text in texts], dtype=np.float32) + 1e-3
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_batch_retrieval_scores_each_query_against_its_own_story():
+    index = PathwayVectorIndex({"embedding_model_ref": "bag-of-words", "dimension": len(VOCAB)})
+    index.encode = _encode
+    index.materialize([
+        {"chunk_id": f"{story}_{i}", "story_id": story, "chapter": f"ch_{i}", "text": text}
+        for story in ("monte", "castaways")
+        for i, text in enumerate(["abbe abbe", "dantes", "mercedes", "villefort", "abbe dantes"])
+    ])
+
+    results = retrieve_evidence_batch(
+        ["abbe", "villefort", "dantes"], ["castaways", "monte", "unknown"], index, None, top_k=2
+    )
+
+    assert [chunk["chunk_id"] for chunk in results[0]] == ["castaways_0", "castaways_4"]
+    assert results[1][0]["chunk_id"] == "monte_3" and results[1][0]["similarity"] > 0.99
+    assert results[2] == []
+    # CSV book names differ from the file stems in case only
+    assert index.resolve_story("Monte") == "monte" and index.resolve_story("unknown") is None
+    assert retrieve_evidence_batch(["villefort"], [" MONTE "], index, None, top_k=1)[0] == results[1][:1]
+
+
+def test_snapshot_attach_maps_embeddings_and_texts(tmp_path):
+    index = PathwayVectorIndex.__new__(PathwayVectorIndex)
+    index.model_name = "bag-of-words"
+    index.dimension = len(VOCAB)
+    index.encode = _encode
+    index.materialize([
+        {"chunk_id": f"monte_{i}", "story_id": "monte", "chapter": f"ch_{i}", "text": text}
+        for i, text in enumerate(["abbe", "Dantès dantes", "mercedes"])
+    ])
+    index.save(str(tmp_path))
+
+    worker = PathwayVectorIndex.__new__(PathwayVectorIndex)
+    worker.model_name = "bag-of-words"
+    worker.encode = _encode
+    worker.attach(str(tmp_path))
+
+    assert isinstance(worker.embeddings, np.memmap)
+    assert worker.version == index.version
+    assert worker.rows[1] == index.rows[1]
+    assert worker.search_many(["dantes"], ["monte"], top_k=1)[0][0]["chunk_id"] == "monte_1"
+
+
+def test_min_distinct_chapters_is_honoured():
+    pool = [{"chunk_id": str(i), "chapter": chapter} for i, chapter in enumerate(["ch_1", "ch_1", "ch_1", "ch_2", "ch_3", "ch_1"])]
+
+    def ids(min_chapters):
+        return [chunk["chunk_id"] for chunk in select_evidence(pool, top_k=3, min_chapters=min_chapters)]
+
+    assert ids(0) == ["0", "1", "2"]
+    assert ids(1) == ["0", "1", "2"]
+    assert ids(2) == ["0", "1", "3"]
+    assert ids(3) == ["0", "3", "4"]
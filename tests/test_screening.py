@@ -0,0 +1,70 @@
+"""
+Tests for the pre-LLM screening cascade
+"""
+from src.pathway_pipeline.screening import ScreeningCascade
+
+
+EVIDENCE = [
+    {"chunk_id": "1", "chapter": "ch_1", "text": "Edmond was not imprisoned in the Chateau d'If.", "similarity": 0.6},
+    {"chunk_id": "2", "chapter": "ch_2", "text": "Mercedes waited by the harbour.", "similarity": 0.4},
+]
+
+
+def _cascade(**overrides) -> ScreeningCascade:
+    config = {"enabled": True, "stages": ["similarity", "character_presence", "lexical"]}
+    config.update(overrides)
+    return ScreeningCascade(config, story_texts={"monte": "Edmond Dantes sailed home to Mercedes."})
+
+
+def test_low_similarity_is_rejected():
+    evidence = [{**chunk, "similarity": 0.05} for chunk in EVIDENCE]
+    result = _cascade().screen("Edmond was imprisoned", evidence, "monte")
+
+    assert result.status == "REJECTION"
+    assert result.screened_by == "similarity"
+
+
+def test_no_evidence_goes_to_llm_and_is_counted():
+    cascade = _cascade(stages=["similarity"])
+
+    assert cascade.screen("Edmond was imprisoned", [], "monte") is None
+    assert cascade.report()["no_evidence"] == 1
+    assert cascade.report()["skipped"] == 0
+
+
+def test_absent_character_is_rejected():
+    result = _cascade().screen("Verify claim: Fernand was imprisoned", EVIDENCE, "monte", character="Fernand")
+
+    assert result.status == "REJECTION"
+    assert result.screened_by == "character_presence"
+
+
+def test_accented_names_are_found():
+    cascade = ScreeningCascade(
+        {"enabled": True, "stages": ["character_presence"]},
+        # Mercédès written with a decomposed accent
+        story_texts={"mc": "Edmond Dantès's ship came in. Merce\u0301de\u0300s waited."}
+    )
+
+    assert cascade.character_present("mc", "Dantès") is True
+    assert cascade.character_present("mc", "Mercédès") is True
+    assert cascade.character_present("mc", "Dant") is False
+    assert cascade.screen("Verify claim: Dantès came home", EVIDENCE, "mc", character="Dantès") is None
+
+
+def test_negated_restatement_is_a_contradiction():
+    result = _cascade().screen("Edmond was imprisoned in the Chateau d'If", EVIDENCE, "monte", character="Edmond Dantes")
+
+    assert result.status == "CONTRADICTION"
+    assert result.screened_by == "lexical"
+
+
+def test_plausible_claim_goes_to_llm_and_rates_are_reported():
+    cascade = _cascade()
+    cascade.screen("Fernand was imprisoned", EVIDENCE, "monte", character="Fernand")
+    assert cascade.screen("Mercedes waited by the harbour", EVIDENCE, "monte", character="Mercedes") is None
+
+    report = cascade.report()
+    assert report["screened"] == 2
+    assert report["stages"]["character_presence"]["skip_rate"] == 0.5
+    assert report["stages"]["lexical"]["evaluated"] == 1
@@ -0,0 +1,213 @@
+"""
+Tests for the REST service response path
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+from src.pathway_pipeline import service
+from src.pathway_pipeline.reasoner import parse_reasoning_response
+from src.pathway_pipeline.service import QueryResponse, _QUERY_RESPONSE_JSON, to_query_response
+
+
+TRACE = {
+    "primary_hypothesis": {
+        "hypothesis_text": "Edmond was imprisoned in the Chateau d'If",
+        "supporting_evidence": [{"quote_text": "the Chateau d'If", "chapter_id": "ch_8", "source_node_id": "c1"}],
+        "confidence_score": 0.9,
+    },
+    "alternatives_considered": [],
+    "logical_steps": ["The chapter names the prison", "So the claim holds"],
+}
+
+
+def test_raw_bytes_validate_straight_into_the_response():
+    result = parse_reasoning_response(json.dumps(TRACE).encode("utf-8"))
+    body = json.loads(_QUERY_RESPONSE_JSON.dump_json(to_query_response("monte", result, 12.5)))
+
+    assert body["decision"] == 1
+    assert body["reasoning"] == TRACE["primary_hypothesis"]["hypothesis_text"]
+    assert body["evidence_used"][0]["source_node_id"] == "c1"
+    # Same body the fully validated model would produce
+    assert body == json.loads(QueryResponse(**body).model_dump_json())
+
+    result.status, result.rejection_reason = "REJECTION", "Confidence too low"
+    body = json.loads(_QUERY_RESPONSE_JSON.dump_json(to_query_response("monte", result, 1.0)))
+    assert body["decision"] == 0 and body["reasoning"] == "Confidence too low"
+
+
+class SlowApp:
+    """Stand-in for NovelAnalyzerApp whose queries take a while."""
+
+    config = {"service": {"max_concurrency": 1, "max_queue": 1, "retry_after_s": 3}}
+
+    async def aquery_result(self, story_id, backstory, character=None):
+        await asyncio.sleep(0.2)
+        return parse_reasoning_response(json.dumps(TRACE))
+
+
+def test_query_sheds_load_with_429_and_keeps_health_responsive():
+    import httpx
+
+    service.init_service(SlowApp())
+
+    async def run():
+        transport = httpx.ASGITransport(app=service.api)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            queries = [
+                asyncio.create_task(client.post("/query", json={"story_id": "monte", "backstory": f"claim {i}"}))
+                for i in range(3)
+            ]
+            await asyncio.sleep(0.05)
+            health = await client.get("/health")
+            return health, await asyncio.gather(*queries)
+
+    try:
+        health, responses = asyncio.run(run())
+    finally:
+        service.pathway_app = None
+
+    assert health.status_code == 200
+    codes = sorted(r.status_code for r in responses)
+    # One running, one queued, one shed
+    assert codes == [200, 200, 429]
+    shed = next(r for r in responses if r.status_code == 429)
+    assert int(shed.headers["Retry-After"]) >= 3
+
+
+class FakeEngine:
+    async def reason(self, backstory, evidence, validator=None):
+        # The first claim is slowest, so it should come back last
+        await asyncio.sleep(0.2 if backstory == "slow claim" else 0.01)
+        return parse_reasoning_response(json.dumps(TRACE))
+
+
+class FakeValidator:
+    def validate_classification(self, result, evidence):
+        return result
+
+
+def _batch_app():
+    from concurrent.futures import ThreadPoolExecutor
+    from src.pathway_pipeline.app import NovelAnalyzerApp
+
+    app = NovelAnalyzerApp.__new__(NovelAnalyzerApp)
+    app.config = {"service": {"batch_block_size": 2}}
+    app.cpu_pool = ThreadPoolExecutor(max_workers=2)
+    app.reasoning_engine = FakeEngine()
+    app.validator = FakeValidator()
+    app.retrieval_calls = []
+
+    def retrieve_and_screen(queries):
+        app.retrieval_calls.append(len(queries))
+        return [([{"chunk_id": "c1", "text": "the Chateau d'If"}], None) for _ in queries]
+
+    app._retrieve_and_screen = retrieve_and_screen
+    app.resolve_story = lambda story_id: story_id
+    return app
+
+
+def test_batch_endpoint_streams_ndjson_rows_in_completion_order():
+    import httpx
+
+    app = _batch_app()
+    service.init_service(app)
+    body = b"\n".join([
+        b'{"request_id": "a", "story_id": "monte", "backstory": "slow claim"}',
+        b'{"story_id": "monte"}',
+        b'{"request_id": "c", "story_id": "monte", "backstory": "fast claim"}',
+        b'{"request_id": "d", "story_id": "monte", "backstory": "fast claim"}',
+    ])
+
+    async def run():
+        transport = httpx.ASGITransport(app=service.api)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/query/batch", content=body, headers={"content-type": "application/x-ndjson"})
+
+    try:
+        response = asyncio.run(run())
+    finally:
+        service.pathway_app = None
+
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["request_id"] for row in rows) == ["1", "a", "c", "d"]
+    assert "error" in next(row for row in rows if row["request_id"] == "1")
+    assert rows[-1]["request_id"] == "a" and rows[-1]["decision"] == 1
+    # Three valid items, retrieved in blocks of two
+    assert app.retrieval_calls == [2, 1]
+
+
+def test_batch_blocks_take_admission_slots_inside_the_stream():
+    import httpx
+
+    app = _batch_app()
+    app.config = {"service": {"batch_block_size": 1, "max_concurrency": 1, "max_queue": 8}}
+    service.init_service(app)
+    held = []
+    slot = service.admission.slot
+
+    @asynccontextmanager
+    async def counting_slot():
+        async with slot():
+            held.append(service.admission.active)
+            yield
+
+    service.admission.slot = counting_slot
+    body = b"\n".join(
+        f'{{"request_id": "{i}", "story_id": "monte", "backstory": "fast claim"}}'.encode() for i in range(3)
+    )
+
+    async def run():
+        transport = httpx.ASGITransport(app=service.api)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/query/batch", content=body, headers={"content-type": "application/x-ndjson"})
+
+    try:
+        response = asyncio.run(run())
+    finally:
+        service.pathway_app = None
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["request_id"] for row in rows) == ["0", "1", "2"]
+    assert all("error" not in row for row in rows)
+    # One slot per block, never more than max_concurrency held, all given back
+    assert held == [1, 1, 1]
+    assert service.admission.active == 0 and service.admission.waiting == 0
+
+
+class CountingApp(SlowApp):
+    config = {"service": {"result_cache": {"enabled": True, "max_entries": 8}}}
+    index_version = "v1"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def aquery_result(self, story_id, backstory, character=None):
+        self.calls += 1
+        return await super().aquery_result(story_id, backstory, character)
+
+
+def test_identical_queries_are_coalesced_cached_and_revalidated_with_etag():
+    import httpx
+
+    app = CountingApp()
+    service.init_service(app)
+    payload = {"story_id": "monte", "backstory": "Edmond was imprisoned"}
+
+    async def run():
+        transport = httpx.ASGITransport(app=service.api)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            concurrent = await asyncio.gather(*(client.post("/query", json=payload) for _ in range(3)))
+            repeat = await client.post("/query", json=payload)
+            revalidated = await client.post("/query", json=payload, headers={"If-None-Match": repeat.headers["ETag"]})
+            return concurrent, repeat, revalidated
+
+    try:
+        concurrent, repeat, revalidated = asyncio.run(run())
+    finally:
+        service.pathway_app = None
+
+    assert app.calls == 1
+    assert {r.content for r in concurrent} == {repeat.content}
+    assert revalidated.status_code == 304 and revalidated.headers["ETag"] == repeat.headers["ETag"]
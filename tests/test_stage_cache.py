@@ -0,0 +1,74 @@
+"""
+Tests for the memoized build stages
+"""
+import numpy as np
+import yaml
+
+from src.pathway_pipeline.app import NovelAnalyzerApp
+from src.pathway_pipeline.index import register_embedding_model
+from src.pathway_pipeline.stage_cache import StageCache
+
+
+class CountingModel:
+    """Embedding model stand-in that counts the texts it encodes."""
+
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, **kwargs):
+        self.encoded += len(texts)
+        vectors = np.array([[len(text), text.count("Dantès") + 1, 1.0] for text in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_keys_ignore_tuning_knobs():
+    base = {"chunking": {"target_words": 500}, "retrieval": {"top_k": 8, "embedding_model_ref": "m"}}
+    tuned = {"chunking": {"target_words": 500}, "retrieval": {"top_k": 3, "embedding_model_ref": "m"}}
+    rechunked = {"chunking": {"target_words": 450}, "retrieval": {"top_k": 8, "embedding_model_ref": "m"}}
+
+    keys = {stage: StageCache(base).key(stage) for stage in ("chunking", "embedding", "index")}
+    assert {stage: StageCache(tuned).key(stage) for stage in keys} == keys
+    # A chunking change invalidates everything downstream of it
+    assert all(StageCache(rechunked).key(stage) != key for stage, key in keys.items())
+
+
+def test_rebuild_with_new_top_k_reuses_every_stage(tmp_path):
+    novels = tmp_path / "raw"
+    novels.mkdir()
+    (novels / "monte.txt").write_text(
+        "\n\n".join(f"Dantès sailed to Marseille on day {i}." for i in range(40)), encoding="utf-8"
+    )
+    # Labelled claims live next to the novels but are not a story
+    (novels / "train.csv").write_text("id,book_name,char,content,label\n1,monte,Dantès,x,consistent\n", encoding="utf-8")
+    with open("configs/system_rules.yaml") as f:
+        config = yaml.safe_load(f)
+    config['pathway']['input_folder'] = str(novels)
+    config['stage_cache'] = {'enabled': True, 'path': str(tmp_path / "stages")}
+    config['catalog']['path'] = None
+    config['validation']['corpus_lookup']['snapshot_dir'] = None
+    config['retrieval']['embedding_model_ref'] = "counting-model"
+
+    model = CountingModel()
+    register_embedding_model("counting-model", model)
+    apps = []
+    for top_k in (8, 3):
+        config['retrieval']['top_k'] = top_k
+        config_path = tmp_path / f"config_{top_k}.yaml"
+        config_path.write_text(yaml.safe_dump(config))
+        app = NovelAnalyzerApp(str(config_path))
+        # The stages build_pipeline() runs around the (lazy) Pathway graph
+        app.load_story_texts()
+        app.build_corpus_index()
+        app.materialize_index()
+        apps.append(app)
+
+    first, second = apps
+    assert model.encoded == len(first.vector_index.chunks) > 0
+    assert second.index_version == first.index_version
+    assert second.story_texts == first.story_texts
+    assert set(second.story_indexes) == set(second.story_texts) == {"monte"}
+    assert [story["story_id"] for story in second.catalog.page()[1]] == ["monte"]
+    assert second.catalog.get("monte") == first.catalog.get("monte")
+    # The reused index is memory-mapped and serves the same chunks
+    hits = second.vector_index.search_many(["Dantès"], ["monte"], top_k=2)[0]
+    assert hits == first.vector_index.search_many(["Dantès"], ["monte"], top_k=2)[0]
@@ -0,0 +1,59 @@
+"""
+Tests for the per-story suffix array and the Validator's corpus-wide quote check
+"""
+from src.pathway_pipeline.udfs import chunk_text
+from src.reasoning_validation.schemas import AlternativeHypothesis, ClassificationResult, EvidenceSpan, ReasoningTrace
+import numpy as np
+
+from src.reasoning_validation.suffix_array import StorySuffixIndex, build_suffix_array, load_all
+from src.reasoning_validation.validation import Validator
+
+
+STORY = ("Chapter 1\n\nEdmond sailed home to Marseille.\n\nMercedes waited by the harbour.\n\n"
+         "Chapter 2\n\nDanglars wrote   the letter\nthat night.")
+
+
+def test_suffix_array_matches_naive_sort():
+    text = "the sea, the ship, the sea"
+    assert list(build_suffix_array(text)) == sorted(range(len(text)), key=lambda i: text[i:])
+
+
+def test_locate_maps_offsets_to_chunks_through_char_position():
+    chunks = chunk_text(STORY, "monte", chunk_size=8)
+    index = StorySuffixIndex.build("monte", STORY, chunks)
+
+    [(offset, chunk_id)] = index.locate("wrote the letter that night")
+    assert STORY[offset:].startswith("wrote")
+    assert chunk_id == "monte_ch3_p0"
+    assert [c["text"] == STORY[c["char_position"]:c["char_position"] + len(c["text"])] for c in chunks] == [True] * len(chunks)
+    assert index.find("Fernand") == []
+
+
+def test_validator_tells_out_of_context_quotes_from_fabrications():
+    config = {"validation": {"reject_if_confidence_below": 0.4, "min_evidence": 1,
+                             "quote_integrity": {"must_match_source_substring": True},
+                             "corpus_lookup": {"enabled": True, "accept_out_of_context": True}}}
+    validator = Validator(config, corpus={"monte": StorySuffixIndex.build("monte", STORY, chunk_text(STORY, "monte", 8))})
+    context = [{"chunk_id": "monte_ch2_p0", "story_id": "monte", "text": "Edmond sailed home to Marseille."}]
+
+    def validate(quote: str) -> ClassificationResult:
+        span = EvidenceSpan(quote_text=quote, chapter_id="2", source_node_id="monte_ch2_p0")
+        trace = ReasoningTrace(
+            primary_hypothesis=AlternativeHypothesis(hypothesis_text="h", confidence_score=0.9, supporting_evidence=[span]),
+            alternatives_considered=[], logical_steps=["Step 1", "Step 2"])
+        return validator.validate_classification(
+            ClassificationResult(status="SUCCESS", confidence=0.9, reasoning_trace=trace), context)
+
+    real = validate("Mercedes waited by the harbour.")
+    assert real.status == "SUCCESS"
+    assert real.reasoning_trace.primary_hypothesis.supporting_evidence[0].corpus_chunk_ids == ["monte_ch2_p1"]
+    assert validate("Mercedes never waited.").status == "REJECTION"
+
+
+def test_saved_index_reloads_memory_mapped(tmp_path):
+    index = StorySuffixIndex.build("monte", STORY, chunk_text(STORY, "monte", 8))
+    index.save(str(tmp_path / "monte"))
+
+    [(story_id, mapped)] = load_all(str(tmp_path), mmap_mode="r").items()
+    assert story_id == "monte" and isinstance(mapped.suffix_array, np.memmap)
+    assert mapped.locate("wrote the letter that night") == index.locate("wrote the letter that night")
@@ -0,0 +1,47 @@
+"""
+Tests for per-query trace spans
+"""
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils import tracing
+
+
+def test_nested_spans_share_a_trace_across_the_thread_pool(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracing.configure({"tracing": {"enabled": True, "path": str(path)}})
+    pool = ThreadPoolExecutor(max_workers=1)
+
+    def retrieve():
+        with tracing.span("retrieve") as span:
+            span.set(chunks=8)
+
+    async def query():
+        with tracing.span("query", story_id="monte"):
+            await asyncio.get_running_loop().run_in_executor(pool, tracing.bind(retrieve))
+            with tracing.span("llm", prompt_tokens=812):
+                await asyncio.sleep(0)
+
+    try:
+        asyncio.run(query())
+        asyncio.run(query())
+    finally:
+        tracing.configure(None)
+
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [span["name"] for span in spans] == ["retrieve", "llm", "query"] * 2
+    first, second = spans[:3], spans[3:]
+    root = first[2]
+    assert root["parent_id"] is None and root["attrs"] == {"story_id": "monte"}
+    assert all(span["trace_id"] == root["trace_id"] and span["parent_id"] == root["span_id"] for span in first[:2])
+    assert first[0]["attrs"] == {"chunks": 8}
+    assert second[0]["trace_id"] != root["trace_id"]
+
+
+def test_disabled_tracing_hands_out_the_shared_noop_span():
+    tracing.configure({"tracing": {"enabled": False}})
+    with tracing.span("query", story_id="monte") as span:
+        assert span is tracing.NOOP_SPAN
+        assert span.set(chunks=3) is span
+        assert tracing.current_trace_id() is None